@@ -19,6 +19,14 @@ class Settings(BaseSettings):
         f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
     )
 
+    # Materialized views refreshed concurrently, each on its own pooled connection
+    VIEW_REFRESH_WORKERS: int = int(os.getenv("VIEW_REFRESH_WORKERS", 4))
+
+    # Keep day-grouped views as tables and only recompute each batch's dates
+    INCREMENTAL_ROLLUPS: bool = (
+        os.getenv("INCREMENTAL_ROLLUPS", "false").lower() == "true"
+    )
+
     # CORS
     CORS_ORIGINS: List[str] = [
         "http://localhost:3000",  # Next.js frontend
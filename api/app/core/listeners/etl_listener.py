@@ -1,3 +1,4 @@
+import json
 import select
 import psycopg2
 
@@ -26,10 +27,29 @@ class ETLListener:
         # Initialize task managers
         self.task_manager = TaskManager()
 
-    def process_batch(self, batch_id: str):
+    @staticmethod
+    def parse_payload(payload: str) -> tuple:
+        """
+        Split an etl_complete payload into the batch id and its date range.
+        The ETL sends a JSON object with the trip_date range of the batch,
+        older ETL versions send the bare batch id.
+
+        Returns:
+            tuple: (batch_id, dict with min_trip_date, max_trip_date and
+                full_refresh, or None when the payload has no range)
+        """
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return payload, None
+        if not isinstance(message, dict):
+            return payload, None
+        return message.get("batch_id"), message
+
+    def process_batch(self, batch_id: str, date_range: dict = None):
         try:
             logger.info(f"Starting post-ETL processing for batch: {batch_id}")
-            self.task_manager.process_completed_batch(batch_id)
+            self.task_manager.process_completed_batch(batch_id, date_range)
 
         except Exception as e:
             logger.error(f"Error processing batch {batch_id}: {e}")
@@ -48,16 +68,14 @@ class ETLListener:
 
                     self.listen_conn.poll()
                     while self.listen_conn.notifies:
-                        notify = self.listen_conn.notifies.pop()
-                        batch_id = notify.payload
+                        notify = self.listen_conn.notifies.pop(0)
+                        batch_id, date_range = self.parse_payload(notify.payload)
                         logger.info(
                             f"Received ETL completion notification for batch: {batch_id}"
                         )
 
                         # Process the completed batch
-                        self.process_batch(batch_id)
-                        # Close the connection to prevent memory leak
-                        self.listen_conn.close()
+                        self.process_batch(batch_id, date_range)
 
         except Exception as e:
             logger.error(f"Listener error: {e}")
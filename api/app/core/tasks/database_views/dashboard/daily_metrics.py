@@ -1,6 +1,7 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
@@ -9,19 +10,24 @@ class DailyMetricsView(MaterializedViewManager):
     VIEW_NAME = "mv_daily_metrics"
     INDEX_NAME = "idx_mv_daily_metrics_date"
     COLUMN_NAME = "metric_date"
+    KEY_COLUMNS = ["metric_date"]
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         SELECT 
-            DATE(vl.trip_date) as metric_date,
-            COUNT(DISTINCT s.shipment_id) as total_shipments,
-            COUNT(DISTINCT vl.vehicle_id) as active_vehicles,
-            SUM(s.cost) as total_revenue,
-            AVG(s.delivery_time) as avg_delivery_time
-        FROM vehicle_logs vl
-        JOIN shipments s ON vl.log_id = s.log_id AND vl.trip_date = s.trip_date
-        WHERE vl.mileage IS NOT NULL 
-            AND vl.fuel_used IS NOT NULL
-        GROUP BY DATE(vl.trip_date);
+            f.metric_date,
+            COUNT(DISTINCT f.shipment_id) as total_shipments,
+            COUNT(DISTINCT f.vehicle_id) as active_vehicles,
+            SUM(f.cost) as total_revenue,
+            AVG(f.delivery_time) as avg_delivery_time
+        FROM mv_shipment_facts f
+        WHERE f.shipment_id IS NOT NULL
+            AND f.mileage IS NOT NULL 
+            AND f.fuel_used IS NOT NULL
+            AND {date_filter}
+        GROUP BY f.metric_date;
     """
 
     def __init__(self, db: Session = None):
@@ -30,5 +36,6 @@ class DailyMetricsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(self.INDEX_NAME, self.VIEW_NAME, self.COLUMN_NAME)
@@ -9,6 +9,7 @@ class DailyTrendsView(MaterializedViewManager):
     VIEW_NAME = "mv_daily_trends"
     INDEX_NAME = "idx_mv_daily_trends_date"
     COLUMN_NAME = "metric_date"
+    KEY_COLUMNS = ["metric_date"]
 
     VIEW_QUERY = """
         SELECT 
@@ -51,5 +52,6 @@ class DailyTrendsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(self.INDEX_NAME, self.VIEW_NAME, self.COLUMN_NAME)
@@ -1,6 +1,9 @@
+import hashlib
+
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+from app.core.config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -9,23 +12,180 @@ logger = get_logger(__name__)
 class MaterializedViewManager:
     """Manages materialized views and indexes using an SQLAlchemy session."""
 
+    # Columns identifying a row, REFRESH CONCURRENTLY needs a unique index on them
+    KEY_COLUMNS = []
+    # Whether NULL key values compare equal, needed for keys over nullable columns
+    KEY_NULLS_NOT_DISTINCT = False
+    # View classes this view reads, they are built and refreshed first
+    DEPENDS_ON = []
+    # Whether a day's rows only depend on that day's trips, such views are kept
+    # as rollup tables updated per batch date range with INCREMENTAL_ROLLUPS
+    INCREMENTAL = False
+    # Placeholders of VIEW_QUERY and the date column each one restricts
+    DATE_FILTERS = {"date_filter": "vl.trip_date"}
+    # Plain refreshes block readers, only for views no endpoint reads
+    REFRESH_CONCURRENTLY = True
+
     def __init__(self, db_session: Session):
         self.db_session = db_session
+        # Set by create_view and create_rollup_table when this instance built it
+        self.created = False
+
+    @property
+    def is_rollup(self) -> bool:
+        """Whether the view is stored as an incrementally maintained table."""
+        return settings.INCREMENTAL_ROLLUPS and self.INCREMENTAL
+
+    def view_query(self, date_filter: bool = False) -> str:
+        """VIEW_QUERY over every date, or over :start_date to :end_date."""
+        conditions = {
+            placeholder: (
+                f"{column} BETWEEN :start_date AND :end_date" if date_filter else "TRUE"
+            )
+            for placeholder, column in self.DATE_FILTERS.items()
+        }
+        return self.VIEW_QUERY.format(**conditions)
+
+    def stored_relation(self, name: str):
+        """
+        Kind and definition version of an existing view or table.
+
+        Returns:
+            tuple: (pg_class relkind, "m" or "r", and the version comment),
+                None if there is no such relation
+        """
+        return self.db_session.execute(
+            text(
+                """
+                SELECT c.relkind, obj_description(c.oid, 'pg_class')
+                FROM pg_class c
+                WHERE c.relname = :name AND c.relkind IN ('m', 'r')
+                    AND pg_table_is_visible(c.oid)
+                """
+            ),
+            {"name": name},
+        ).first()
+
+    def create_storage(self):
+        """Creates the materialized view, or its rollup table in rollup mode."""
+        if self.is_rollup:
+            self.create_rollup_table(self.VIEW_NAME, self.view_query())
+        else:
+            self.create_view(self.VIEW_NAME, self.view_query())
 
     def create_view(self, view_name: str, query: str):
         """Creates a materialized view if it does not exist."""
-        logger.info(f"Creating materialized view {view_name}...")
-        sql_query = text(
-            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view_name} AS {query};"
+        self._create_relation("MATERIALIZED VIEW", "m", view_name, query)
+
+    def create_rollup_table(self, table_name: str, query: str):
+        """
+        Creates a rollup table filled with every date if it does not exist.
+        It takes the view's name, so readers don't depend on the mode.
+        """
+        self._create_relation("TABLE", "r", table_name, query)
+
+    def _create_relation(self, kind_sql: str, kind: str, name: str, query: str):
+        """
+        Creates a view or table from a query, tagged with the query's hash.
+        An existing relation of the other kind, or built from another version
+        of the query, is dropped with its dependents and built again; the
+        dependents are rebuilt by their own setup.
+        """
+        version = hashlib.sha1(" ".join(query.split()).encode()).hexdigest()
+        stored = self.stored_relation(name)
+        if stored and tuple(stored) != (kind, version):
+            logger.info(f"Rebuilding {name} from its current definition...")
+            stored_sql = "MATERIALIZED VIEW" if stored[0] == "m" else "TABLE"
+            self._execute_sql(text(f"DROP {stored_sql} {name} CASCADE;"))
+            stored = None
+
+        logger.info(f"Creating {kind_sql.lower()} {name}...")
+        self.created = (
+            self._execute_transaction(
+                [
+                    (f"CREATE {kind_sql} IF NOT EXISTS {name} AS {query}", {}),
+                    (f"COMMENT ON {kind_sql} {name} IS '{version}'", {}),
+                ]
+            )
+            and not stored
+        )
+
+    def create_unique_key(self):
+        """Creates the unique index over KEY_COLUMNS."""
+        self.create_unique_index(
+            f"uq_{self.VIEW_NAME}",
+            self.VIEW_NAME,
+            ", ".join(self.KEY_COLUMNS),
+            nulls_not_distinct=self.KEY_NULLS_NOT_DISTINCT,
         )
-        self._execute_sql(sql_query)
 
-    def refresh_view(self, view_name: str, concurrently: bool = True):
+    def refresh_view(self, view_name: str, concurrently: bool = True) -> bool:
         """Refreshes a materialized view."""
         logger.info(f"Refreshing materialized view {view_name}...")
         concurrent_sql = "CONCURRENTLY" if concurrently else ""
         sql_query = text(f"REFRESH MATERIALIZED VIEW {concurrent_sql} {view_name};")
-        self._execute_sql(sql_query)
+        return self._execute_sql(sql_query)
+
+    def refresh(self, date_range: dict = None) -> bool:
+        """
+        Refreshes the view unless setup just built it.
+        CONCURRENTLY keeps the old rows readable during the refresh, it needs
+        the unique key index every view creates in setup.
+
+        Args:
+            date_range (dict, optional): min_trip_date, max_trip_date and
+                full_refresh of the batch, used by rollup tables
+        """
+        if self.created:
+            return True
+        if self.is_rollup:
+            return self.refresh_rollup(date_range)
+        if not self.REFRESH_CONCURRENTLY:
+            return self.refresh_view(self.VIEW_NAME, concurrently=False)
+        if self.refresh_view(self.VIEW_NAME, concurrently=True):
+            return True
+        logger.warning(f"Falling back to a blocking refresh of {self.VIEW_NAME}")
+        return self.refresh_view(self.VIEW_NAME, concurrently=False)
+
+    def refresh_rollup(self, date_range: dict = None) -> bool:
+        """
+        Recomputes the batch's dates of a rollup table: their rows are deleted
+        and aggregated again in one transaction, so readers see either the old
+        or the new rows of a day. Without a known range every date is
+        recomputed.
+        """
+        table = self.VIEW_NAME
+        if (
+            not date_range
+            or date_range.get("full_refresh")
+            or not date_range.get("min_trip_date")
+        ):
+            logger.info(f"Recomputing every date of rollup table {table}...")
+            return self._execute_transaction(
+                [
+                    (f"DELETE FROM {table}", {}),
+                    (f"INSERT INTO {table} {self.view_query()}", {}),
+                ]
+            )
+
+        params = {
+            "start_date": date_range["min_trip_date"],
+            "end_date": date_range["max_trip_date"],
+        }
+        logger.info(
+            f"Recomputing rollup table {table} from {params['start_date']} "
+            f"to {params['end_date']}..."
+        )
+        return self._execute_transaction(
+            [
+                (
+                    f"DELETE FROM {table} "
+                    "WHERE metric_date BETWEEN :start_date AND :end_date",
+                    params,
+                ),
+                (f"INSERT INTO {table} {self.view_query(date_filter=True)}", params),
+            ]
+        )
 
     def create_index(self, index_name: str, view_name: str, column: str):
         """Creates an index on a materialized view."""
@@ -35,21 +195,54 @@ class MaterializedViewManager:
         )
         self._execute_sql(sql_query)
 
-    def create_unique_index(self, index_name: str, view_name: str, column: str):
-        """Creates a unique index on a materialized view."""
+    def create_unique_index(
+        self,
+        index_name: str,
+        view_name: str,
+        column: str,
+        nulls_not_distinct: bool = False,
+    ):
+        """
+        Creates a unique index on a materialized view.
+        With nulls_not_distinct, NULL key columns compare equal like they do
+        in GROUP BY (PostgreSQL 15+).
+        """
         logger.info(f"Creating unique index {index_name} on {view_name}...")
+        nulls_sql = " NULLS NOT DISTINCT" if nulls_not_distinct else ""
         sql_query = text(
-            f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {view_name} ({column});"
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} "
+            f"ON {view_name} ({column}){nulls_sql};"
         )
         self._execute_sql(sql_query)
 
-    def _execute_sql(self, sql_query):
+    def _execute_sql(self, sql_query) -> bool:
         """Executes a SQL command using the provided SQLAlchemy session."""
         try:
             logger.debug(f"Executing SQL query for: {sql_query}")
             self.db_session.execute(sql_query)
             self.db_session.commit()
             logger.debug("SQL query executed successfully")
+            return True
         except Exception as e:
             self.db_session.rollback()
             logger.error(f"Error executing SQL query: {e}")
+            return False
+
+    def _execute_transaction(self, statements: list) -> bool:
+        """
+        Executes SQL statements in a single transaction.
+
+        Args:
+            statements (list): (sql, params) pairs
+        """
+        try:
+            for sql, params in statements:
+                logger.debug(f"Executing SQL query for: {sql}")
+                self.db_session.execute(text(sql), params)
+            self.db_session.commit()
+            logger.debug("SQL transaction executed successfully")
+            return True
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error(f"Error executing SQL transaction: {e}")
+            return False
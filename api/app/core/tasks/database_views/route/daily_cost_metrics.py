@@ -1,6 +1,7 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.route.route_metrics import RouteMetricsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
@@ -9,6 +10,10 @@ class DailyCostMetricsView(MaterializedViewManager):
     VIEW_NAME = "mv_daily_cost_metrics"
     INDEX_NAME = "idx_mv_daily_cost_metrics_date"
     COLUMN_NAME = "metric_date"
+    KEY_COLUMNS = ["metric_date"]
+    INCREMENTAL = True
+    DEPENDS_ON = [RouteMetricsView]
+    DATE_FILTERS = {"date_filter": "metric_date"}
 
     VIEW_QUERY = """
         SELECT 
@@ -21,6 +26,7 @@ class DailyCostMetricsView(MaterializedViewManager):
             COUNT(DISTINCT vehicle_id) as vehicle_count,
             AVG(avg_cost) as daily_avg_cost
         FROM mv_route_metrics
+        WHERE {date_filter}
         GROUP BY metric_date;
     """
 
@@ -30,5 +36,6 @@ class DailyCostMetricsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        # The date index is already the view's unique key
         self.create_unique_index(self.INDEX_NAME, self.VIEW_NAME, self.COLUMN_NAME)
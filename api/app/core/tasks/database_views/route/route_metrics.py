@@ -1,6 +1,7 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
@@ -9,21 +10,27 @@ class RouteMetricsView(MaterializedViewManager):
     VIEW_NAME = "mv_route_metrics"
     INDEX_NAME = "idx_mv_route_metrics_date"
     COLUMN_NAME = "metric_date"
+    KEY_COLUMNS = ["metric_date", "origin", "destination", "vehicle_id"]
+    KEY_NULLS_NOT_DISTINCT = True
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         SELECT 
-            DATE(vl.trip_date) as metric_date,
-            s.origin,
-            s.destination,
-            vl.vehicle_id,
+            f.metric_date,
+            f.origin,
+            f.destination,
+            f.vehicle_id,
             COUNT(*) as shipment_count,
-            SUM(s.cost) as total_cost,
-            AVG(s.cost) as avg_cost,
-            SUM(s.weight) as total_weight,
-            SUM(vl.mileage) as total_mileage
-        FROM shipments s
-        JOIN vehicle_logs vl ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date
-        GROUP BY DATE(vl.trip_date), s.origin, s.destination, vl.vehicle_id;
+            SUM(f.cost) as total_cost,
+            AVG(f.cost) as avg_cost,
+            SUM(f.weight) as total_weight,
+            SUM(f.mileage) as total_mileage
+        FROM mv_shipment_facts f
+        WHERE f.shipment_id IS NOT NULL
+            AND {date_filter}
+        GROUP BY f.metric_date, f.origin, f.destination, f.vehicle_id;
     """
 
     def __init__(self, db: Session = None):
@@ -32,7 +39,8 @@ class RouteMetricsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(self.INDEX_NAME, self.VIEW_NAME, self.COLUMN_NAME)
         self.create_index(
             "idx_mv_route_metrics_cost", self.VIEW_NAME, "total_cost DESC"
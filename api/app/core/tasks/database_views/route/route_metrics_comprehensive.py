@@ -1,39 +1,46 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
 
 class RouteMetricsComprehensiveView(MaterializedViewManager):
     VIEW_NAME = "mv_route_metrics_comprehensive"
+    KEY_COLUMNS = ["metric_date", "origin", "destination", "vehicle_id"]
+    KEY_NULLS_NOT_DISTINCT = True
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         SELECT 
-            DATE(vl.trip_date) as metric_date,
-            s.origin,
-            s.destination,
-            vl.vehicle_id,
+            f.metric_date,
+            f.origin,
+            f.destination,
+            f.vehicle_id,
             COUNT(*) as shipment_count,
             -- Basic metrics
-            CAST(AVG(s.delivery_time) AS DECIMAL(10,2)) as avg_delivery_time,
-            CAST(MIN(s.delivery_time) AS DECIMAL(10,2)) as min_delivery_time,  -- Route performance
-            CAST(MAX(s.delivery_time) AS DECIMAL(10,2)) as max_delivery_time,  -- Route performance
+            CAST(AVG(f.delivery_time) AS DECIMAL(10,2)) as avg_delivery_time,
+            CAST(MIN(f.delivery_time) AS DECIMAL(10,2)) as min_delivery_time,  -- Route performance
+            CAST(MAX(f.delivery_time) AS DECIMAL(10,2)) as max_delivery_time,  -- Route performance
             
-            CAST(AVG(s.cost) AS DECIMAL(10,2)) as avg_cost,
-            CAST(AVG(s.weight) AS DECIMAL(10,2)) as avg_weight,
-            CAST(SUM(s.cost) AS DECIMAL(10,2)) as total_cost,
-            CAST(SUM(s.weight) AS DECIMAL(10,2)) as total_weight,
-            CAST(SUM(s.cost) / COUNT(*) AS DECIMAL(10,2)) as cost_per_trip,
+            CAST(AVG(f.cost) AS DECIMAL(10,2)) as avg_cost,
+            CAST(AVG(f.weight) AS DECIMAL(10,2)) as avg_weight,
+            CAST(SUM(f.cost) AS DECIMAL(10,2)) as total_cost,
+            CAST(SUM(f.weight) AS DECIMAL(10,2)) as total_weight,
+            CAST(SUM(f.cost) / COUNT(*) AS DECIMAL(10,2)) as cost_per_trip,
             
             -- Reliability metrics
-            CAST(STDDEV(s.delivery_time) AS DECIMAL(10,2)) as delivery_time_stddev,
+            CAST(STDDEV(f.delivery_time) AS DECIMAL(10,2)) as delivery_time_stddev,
             -- Value metrics
-            CAST(AVG(s.cost/NULLIF(s.weight, 0)) AS DECIMAL(10,2)) as cost_per_kg,
-            CAST(AVG(s.cost/NULLIF(s.delivery_time, 0)) AS DECIMAL(10,2)) as value_score
-        FROM shipments s
-        JOIN vehicle_logs vl ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date
-        GROUP BY DATE(vl.trip_date), s.origin, s.destination, vl.vehicle_id;
+            CAST(AVG(f.cost/NULLIF(f.weight, 0)) AS DECIMAL(10,2)) as cost_per_kg,
+            CAST(AVG(f.cost/NULLIF(f.delivery_time, 0)) AS DECIMAL(10,2)) as value_score
+        FROM mv_shipment_facts f
+        WHERE f.shipment_id IS NOT NULL
+            AND {date_filter}
+        GROUP BY f.metric_date, f.origin, f.destination, f.vehicle_id;
     """
 
     def __init__(self, db: Session = None):
@@ -42,7 +49,8 @@ class RouteMetricsComprehensiveView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(
             "idx_mv_route_metrics_comp_date", self.VIEW_NAME, "metric_date"
         )
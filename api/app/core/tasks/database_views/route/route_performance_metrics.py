@@ -1,32 +1,38 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
 
 class RoutePerformanceMetricsView(MaterializedViewManager):
     VIEW_NAME = "mv_route_performance_metrics"
+    KEY_COLUMNS = ["metric_date", "origin", "destination"]
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         WITH daily_metrics AS (
             SELECT 
-                DATE(vl.trip_date) as metric_date,
-                s.origin,
-                s.destination,
-                s.delivery_time,
-                s.cost,
-                s.weight,
+                f.metric_date,
+                f.origin,
+                f.destination,
+                f.delivery_time,
+                f.cost,
+                f.weight,
                 -- Pre-calculate daily averages for each route
-                AVG(s.delivery_time) OVER (PARTITION BY s.origin, s.destination, DATE(vl.trip_date)) as daily_avg_delivery_time,
-                COUNT(*) OVER (PARTITION BY s.origin, s.destination, DATE(vl.trip_date)) as daily_shipment_count,
+                AVG(f.delivery_time) OVER (PARTITION BY f.origin, f.destination, f.metric_date) as daily_avg_delivery_time,
+                COUNT(*) OVER (PARTITION BY f.origin, f.destination, f.metric_date) as daily_shipment_count,
                 -- Global min/max for the day
-                MIN(s.cost/NULLIF(s.weight, 0)) OVER (PARTITION BY DATE(vl.trip_date)) as daily_min_cost_per_kg,
-                MAX(s.cost/NULLIF(s.weight, 0)) OVER (PARTITION BY DATE(vl.trip_date)) as daily_max_cost_per_kg,
-                MIN(s.delivery_time) OVER (PARTITION BY DATE(vl.trip_date)) as daily_min_delivery_time,
-                MAX(s.delivery_time) OVER (PARTITION BY DATE(vl.trip_date)) as daily_max_delivery_time
-            FROM shipments s
-            JOIN vehicle_logs vl ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date
+                MIN(f.cost/NULLIF(f.weight, 0)) OVER (PARTITION BY f.metric_date) as daily_min_cost_per_kg,
+                MAX(f.cost/NULLIF(f.weight, 0)) OVER (PARTITION BY f.metric_date) as daily_max_cost_per_kg,
+                MIN(f.delivery_time) OVER (PARTITION BY f.metric_date) as daily_min_delivery_time,
+                MAX(f.delivery_time) OVER (PARTITION BY f.metric_date) as daily_max_delivery_time
+            FROM mv_shipment_facts f
+            WHERE f.shipment_id IS NOT NULL
+                AND {date_filter}
         )
         SELECT 
             metric_date,
@@ -57,7 +63,8 @@ class RoutePerformanceMetricsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(
             "idx_mv_route_perf_date", self.VIEW_NAME, "metric_date"
         )
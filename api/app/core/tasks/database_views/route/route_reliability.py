@@ -1,27 +1,48 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
 
 class RouteReliabilityView(MaterializedViewManager):
+    """
+    Mergeable delivery time aggregates per day and route: count, sum, sum of
+    squares and a histogram mapping each delivery_time to its deliveries.
+    Summing the rows of any date range gives the route's mean, stddev and
+    on-time count for that range.
+    """
+
     VIEW_NAME = "mv_route_reliability"
-    INDEX_NAME = "idx_mv_route_reliability_date"
-    COLUMN_NAME = "metric_date"
+    KEY_COLUMNS = ["metric_date", "origin", "destination"]
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
-        SELECT 
-            DATE(vl.trip_date) as metric_date,
-            s.origin,
-            s.destination,
-            s.delivery_time,
-            COUNT(*) OVER (PARTITION BY s.origin, s.destination) as route_delivery_count,
-            AVG(s.delivery_time) OVER (PARTITION BY s.origin, s.destination) as route_avg_delivery_time,
-            AVG(s.delivery_time) OVER () as global_avg_delivery_time,
-            STDDEV(s.delivery_time) OVER (PARTITION BY s.origin, s.destination) as route_stddev
-        FROM shipments s
-        JOIN vehicle_logs vl ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date;
+        WITH route_times AS (
+            SELECT
+                f.metric_date,
+                f.origin,
+                f.destination,
+                f.delivery_time,
+                COUNT(*) as deliveries
+            FROM mv_shipment_facts f
+            WHERE f.shipment_id IS NOT NULL
+                AND {date_filter}
+            GROUP BY f.metric_date, f.origin, f.destination, f.delivery_time
+        )
+        SELECT
+            metric_date,
+            origin,
+            destination,
+            CAST(SUM(deliveries) AS BIGINT) as delivery_count,
+            CAST(SUM(delivery_time * deliveries) AS BIGINT) as delivery_time_sum,
+            CAST(SUM(delivery_time::BIGINT * delivery_time * deliveries) AS BIGINT) as delivery_time_sumsq,
+            jsonb_object_agg(delivery_time, deliveries) as delivery_time_histogram
+        FROM route_times
+        GROUP BY metric_date, origin, destination;
     """
 
     def __init__(self, db: Session = None):
@@ -30,8 +51,8 @@ class RouteReliabilityView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
-        self.create_index(self.INDEX_NAME, self.VIEW_NAME, self.COLUMN_NAME)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(
             "idx_mv_route_reliability_route", self.VIEW_NAME, "origin, destination"
         )
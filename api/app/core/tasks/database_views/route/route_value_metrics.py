@@ -1,6 +1,7 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
@@ -9,20 +10,25 @@ class RouteValueMetricsView(MaterializedViewManager):
     VIEW_NAME = "mv_route_value_metrics"
     INDEX_NAME = "idx_mv_route_value_date"
     COLUMN_NAME = "metric_date"
+    KEY_COLUMNS = ["metric_date", "origin", "destination"]
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         SELECT 
-            DATE(vl.trip_date) as metric_date,
-            s.origin,
-            s.destination,
+            f.metric_date,
+            f.origin,
+            f.destination,
             COUNT(*) as shipment_count,
-            CAST(AVG(s.weight) AS DECIMAL(10,2)) as avg_shipment_weight,
-            CAST(AVG(s.cost) AS DECIMAL(10,2)) as avg_cost,
-            CAST(AVG(s.cost/NULLIF(s.weight, 0)) AS DECIMAL(10,2)) as cost_per_kg,
-            CAST(AVG(s.cost/(NULLIF(s.delivery_time, 0))) AS DECIMAL(10,2)) as value_score
-        FROM shipments s
-        JOIN vehicle_logs vl ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date
-        GROUP BY DATE(vl.trip_date), s.origin, s.destination;
+            CAST(AVG(f.weight) AS DECIMAL(10,2)) as avg_shipment_weight,
+            CAST(AVG(f.cost) AS DECIMAL(10,2)) as avg_cost,
+            CAST(AVG(f.cost/NULLIF(f.weight, 0)) AS DECIMAL(10,2)) as cost_per_kg,
+            CAST(AVG(f.cost/(NULLIF(f.delivery_time, 0))) AS DECIMAL(10,2)) as value_score
+        FROM mv_shipment_facts f
+        WHERE f.shipment_id IS NOT NULL
+            AND {date_filter}
+        GROUP BY f.metric_date, f.origin, f.destination;
     """
 
     def __init__(self, db: Session = None):
@@ -31,7 +37,8 @@ class RouteValueMetricsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index(self.INDEX_NAME, self.VIEW_NAME, self.COLUMN_NAME)
         self.create_index(
             "idx_mv_route_value_route", self.VIEW_NAME, "origin, destination"
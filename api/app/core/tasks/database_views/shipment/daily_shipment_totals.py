@@ -1,26 +1,32 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
 
 class DailyShipmentTotalsView(MaterializedViewManager):
     VIEW_NAME = "mv_daily_shipment_totals"
+    KEY_COLUMNS = ["metric_date"]
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         SELECT 
-            DATE(vl.trip_date) as metric_date,
-            COUNT(DISTINCT s.shipment_id) as total_shipments,
-            CAST(AVG(s.delivery_time) AS DECIMAL(10,2)) as avg_delivery_time,
-            CAST(SUM(s.cost) AS DECIMAL(10,2)) as total_cost,
-            CAST(AVG(s.cost) AS DECIMAL(10,2)) as avg_cost_per_shipment,
-            CAST(SUM(s.weight) AS DECIMAL(10,2)) as total_weight,
-            COUNT(DISTINCT s.origin) as unique_origins,
-            COUNT(DISTINCT s.destination) as unique_destinations
-        FROM shipments s
-        JOIN vehicle_logs vl ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date
-        GROUP BY DATE(vl.trip_date);
+            f.metric_date,
+            COUNT(DISTINCT f.shipment_id) as total_shipments,
+            CAST(AVG(f.delivery_time) AS DECIMAL(10,2)) as avg_delivery_time,
+            CAST(SUM(f.cost) AS DECIMAL(10,2)) as total_cost,
+            CAST(AVG(f.cost) AS DECIMAL(10,2)) as avg_cost_per_shipment,
+            CAST(SUM(f.weight) AS DECIMAL(10,2)) as total_weight,
+            COUNT(DISTINCT f.origin) as unique_origins,
+            COUNT(DISTINCT f.destination) as unique_destinations
+        FROM mv_shipment_facts f
+        WHERE f.shipment_id IS NOT NULL
+            AND {date_filter}
+        GROUP BY f.metric_date;
     """
 
     def __init__(self, db: Session = None):
@@ -29,5 +35,6 @@ class DailyShipmentTotalsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index("idx_mv_daily_shipment_totals_date", self.VIEW_NAME, "metric_date")
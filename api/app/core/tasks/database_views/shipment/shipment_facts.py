@@ -0,0 +1,53 @@
+from app.core.tasks.database_views.materialized_view_manager import (
+    MaterializedViewManager,
+)
+from app.db.session import SessionLocal
+from sqlalchemy.orm import Session
+
+
+class ShipmentFactsView(MaterializedViewManager):
+    """
+    Denormalized join of vehicle_logs and shipments every rollup reads, so the
+    join runs once per batch instead of once per view. One row per shipment
+    with its log's vehicle, mileage and fuel; logs without shipments keep one
+    row with NULL shipment columns for the vehicle metrics.
+    """
+
+    VIEW_NAME = "mv_shipment_facts"
+    KEY_COLUMNS = ["metric_date", "log_id", "shipment_id"]
+    KEY_NULLS_NOT_DISTINCT = True
+    INCREMENTAL = True
+    DATE_FILTERS = {
+        "date_filter": "vl.trip_date",
+        "shipment_date_filter": "s.trip_date",
+    }
+    # Only the rollups read the facts, and they wait for the refresh anyway
+    REFRESH_CONCURRENTLY = False
+
+    VIEW_QUERY = """
+        SELECT
+            DATE(vl.trip_date) as metric_date,
+            vl.log_id,
+            vl.vehicle_id,
+            vl.mileage,
+            vl.fuel_used,
+            s.shipment_id,
+            s.origin,
+            s.destination,
+            s.weight,
+            s.cost,
+            s.delivery_time
+        FROM vehicle_logs vl
+        LEFT JOIN shipments s ON s.log_id = vl.log_id AND s.trip_date = vl.trip_date
+            AND {shipment_date_filter}
+        WHERE {date_filter};
+    """
+
+    def __init__(self, db: Session = None):
+        self.db: Session = db or SessionLocal()
+        super().__init__(self.db)
+
+    def setup(self):
+        """Creates the view and its index."""
+        self.create_storage()
+        self.create_unique_key()
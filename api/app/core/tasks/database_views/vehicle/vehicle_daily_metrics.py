@@ -1,34 +1,40 @@
 from app.core.tasks.database_views.materialized_view_manager import (
     MaterializedViewManager,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.db.session import SessionLocal
 from sqlalchemy.orm import Session
 
 
 class VehicleDailyMetricsView(MaterializedViewManager):
     VIEW_NAME = "mv_vehicle_daily_metrics"
+    KEY_COLUMNS = ["metric_date", "vehicle_id", "origin", "destination"]
+    KEY_NULLS_NOT_DISTINCT = True
+    INCREMENTAL = True
+    DEPENDS_ON = [ShipmentFactsView]
+    DATE_FILTERS = {"date_filter": "f.metric_date"}
 
     VIEW_QUERY = """
         SELECT 
-            DATE(vl.trip_date) as metric_date,
+            f.metric_date,
             v.vehicle_id,
             v.name,
             v.total_mileage as lifetime_mileage,
-            COUNT(DISTINCT vl.log_id) as trip_count,
-            SUM(vl.mileage) as daily_mileage,
-            SUM(vl.fuel_used) as daily_fuel,
-            CAST(SUM(vl.mileage) / NULLIF(SUM(vl.fuel_used), 0) AS DECIMAL(10,2)) as daily_fuel_efficiency,
-            COUNT(DISTINCT s.shipment_id) as daily_shipments,
-            CAST(AVG(s.delivery_time) AS DECIMAL(10,2)) as avg_delivery_time,
-            CAST(SUM(s.cost) AS DECIMAL(10,2)) as daily_revenue,
-            s.origin,
-            s.destination
+            COUNT(DISTINCT f.log_id) as trip_count,
+            SUM(f.mileage) as daily_mileage,
+            SUM(f.fuel_used) as daily_fuel,
+            CAST(SUM(f.mileage) / NULLIF(SUM(f.fuel_used), 0) AS DECIMAL(10,2)) as daily_fuel_efficiency,
+            COUNT(DISTINCT f.shipment_id) as daily_shipments,
+            CAST(AVG(f.delivery_time) AS DECIMAL(10,2)) as avg_delivery_time,
+            CAST(SUM(f.cost) AS DECIMAL(10,2)) as daily_revenue,
+            f.origin,
+            f.destination
         FROM vehicles v
-        LEFT JOIN vehicle_logs vl ON v.vehicle_id = vl.vehicle_id
-        LEFT JOIN shipments s ON vl.log_id = s.log_id
-        WHERE vl.mileage IS NOT NULL 
-            AND vl.fuel_used IS NOT NULL
-        GROUP BY DATE(vl.trip_date), v.vehicle_id, v.name, s.origin, s.destination;
+        JOIN mv_shipment_facts f ON f.vehicle_id = v.vehicle_id
+        WHERE f.mileage IS NOT NULL 
+            AND f.fuel_used IS NOT NULL
+            AND {date_filter}
+        GROUP BY f.metric_date, v.vehicle_id, v.name, f.origin, f.destination;
     """
 
     def __init__(self, db: Session = None):
@@ -37,7 +43,8 @@ class VehicleDailyMetricsView(MaterializedViewManager):
 
     def setup(self):
         """Creates the view and its index."""
-        self.create_view(self.VIEW_NAME, self.VIEW_QUERY)
+        self.create_storage()
+        self.create_unique_key()
         self.create_index("idx_mv_vehicle_metrics_date", self.VIEW_NAME, "metric_date")
         self.create_index("idx_mv_vehicle_metrics_id", self.VIEW_NAME, "vehicle_id")
         self.create_index(
@@ -1,4 +1,5 @@
-from app.db.session import get_context_db
+from functools import partial
+
 from app.core.tasks.database_views.dashboard.daily_metrics import DailyMetricsView
 from app.core.tasks.database_views.route.daily_cost_metrics import DailyCostMetricsView
 from app.core.tasks.database_views.route.route_metrics import RouteMetricsView
@@ -15,27 +16,61 @@ from app.core.tasks.database_views.route.route_performance_metrics import (
 from app.core.tasks.database_views.shipment.daily_shipment_totals import (
     DailyShipmentTotalsView,
 )
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
 from app.core.tasks.database_views.vehicle.vehicle_daily_metrics import (
     VehicleDailyMetricsView,
 )
+from app.core.tasks.database_views.view_scheduler import ViewScheduler
 
 
 class ViewExecutor:
+    # Views run concurrently, ordering between them comes from DEPENDS_ON
+    VIEWS = [
+        # Join of vehicle_logs and shipments the other views read
+        ShipmentFactsView,
+        # Dashboard views
+        DailyMetricsView,
+        # Routes views
+        RouteMetricsView,
+        DailyCostMetricsView,
+        RouteReliabilityView,
+        RouteValueMetricsView,
+        RouteMetricsComprehensiveView,
+        RoutePerformanceMetricsView,
+        # shipments views
+        DailyShipmentTotalsView,
+        # vehicle views
+        VehicleDailyMetricsView,
+    ]
+
+    def __init__(self, workers: int = None):
+        self.scheduler = ViewScheduler(self.VIEWS, workers)
+
+    @staticmethod
+    def setup_view(view) -> bool:
+        view.setup()
+        return True
+
+    @staticmethod
+    def refresh_view(view, date_range: dict = None) -> bool:
+        view.setup()
+        return view.refresh(date_range)
+
     def execute(self):
-        with get_context_db() as db:
-            # Dashboard views
-            DailyMetricsView(db).setup()
-
-            # Routes views
-            RouteMetricsView(db).setup()
-            DailyCostMetricsView(db).setup()
-            RouteReliabilityView(db).setup()
-            RouteValueMetricsView(db).setup()
-            RouteMetricsComprehensiveView(db).setup()
-            RoutePerformanceMetricsView(db).setup()
-
-            # shipments views
-            DailyShipmentTotalsView(db).setup()
-
-            # vehicle views
-            VehicleDailyMetricsView(db).setup()
+        self.scheduler.run(self.setup_view)
+
+    def refresh(self, date_range: dict = None) -> bool:
+        """
+        Creates missing views and refreshes the existing ones.
+
+        Args:
+            date_range (dict, optional): Trip date range of the batch, rollup
+                tables only recompute these dates
+
+        Returns:
+            bool: True if every view is up to date
+        """
+        results = self.scheduler.run(
+            partial(self.refresh_view, date_range=date_range)
+        )
+        return all(results.values())
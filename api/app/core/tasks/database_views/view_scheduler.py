@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from app.core.config import settings
+from app.db.session import get_context_db
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ViewScheduler:
+    """
+    Runs materialized view tasks concurrently, each view as soon as the views
+    in its DEPENDS_ON finished. Every task runs in its own thread on its own
+    pooled session, so independent views refresh in parallel. Views whose
+    dependencies failed are skipped.
+
+    Follows the ETL's DagRunner (etl/src/pipeline/dag.py), which the API
+    can't import since both ship as separate images. The scheduling rules
+    are the same, the differences are deliberate:
+    - Nodes are view classes keyed by VIEW_NAME, edges come from DEPENDS_ON
+      classes instead of stage names.
+    - One task is applied to every view per run, so the scheduler is reused
+      for setup and refresh, and results are reset on every run.
+    - Each run owns its executor; there is no on_success hook.
+    """
+
+    def __init__(self, views: list, workers: int = None):
+        self.views = {view_class.VIEW_NAME: view_class for view_class in views}
+        self.workers = workers or settings.VIEW_REFRESH_WORKERS
+        self.results = {}
+        self.timings = {}
+
+        for view_class in views:
+            for dependency in view_class.DEPENDS_ON:
+                if dependency.VIEW_NAME not in self.views:
+                    raise ValueError(
+                        f"View {view_class.VIEW_NAME} depends on "
+                        f"unscheduled view {dependency.VIEW_NAME}"
+                    )
+
+    def run(self, task) -> dict:
+        """
+        Run a task for every view.
+
+        Args:
+            task (callable): Called with a view instance bound to a fresh
+                session, returns True on success
+
+        Returns:
+            dict: View name to result, False for failed and skipped views
+        """
+        waiting = dict(self.views)
+        running = {}
+        self.results = {}
+        self.timings = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while waiting or running:
+                skipped = False
+                for name, view_class in list(waiting.items()):
+                    dependencies = [
+                        self.results.get(dep.VIEW_NAME)
+                        for dep in view_class.DEPENDS_ON
+                    ]
+                    if any(result is False for result in dependencies):
+                        logger.warning(f"Skipping view {name}, a dependency failed")
+                        self.results[name] = False
+                        del waiting[name]
+                        skipped = True
+                    elif all(dependencies):
+                        running[executor.submit(self.run_view, view_class, task)] = (
+                            name
+                        )
+                        del waiting[name]
+
+                if not running:
+                    if skipped:
+                        # Dependents of the skipped views resolve on the next pass
+                        continue
+                    raise ValueError(f"Dependency cycle between {list(waiting)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.results[running.pop(future)] = future.result()
+
+        self.log_timings(time.perf_counter() - started)
+        return self.results
+
+    def run_view(self, view_class, task) -> bool:
+        started = time.perf_counter()
+        try:
+            with get_context_db() as db:
+                return bool(task(view_class(db)))
+        except Exception as e:
+            logger.error(f"View {view_class.VIEW_NAME} failed: {e}")
+            return False
+        finally:
+            self.timings[view_class.VIEW_NAME] = time.perf_counter() - started
+
+    def log_timings(self, total: float):
+        for name in self.views:
+            if name in self.timings:
+                status = "ok" if self.results.get(name) else "failed"
+                logger.info(f"View {name}: {self.timings[name]:.2f}s ({status})")
+            else:
+                logger.info(f"View {name}: skipped")
+        logger.info(
+            f"{len(self.views)} views finished in {total:.2f}s "
+            f"on {self.workers} connections"
+        )
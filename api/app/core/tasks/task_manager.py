@@ -12,9 +12,22 @@ class TaskManager:
         self.view_manager = ViewManager()
         self.calculation_status_service = CalculationStatusService()
 
-    def process_completed_batch(self, batch_id: str):
+    def process_completed_batch(self, batch_id: str, date_range: dict = None):
+        """
+        Args:
+            batch_id (str): Completed ETL batch
+            date_range (dict, optional): min_trip_date, max_trip_date and
+                full_refresh of the batch, None if the ETL didn't send them
+        """
         try:
             logger.info(f"Starting post-ETL processing for batch: {batch_id}")
+            if date_range:
+                logger.info(
+                    f"Batch {batch_id} loaded trip dates "
+                    f"{date_range.get('min_trip_date')} to "
+                    f"{date_range.get('max_trip_date')}"
+                    f"{' (full refresh)' if date_range.get('full_refresh') else ''}"
+                )
 
             # database flag to indicate calculation is in progress
             self.calculation_status_service.mark_calculation_start()
@@ -22,8 +35,8 @@ class TaskManager:
             # Create indexes
             self.index_manager.create_indexes()
 
-            # Create/Refresh materialized views
-            self.view_manager.create_materialize_views()
+            # Create missing materialized views and refresh the others
+            self.view_manager.refresh_views(date_range)
 
             # database flag to indicate calculation is complete
             self.calculation_status_service.mark_calculation_end()
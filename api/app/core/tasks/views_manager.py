@@ -16,6 +16,20 @@ class ViewManager:
 
         logger.info("Materialized views created")
 
-    # Future implementation
-    def refresh_views(self):
-        pass
+    def refresh_views(self, date_range: dict = None) -> bool:
+        """
+        Refreshes the materialized views after a batch, creating missing ones.
+
+        Args:
+            date_range (dict, optional): min_trip_date, max_trip_date and
+                full_refresh of the batch
+        """
+        logger.info("Refreshing materialized views...")
+
+        success = self.view_executors.refresh(date_range)
+
+        if success:
+            logger.info("Materialized views refreshed")
+        else:
+            logger.error("Some materialized views failed to refresh")
+        return success
@@ -39,30 +39,63 @@ class RouteService:
 
         query = text(
             f"""
-            WITH filtered_routes AS (
-                SELECT DISTINCT
+            WITH route_totals AS (
+                SELECT
                     origin,
                     destination,
-                    route_delivery_count as total_deliveries,
-                    CAST(route_avg_delivery_time AS DECIMAL(10,2)) as avg_delivery_time,
-                    CAST(route_stddev AS DECIMAL(10,2)) as delivery_time_variation,
+                    SUM(delivery_count) as delivery_count,
+                    SUM(delivery_time_sum) as delivery_time_sum,
+                    SUM(delivery_time_sumsq) as delivery_time_sumsq
+                FROM mv_route_reliability
+                {where_clause}
+                GROUP BY origin, destination
+                HAVING SUM(delivery_count) >= 5
+            ),
+            route_stats AS (
+                SELECT
+                    origin,
+                    destination,
+                    delivery_count,
+                    delivery_time_sum / delivery_count as avg_delivery_time,
+                    -- Sample stddev from the merged count, sum and sum of squares
+                    SQRT(GREATEST(
+                        (delivery_time_sumsq - delivery_time_sum * delivery_time_sum / delivery_count)
+                            / (delivery_count - 1),
+                        0
+                    )) as delivery_time_stddev
+                FROM route_totals
+            ),
+            on_time AS (
+                SELECT
+                    r.origin,
+                    r.destination,
+                    SUM(h.value::BIGINT) as on_time_count
+                FROM mv_route_reliability r
+                JOIN route_stats rs
+                    ON rs.origin = r.origin AND rs.destination = r.destination
+                CROSS JOIN LATERAL jsonb_each_text(r.delivery_time_histogram) h
+                WHERE r.metric_date BETWEEN :start_date AND :end_date
+                    AND h.key::INTEGER <= rs.avg_delivery_time + 1
+                GROUP BY r.origin, r.destination
+            ),
+            filtered_routes AS (
+                SELECT
+                    rs.origin,
+                    rs.destination,
+                    rs.delivery_count as total_deliveries,
+                    CAST(rs.avg_delivery_time AS DECIMAL(10,2)) as avg_delivery_time,
+                    CAST(rs.delivery_time_stddev AS DECIMAL(10,2)) as delivery_time_variation,
                     CAST(
-                        100 * (1 - COALESCE(route_stddev / NULLIF(route_avg_delivery_time, 0), 0))
+                        100 * (1 - COALESCE(rs.delivery_time_stddev / NULLIF(rs.avg_delivery_time, 0), 0))
                         AS DECIMAL(10,2)
                     ) as reliability_score,
                     CAST(
-                        100 * COUNT(CASE 
-                            WHEN delivery_time <= route_avg_delivery_time + 1 
-                            THEN 1 
-                        END)::float / NULLIF(route_delivery_count, 0)
+                        100 * COALESCE(ot.on_time_count, 0)::float / rs.delivery_count
                         AS DECIMAL(10,2)
                     ) as on_time_delivery_rate
-                FROM mv_route_reliability
-                {where_clause}
-                GROUP BY 
-                    origin, destination, route_delivery_count, 
-                    route_avg_delivery_time, route_stddev
-                HAVING route_delivery_count >= 5
+                FROM route_stats rs
+                LEFT JOIN on_time ot
+                    ON ot.origin = rs.origin AND ot.destination = rs.destination
             ),
             total_count AS (
                 SELECT COUNT(*) as total FROM filtered_routes
@@ -0,0 +1,48 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app package lives next to tests/, as in the API image's /app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Tests that need Postgres run against their own database on the server
+# configured by DB_HOST, DB_PORT, DB_USER and DB_PASSWORD
+os.environ["DB_NAME"] = os.getenv("TEST_DB_NAME", "logistics_test")
+
+# A script run against a live API, not a unit test
+collect_ignore = ["load_test.py"]
+
+TEST_SCHEMA = "api_test"
+
+
+@pytest.fixture
+def db_session():
+    """
+    Session on an empty schema of the test database, dropped afterwards.
+    Skips the test without a server.
+    """
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+
+    from app.core.config import settings
+
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"options": f"-csearch_path={TEST_SCHEMA}"},
+    )
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {TEST_SCHEMA}"))
+    except Exception as e:
+        engine.dispose()
+        pytest.skip(f"No test database: {e}")
+
+    session = Session(engine)
+    yield session
+    session.close()
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {TEST_SCHEMA} CASCADE"))
+    engine.dispose()
@@ -0,0 +1,38 @@
+import json
+
+from app.core.listeners.etl_listener import ETLListener
+
+
+def test_json_payload_carries_the_date_range():
+    message = {
+        "batch_id": "batch_20240501",
+        "min_trip_date": "2024-04-30",
+        "max_trip_date": "2024-05-01",
+        "full_refresh": False,
+    }
+
+    batch_id, date_range = ETLListener.parse_payload(json.dumps(message))
+
+    assert batch_id == "batch_20240501"
+    assert date_range == message
+
+
+def test_full_refresh_payload_has_no_dates():
+    message = {
+        "batch_id": "batch_20240501",
+        "min_trip_date": None,
+        "max_trip_date": None,
+        "full_refresh": True,
+    }
+
+    batch_id, date_range = ETLListener.parse_payload(json.dumps(message))
+
+    assert batch_id == "batch_20240501"
+    assert date_range["full_refresh"]
+    assert date_range["min_trip_date"] is None
+
+
+def test_legacy_payload_is_the_bare_batch_id():
+    assert ETLListener.parse_payload("batch_20240501") == ("batch_20240501", None)
+    # Valid JSON that isn't an object is a batch id as well
+    assert ETLListener.parse_payload("20240501") == ("20240501", None)
@@ -0,0 +1,139 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.tasks.database_views.shipment.daily_shipment_totals import (
+    DailyShipmentTotalsView,
+)
+from app.core.tasks.database_views.shipment.shipment_facts import ShipmentFactsView
+
+
+@pytest.fixture
+def views(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INCREMENTAL_ROLLUPS", True)
+    db_session.execute(
+        text(
+            """
+            CREATE TABLE vehicle_logs (
+                log_id VARCHAR(50), vehicle_id VARCHAR(50), trip_date DATE,
+                mileage FLOAT, fuel_used FLOAT
+            )
+            """
+        )
+    )
+    db_session.execute(
+        text(
+            """
+            CREATE TABLE shipments (
+                shipment_id VARCHAR(50), origin VARCHAR(100),
+                destination VARCHAR(100), weight FLOAT, cost FLOAT,
+                delivery_time INTEGER, log_id VARCHAR(50), trip_date DATE
+            )
+            """
+        )
+    )
+    db_session.commit()
+    # In DEPENDS_ON order, like the view scheduler refreshes them
+    return [ShipmentFactsView(db_session), DailyShipmentTotalsView(db_session)]
+
+
+def add_log(db_session, log_id: str, trip_date: date, shipments: list):
+    db_session.execute(
+        text(
+            "INSERT INTO vehicle_logs VALUES "
+            "(:log_id, 'V1', :trip_date, 100, 10)"
+        ),
+        {"log_id": log_id, "trip_date": trip_date},
+    )
+    for shipment_id, origin, destination, cost, delivery_time in shipments:
+        db_session.execute(
+            text(
+                "INSERT INTO shipments VALUES (:shipment_id, :origin, "
+                ":destination, 5, :cost, :delivery_time, :log_id, :trip_date)"
+            ),
+            {
+                "shipment_id": shipment_id,
+                "origin": origin,
+                "destination": destination,
+                "cost": cost,
+                "delivery_time": delivery_time,
+                "log_id": log_id,
+                "trip_date": trip_date,
+            },
+        )
+    db_session.commit()
+
+
+def stored_rows(view) -> list:
+    key = ", ".join(view.KEY_COLUMNS)
+    return view.db_session.execute(
+        text(f"SELECT * FROM {view.VIEW_NAME} ORDER BY {key}")
+    ).fetchall()
+
+
+def full_refresh_rows(view) -> list:
+    key = ", ".join(view.KEY_COLUMNS)
+    query = view.view_query().strip().rstrip(";")
+    return view.db_session.execute(
+        text(f"SELECT * FROM ({query}) full_refresh ORDER BY {key}")
+    ).fetchall()
+
+
+def test_incremental_refresh_matches_full_refresh(db_session, views):
+    add_log(db_session, "L1", date(2024, 5, 1), [("S1", "Berlin", "Hamburg", 10, 2)])
+    add_log(db_session, "L2", date(2024, 5, 2), [("S2", "Berlin", "Munich", 20, 4)])
+    add_log(db_session, "L3", date(2024, 5, 3), [])
+    for view in views:
+        view.setup()
+        assert view.is_rollup
+
+    # A batch adds shipments to a loaded log, a log with shipments and a
+    # re-delivered shipment with a new cost
+    db_session.execute(
+        text(
+            "INSERT INTO shipments VALUES "
+            "('S3', 'Berlin', 'Munich', 5, 30, 6, 'L2', '2024-05-02')"
+        )
+    )
+    db_session.execute(text("UPDATE shipments SET cost = 25 WHERE shipment_id = 'S2'"))
+    db_session.commit()
+    add_log(
+        db_session,
+        "L4",
+        date(2024, 5, 3),
+        [("S4", "Munich", "Hamburg", 40, 3), ("S5", "Munich", "Hamburg", 50, 5)],
+    )
+
+    date_range = {
+        "min_trip_date": "2024-05-02",
+        "max_trip_date": "2024-05-03",
+        "full_refresh": False,
+    }
+    for view in views:
+        assert view.refresh_rollup(date_range)
+        assert stored_rows(view) == full_refresh_rows(view)
+
+    totals = {row.metric_date: row.total_shipments for row in stored_rows(views[1])}
+    assert totals == {date(2024, 5, 1): 1, date(2024, 5, 2): 2, date(2024, 5, 3): 2}
+
+
+def test_dates_outside_the_range_are_kept(db_session, views):
+    add_log(db_session, "L1", date(2024, 5, 1), [("S1", "Berlin", "Hamburg", 10, 2)])
+    add_log(db_session, "L2", date(2024, 5, 2), [("S2", "Berlin", "Munich", 20, 4)])
+    for view in views:
+        view.setup()
+
+    db_session.execute(text("UPDATE shipments SET cost = 99"))
+    db_session.commit()
+    date_range = {"min_trip_date": "2024-05-02", "max_trip_date": "2024-05-02"}
+    for view in views:
+        assert view.refresh_rollup(date_range)
+    costs = {row.metric_date: row.total_cost for row in stored_rows(views[1])}
+    assert costs == {date(2024, 5, 1): 10, date(2024, 5, 2): 99}
+
+    # Without a range every date is recomputed
+    for view in views:
+        assert view.refresh_rollup({"full_refresh": True})
+        assert stored_rows(view) == full_refresh_rows(view)
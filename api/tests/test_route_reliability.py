@@ -0,0 +1,131 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.tasks.database_views.route.route_reliability import (
+    RouteReliabilityView,
+)
+from app.services.route_service import RouteService
+
+# Per-shipment statistics as mv_route_reliability computed them before it
+# stored mergeable aggregates
+EXPECTED_QUERY = """
+    WITH route_stats AS (
+        SELECT
+            origin,
+            destination,
+            COUNT(*) as total_deliveries,
+            AVG(delivery_time) as avg_delivery_time,
+            STDDEV(delivery_time) as stddev
+        FROM mv_shipment_facts
+        WHERE metric_date BETWEEN :start_date AND :end_date
+        GROUP BY origin, destination
+        HAVING COUNT(*) >= 5
+    )
+    SELECT
+        rs.origin,
+        rs.destination,
+        rs.total_deliveries,
+        CAST(rs.avg_delivery_time AS DECIMAL(10,2)) as avg_delivery_time,
+        CAST(rs.stddev AS DECIMAL(10,2)) as delivery_time_variation,
+        CAST(
+            100 * (1 - COALESCE(rs.stddev / NULLIF(rs.avg_delivery_time, 0), 0))
+            AS DECIMAL(10,2)
+        ) as reliability_score,
+        CAST(
+            100 * COUNT(*) FILTER (
+                WHERE f.delivery_time <= rs.avg_delivery_time + 1
+            )::float / rs.total_deliveries
+            AS DECIMAL(10,2)
+        ) as on_time_delivery_rate
+    FROM route_stats rs
+    JOIN mv_shipment_facts f
+        ON f.origin = rs.origin AND f.destination = rs.destination
+        AND f.metric_date BETWEEN :start_date AND :end_date
+    GROUP BY rs.origin, rs.destination, rs.total_deliveries,
+        rs.avg_delivery_time, rs.stddev
+    ORDER BY rs.origin, rs.destination
+"""
+
+
+@pytest.fixture
+def reliability(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INCREMENTAL_ROLLUPS", True)
+    # Only the columns the view reads
+    db_session.execute(
+        text(
+            """
+            CREATE TABLE mv_shipment_facts (
+                metric_date DATE, shipment_id VARCHAR(50), origin VARCHAR(100),
+                destination VARCHAR(100), delivery_time INTEGER
+            )
+            """
+        )
+    )
+    db_session.commit()
+    return RouteReliabilityView(db_session)
+
+
+def add_shipments(db_session, metric_date: date, route: tuple, delivery_times: list):
+    for delivery_time in delivery_times:
+        db_session.execute(
+            text(
+                "INSERT INTO mv_shipment_facts VALUES "
+                "(:metric_date, gen_random_uuid(), :origin, :destination, "
+                ":delivery_time)"
+            ),
+            {
+                "metric_date": metric_date,
+                "origin": route[0],
+                "destination": route[1],
+                "delivery_time": delivery_time,
+            },
+        )
+    db_session.commit()
+
+
+def expected(db_session, start_date: date, end_date: date) -> list:
+    rows = db_session.execute(
+        text(EXPECTED_QUERY), {"start_date": start_date, "end_date": end_date}
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def reported(db_session, start_date: date, end_date: date) -> list:
+    response = RouteService(db_session).get_route_reliability(
+        start_date, end_date, sort_by="destination", sort_order="asc"
+    )
+    return response.data
+
+
+def test_merged_aggregates_match_per_shipment_statistics(db_session, reliability):
+    hamburg = ("Berlin", "Hamburg")
+    munich = ("Berlin", "Munich")
+    add_shipments(db_session, date(2024, 5, 1), hamburg, [2, 3, 3])
+    add_shipments(db_session, date(2024, 5, 1), munich, [5, 5])
+    add_shipments(db_session, date(2024, 5, 2), hamburg, [4, 9])
+    reliability.setup()
+
+    # A later batch is merged into the stored days
+    add_shipments(db_session, date(2024, 5, 2), hamburg, [2])
+    add_shipments(db_session, date(2024, 5, 3), hamburg, [3, 7])
+    add_shipments(db_session, date(2024, 5, 3), munich, [6, 8, 11])
+    assert reliability.refresh_rollup(
+        {"min_trip_date": "2024-05-02", "max_trip_date": "2024-05-03"}
+    )
+
+    start_date, end_date = date(2024, 5, 1), date(2024, 5, 3)
+    full_history = expected(db_session, start_date, end_date)
+    assert [row["total_deliveries"] for row in full_history] == [8, 5]
+    assert reported(db_session, start_date, end_date) == full_history
+
+    # Any date range merges just its days
+    start_date = end_date = date(2024, 5, 1)
+    assert expected(db_session, start_date, end_date) == []
+    assert reported(db_session, start_date, end_date) == []
+    start_date = date(2024, 5, 2)
+    assert reported(db_session, start_date, end_date) == expected(
+        db_session, start_date, end_date
+    )
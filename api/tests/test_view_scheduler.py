@@ -0,0 +1,69 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from app.core.tasks.database_views import view_scheduler
+from app.core.tasks.database_views.view_scheduler import ViewScheduler
+
+
+@contextmanager
+def fake_context_db():
+    yield None
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    monkeypatch.setattr(view_scheduler, "get_context_db", fake_context_db)
+
+
+def view(name: str, depends_on: list = None):
+    return type(
+        name,
+        (),
+        {
+            "VIEW_NAME": name,
+            "DEPENDS_ON": depends_on or [],
+            "__init__": lambda self, db: None,
+        },
+    )
+
+
+def test_failed_dependency_skips_its_dependents():
+    facts = view("mv_shipment_facts")
+    metrics = view("mv_daily_metrics", [facts])
+    routes = view("mv_route_metrics")
+    ran = []
+
+    def task(instance) -> bool:
+        ran.append(instance.VIEW_NAME)
+        if instance.VIEW_NAME == "mv_shipment_facts":
+            raise RuntimeError("boom")
+        return True
+
+    results = ViewScheduler([facts, metrics, routes], workers=2).run(task)
+
+    assert results == {
+        "mv_shipment_facts": False,
+        "mv_daily_metrics": False,
+        "mv_route_metrics": True,
+    }
+    assert sorted(ran) == ["mv_route_metrics", "mv_shipment_facts"]
+
+
+def test_independent_views_run_concurrently():
+    # Both views wait for each other, run one after another they time out
+    barrier = threading.Barrier(2, timeout=5)
+
+    def task(instance) -> bool:
+        barrier.wait()
+        return True
+
+    views = [view("mv_daily_metrics"), view("mv_route_metrics")]
+    results = ViewScheduler(views, workers=2).run(task)
+    assert all(results.values())
+
+
+def test_unscheduled_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        ViewScheduler([view("mv_daily_trends", [view("mv_daily_metrics")])])
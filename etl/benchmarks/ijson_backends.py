@@ -0,0 +1,82 @@
+"""
+Benchmark ijson backends on a synthetic shipments.json.
+
+Reports parsed rows/sec for every installed backend, in the same
+binary + use_float mode the ETL readers use, plus the old text mode
+for comparison.
+
+Usage:
+    python benchmarks/ijson_backends.py --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import ijson
+
+BACKENDS = ["yajl2_c", "yajl2_cffi", "yajl2", "python"]
+CITIES = ["Berlin", "Hamburg", "Munich", "Cologne", "Frankfurt", "Stuttgart"]
+
+
+def generate_shipments(file_path: str, rows: int):
+    with open(file_path, "w") as file:
+        file.write("[\n")
+        for i in range(rows):
+            origin, destination = random.sample(CITIES, 2)
+            item = {
+                "shipment_id": f"S-{i:07d}",
+                "origin": origin,
+                "destination": destination,
+                "weight": round(random.uniform(1, 1000), 2),
+                "cost": round(random.uniform(10, 5000), 2),
+                "delivery_time": random.randint(1, 72),
+                "log_id": f"L-{random.randint(0, rows):07d}",
+            }
+            file.write(json.dumps(item))
+            file.write(",\n" if i < rows - 1 else "\n")
+        file.write("]\n")
+
+
+def run(backend, file_path: str, mode: str, **kwargs) -> tuple:
+    start = time.perf_counter()
+    count = 0
+    with open(file_path, mode) as file:
+        for _ in backend.items(file, "item", **kwargs):
+            count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "shipments.json")
+        print(f"Generating {args.rows} shipments...")
+        generate_shipments(file_path, args.rows)
+        size_mb = os.path.getsize(file_path) / 1024 / 1024
+        print(f"File size: {size_mb:.1f} MB\n")
+
+        print(f"{'backend':<12} {'mode':<16} {'rows/sec':>12} {'seconds':>9}")
+        for name in BACKENDS:
+            try:
+                backend = ijson.get_backend(name)
+            except ImportError:
+                print(f"{name:<12} {'not installed':<16}")
+                continue
+
+            for mode, label, kwargs in [
+                ("rb", "bytes+float", {"use_float": True}),
+                ("r", "text+decimal", {}),
+            ]:
+                count, elapsed = run(backend, file_path, mode, **kwargs)
+                print(f"{name:<12} {label:<16} {count / elapsed:>12,.0f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
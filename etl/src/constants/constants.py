@@ -6,12 +6,26 @@ VEHICLE_LOG_COLUMNS = [
     "fuel_used",
 ]
 
+VEHICLE_LOG_COLUMN_TYPES = {
+    "log_id": "VARCHAR",
+    "vehicle_id": "VARCHAR",
+    "trip_date": "DATE",
+    "mileage": "FLOAT",
+    "fuel_used": "FLOAT",
+}
+
 VEHICLE_COLUMNS = [
     "vehicle_id",
     "name",
     "total_mileage",
 ]
 
+VEHICLE_COLUMN_TYPES = {
+    "vehicle_id": "VARCHAR",
+    "name": "VARCHAR",
+    "total_mileage": "FLOAT",
+}
+
 SHIPPING_COLUMNS = [
     "shipment_id",
     "origin",
@@ -22,6 +36,20 @@ SHIPPING_COLUMNS = [
     "log_id",
 ]
 
+SHIPPING_COLUMN_TYPES = {
+    "shipment_id": "VARCHAR",
+    "origin": "VARCHAR",
+    "destination": "VARCHAR",
+    "weight": "FLOAT",
+    "cost": "FLOAT",
+    "delivery_time": "INTEGER",
+    "log_id": "VARCHAR",
+    "trip_date": "DATE",
+}
+
+# Column order of the shipments table, trip_date is resolved from vehicle_logs
+SHIPMENT_TABLE_COLUMNS = SHIPPING_COLUMNS + ["trip_date"]
+
 
 class Tables:
     vehicles = "vehicles"
@@ -29,6 +57,17 @@ class Tables:
     shipments = "shipments"
 
 
+# Primary keys used as conflict targets by LOAD_MODE=upsert
+PRIMARY_KEYS = {
+    Tables.vehicles: ["vehicle_id"],
+    Tables.vehicle_logs: ["log_id", "trip_date"],
+    Tables.shipments: ["shipment_id", "trip_date"],
+}
+
+# Tables range-partitioned by trip_date, provisioned together
+PARTITIONED_TABLES = [Tables.vehicle_logs, Tables.shipments]
+
+
 class FilePaths:
     vehicles = "data/raw/vehicles.json"
     vehicle_logs = "data/raw/vehicle_logs.json"
@@ -0,0 +1,153 @@
+from datetime import date, datetime
+from io import BytesIO
+
+from database.copy_encoders import copy_statement
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet inputs require the pyarrow package")
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+# Arrow type and per-value fallback conversion of each column type
+ARROW_TYPES = {
+    "FLOAT": (lambda: pa.float64(), float),
+    "INTEGER": (lambda: pa.int32(), int),
+    "DATE": (lambda: pa.date32(), _to_date),
+    "VARCHAR": (lambda: pa.string(), str),
+}
+
+
+def _conform_column(column, column_type: str):
+    """Cast a column, values that can't be converted become null."""
+    arrow_type, convert = ARROW_TYPES[column_type]
+    arrow_type = arrow_type()
+    if column.type == arrow_type:
+        return column
+    try:
+        return column.cast(arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        values = []
+        for value in column.to_pylist():
+            try:
+                values.append(None if value is None else convert(value))
+            except (TypeError, ValueError):
+                values.append(None)
+        return pa.array(values, type=arrow_type)
+
+
+def conform_batch(batch, columns: list, column_types: dict = None):
+    """
+    Map a record batch onto the table's columns.
+    Columns are selected in COPY order and cast to the table's types; a
+    column the file lacks is all nulls, so validation rejects its rows.
+
+    Args:
+        batch (pyarrow.RecordBatch): Batch as read from the file
+        columns (list): Column names in COPY order
+        column_types (dict, optional): Column name to type, see constants.py
+
+    Returns:
+        pyarrow.RecordBatch: Batch with exactly the given columns
+    """
+    _require_pyarrow()
+    column_types = column_types or {}
+    arrays = []
+    for column in columns:
+        if column in batch.schema.names:
+            array = batch.column(column)
+        else:
+            array = pa.nulls(batch.num_rows)
+        if column in column_types:
+            array = _conform_column(array, column_types[column])
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=columns)
+
+
+def replace_column(batch, name: str, values: list):
+    """Replace a column of a record batch, keeping its type."""
+    index = batch.schema.get_field_index(name)
+    arrays = list(batch.columns)
+    arrays[index] = pa.array(values, type=arrays[index].type)
+    return pa.RecordBatch.from_arrays(arrays, names=batch.schema.names)
+
+
+class ArrowCopyEncoder:
+    """
+    Encodes whole Arrow record batches as CSV COPY data.
+    pyarrow's CSV writer serializes the columns in C++, so no Python object
+    is created per row. Nulls are written unquoted and load as NULL.
+    """
+
+    format = "csv"
+
+    def __init__(self, columns: list):
+        _require_pyarrow()
+        self.columns = columns
+        self.write_options = pa_csv.WriteOptions(include_header=False)
+
+    def new_buffer(self) -> BytesIO:
+        return BytesIO()
+
+    def encode_batch(self, batch) -> list:
+        """
+        Serialize a conformed record batch.
+
+        Returns:
+            list: Chunks to write to the buffer, here a single CSV chunk
+        """
+        sink = BytesIO()
+        pa_csv.write_csv(batch.select(self.columns), sink, self.write_options)
+        return [sink.getvalue()]
+
+    def finish(self, buffer: BytesIO) -> BytesIO:
+        return buffer
+
+    def copy_sql(self, table: str) -> str:
+        return copy_statement(table, self.columns, self.format)
+
+    def copy(self, db, buffer: BytesIO, table: str) -> bool:
+        buffer.seek(0)
+        return db.copy_csv(buffer, table, self.columns)
+
+
+def partition_batches(batch, partition_column: str, partition_suffix) -> list:
+    """
+    Split a record batch by target partition.
+    Suffixes are computed once per distinct date, not per row.
+
+    Args:
+        batch (pyarrow.RecordBatch): Conformed batch
+        partition_column (str): Date column the table is partitioned on
+        partition_suffix (callable): Maps a date to its partition suffix
+
+    Returns:
+        list: (suffix, pyarrow.RecordBatch) pairs
+    """
+    column = batch.column(partition_column)
+    dates = {}
+    for value in pc.unique(column).to_pylist():
+        if value is not None:
+            dates.setdefault(partition_suffix(value), []).append(value)
+
+    if len(dates) == 1:
+        return [(next(iter(dates)), batch)]
+    return [
+        (suffix, batch.filter(pc.is_in(column, value_set=pa.array(values))))
+        for suffix, values in dates.items()
+    ]
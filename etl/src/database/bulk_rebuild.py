@@ -0,0 +1,324 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from constants.constants import PRIMARY_KEYS
+from database.db import Database
+from database.partition_writer import PartitionedEncoder
+from database.partitions import partition_bounds
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BULK_REBUILD = os.getenv("BULK_REBUILD", "false").lower() == "true"
+REBUILD_WORKERS = int(os.getenv("REBUILD_WORKERS", 4))
+REBUILD_MAINTENANCE_WORK_MEM = os.getenv("REBUILD_MAINTENANCE_WORK_MEM", "1GB")
+
+
+def load_table_name(table: str, suffix: str) -> str:
+    return f"{table}_{suffix}_load"
+
+
+class RebuildEncoder(PartitionedEncoder):
+    """
+    Routes rows into bare UNLOGGED load tables, one per trip_date partition
+    (e.g. vehicle_logs_2024_load), instead of the live partitions. The load
+    tables have no primary key, indexes or foreign keys, so COPY maintains
+    nothing but the heap. BulkRebuild swaps them in once the load finished.
+    """
+
+    def __init__(self, encoder, partition_column: str):
+        super().__init__(encoder, partition_column)
+        self.created = set()
+
+    def partition_table(self, table: str, suffix: str) -> str:
+        return load_table_name(table, suffix)
+
+    def copy(self, db, buffer, table: str) -> bool:
+        for suffix in buffer.buffers:
+            load_table = self.partition_table(table, suffix)
+            if load_table not in self.created:
+                self.create_load_table(db, table, load_table)
+        return super().copy(db, buffer, table)
+
+    def create_load_table(self, db, table: str, load_table: str):
+        try:
+            # CHECK and NOT NULL constraints are required to attach later
+            db.execute(
+                f"""
+                CREATE UNLOGGED TABLE IF NOT EXISTS {load_table}
+                (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            """
+            )
+            self.created.add(load_table)
+        except Exception as e:
+            # Another worker process may have created it concurrently
+            logger.warning(f"Error creating load table {load_table}: {e}")
+
+
+class BulkRebuild:
+    """
+    Reload of a trip_date partitioned table through load tables.
+    After the load, the tables are switched to LOGGED, the primary key and
+    every index of the parent table are built on them in parallel, and in
+    one transaction the partitions that were loaded are dropped and
+    the load tables attached in their place. Until that swap the old data
+    stays live. Partitions the input had no rows for are kept as they are.
+    """
+
+    def __init__(self, table_name: str, workers: int = None):
+        self.table_name = table_name
+        self.workers = workers or REBUILD_WORKERS
+        # Only open during prepare and finalize
+        self.db = None
+        # Partitions left untouched by the last swap
+        self.kept = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["db"] = None
+        return state
+
+    @contextmanager
+    def connection(self):
+        """Dedicated connection for one rebuild step, closed when it ends."""
+        self.db = Database.open_connection()
+        try:
+            yield self.db
+        finally:
+            self.db.close()
+            self.db = None
+
+    def prepare(self):
+        """Drop load tables left behind by an interrupted rebuild."""
+        with self.connection():
+            for load_table in self.load_tables().values():
+                logger.info(f"Dropping leftover load table {load_table}")
+                self.db.execute(f"DROP TABLE {load_table}")
+
+    def load_tables(self) -> dict:
+        """
+        Returns:
+            dict: Partition suffix to load table name
+        """
+        rows = self.db.fetch(
+            f"""
+            SELECT relname FROM pg_class
+            WHERE relkind = 'r' AND relname ~ '^{self.table_name}_[0-9_]+_load$'
+            """
+        )
+        prefix = len(self.table_name) + 1
+        return {row[0][prefix : -len("_load")]: row[0] for row in rows}
+
+    def index_statements(self, load_table: str) -> list:
+        """
+        Statements building the primary key and the parent's other indexes
+        on a load table. Attaching the table reuses matching indexes
+        instead of building them again. The indexes are rebuilt from the
+        catalog: access method, key columns or expressions with their
+        collation, operator class and ordering, INCLUDE columns, the partial
+        index predicate and the tablespace.
+        """
+        keys = ", ".join(PRIMARY_KEYS[self.table_name])
+        statements = [
+            f"CREATE UNIQUE INDEX {load_table}_pkey ON {load_table} ({keys})"
+        ]
+        # indkey, indclass, indcollation and indoption are 0-based vectors, while
+        # pg_get_indexdef numbers the columns from 1
+        rows = self.db.fetch(
+            f"""
+            SELECT
+                i.indisunique,
+                am.amname,
+                ARRAY(
+                    SELECT
+                        CASE WHEN i.indkey[k] = 0
+                            THEN '('
+                                || pg_get_indexdef(i.indexrelid, k + 1, false)
+                                || ')'
+                            ELSE pg_get_indexdef(i.indexrelid, k + 1, false)
+                        END
+                        || CASE WHEN coll.collname IS NOT NULL
+                                AND coll.collname <> 'default'
+                            THEN ' COLLATE ' || quote_ident(coll_ns.nspname)
+                                || '.' || quote_ident(coll.collname)
+                            ELSE ''
+                        END
+                        || ' ' || quote_ident(opc_ns.nspname)
+                        || '.' || quote_ident(opc.opcname)
+                        || CASE WHEN i.indoption[k] & 1 = 1 THEN ' DESC' ELSE '' END
+                        || CASE i.indoption[k] & 3
+                            WHEN 2 THEN ' NULLS FIRST'
+                            WHEN 1 THEN ' NULLS LAST'
+                            ELSE ''
+                        END
+                    FROM generate_series(0, i.indnkeyatts - 1) AS k
+                    JOIN pg_opclass opc ON opc.oid = i.indclass[k]
+                    JOIN pg_namespace opc_ns ON opc_ns.oid = opc.opcnamespace
+                    LEFT JOIN pg_collation coll ON coll.oid = i.indcollation[k]
+                    LEFT JOIN pg_namespace coll_ns
+                        ON coll_ns.oid = coll.collnamespace
+                    ORDER BY k
+                ),
+                ARRAY(
+                    SELECT pg_get_indexdef(i.indexrelid, k + 1, false)
+                    FROM generate_series(i.indnkeyatts, i.indnatts - 1) AS k
+                    ORDER BY k
+                ),
+                pg_get_expr(i.indpred, i.indrelid),
+                quote_ident(ts.spcname)
+            FROM pg_index i
+            JOIN pg_class index_class ON index_class.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = index_class.relam
+            LEFT JOIN pg_tablespace ts ON ts.oid = index_class.reltablespace
+            WHERE i.indrelid = '{self.table_name}'::regclass AND NOT i.indisprimary
+            ORDER BY i.indexrelid
+            """
+        )
+        for number, row in enumerate(rows):
+            unique, method, columns, included, predicate, tablespace = row
+            statement = (
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX "
+                f"{load_table}_idx{number} ON {load_table} "
+                f"USING {method} ({', '.join(columns)})"
+            )
+            if included:
+                statement += f" INCLUDE ({', '.join(included)})"
+            if tablespace:
+                statement += f" TABLESPACE {tablespace}"
+            if predicate:
+                statement += f" WHERE {predicate}"
+            statements.append(statement)
+        return statements
+
+    def build(self, statements: list) -> bool:
+        """Run independent DDL statements in parallel, each on its own connection."""
+
+        def run(statement: str) -> bool:
+            db = Database.open_connection()
+            try:
+                db.execute(
+                    f"SET maintenance_work_mem = '{REBUILD_MAINTENANCE_WORK_MEM}'"
+                )
+                db.execute(statement)
+                return True
+            except Exception as e:
+                logger.error(f"Rebuild step failed for {self.table_name}: {e}")
+                return False
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return all(executor.map(run, statements))
+
+    def finalize(self) -> bool:
+        """
+        Build the load tables' indexes and swap them in for the old partitions.
+
+        Returns:
+            bool: True if the table now holds the loaded data
+        """
+        with self.connection():
+            load_tables = self.load_tables()
+            if not load_tables:
+                logger.warning(f"Nothing was loaded for {self.table_name}, keeping it")
+                return False
+
+            # SET LOGGED rewrites the heap and every index on it, so it runs
+            # while the load tables have no indexes yet
+            logger.info(f"Switching {self.table_name} load tables to LOGGED")
+            statements = [
+                f"ALTER TABLE {load_table} SET LOGGED"
+                for load_table in load_tables.values()
+            ]
+            if not self.build(statements):
+                return False
+
+            logger.info(f"Building indexes on {len(load_tables)} load tables")
+            statements = []
+            for load_table in load_tables.values():
+                statements += self.index_statements(load_table)
+            if not self.build(statements):
+                return False
+
+            statements = []
+            for suffix, load_table in load_tables.items():
+                # The bounds constraint lets ATTACH PARTITION skip its validation scan
+                start_date, end_date = partition_bounds(suffix)
+                statements.append(
+                    f"""
+                    ALTER TABLE {load_table}
+                    ADD CONSTRAINT {load_table}_pkey
+                        PRIMARY KEY USING INDEX {load_table}_pkey,
+                    ADD CONSTRAINT {load_table}_bounds
+                        CHECK (trip_date >= '{start_date}' AND trip_date < '{end_date}')
+                    """
+                )
+            if not self.build(statements):
+                return False
+
+            return self.swap(load_tables)
+
+    def swap(self, load_tables: dict) -> bool:
+        """
+        Replace the partitions of the loaded suffixes with their load tables
+        atomically. A partial input, e.g. one shard or an incremental
+        delivery, must not delete the years it doesn't contain.
+        """
+        connection = self.db.get_connection()
+        kept = []
+        try:
+            with connection.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT child.relname
+                    FROM pg_inherits
+                    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                    WHERE pg_inherits.inhparent = '{self.table_name}'::regclass
+                    """
+                )
+                prefix = len(self.table_name) + 1
+                for (partition,) in cur.fetchall():
+                    if partition[prefix:] not in load_tables:
+                        kept.append(partition)
+                        continue
+                    cur.execute(
+                        f"ALTER TABLE {self.table_name} DETACH PARTITION {partition}"
+                    )
+                    cur.execute(f"DROP TABLE {partition}")
+
+                for suffix, load_table in load_tables.items():
+                    partition = f"{self.table_name}_{suffix}"
+                    start_date, end_date = partition_bounds(suffix)
+                    cur.execute(f"ALTER TABLE {load_table} RENAME TO {partition}")
+                    # Free the load table's index names for the next rebuild
+                    cur.execute(
+                        f"""
+                        SELECT indexrelid::regclass::text FROM pg_index
+                        WHERE indrelid = '{partition}'::regclass
+                        """
+                    )
+                    for (index,) in cur.fetchall():
+                        renamed = index.replace(load_table, partition, 1)
+                        cur.execute(f"ALTER INDEX {index} RENAME TO {renamed}")
+                    cur.execute(
+                        f"""
+                        ALTER TABLE {self.table_name} ATTACH PARTITION {partition}
+                        FOR VALUES FROM ('{start_date}') TO ('{end_date}')
+                        """
+                    )
+                    cur.execute(
+                        f"ALTER TABLE {partition} DROP CONSTRAINT {load_table}_bounds"
+                    )
+            connection.commit()
+            self.kept = kept
+            logger.info(
+                f"Rebuilt {self.table_name} from {len(load_tables)} partitions"
+            )
+            if kept:
+                logger.info(f"Kept partitions without loaded rows: {kept}")
+            return True
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"Error swapping in rebuilt {self.table_name}: {e}")
+            return False
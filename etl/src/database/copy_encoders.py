@@ -0,0 +1,190 @@
+import struct
+from datetime import date
+from io import BytesIO, StringIO
+
+# Binary COPY framing, see "Binary Format" in the PostgreSQL COPY docs
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+NULL_FIELD = struct.pack("!i", -1)
+POSTGRES_EPOCH = date(2000, 1, 1).toordinal()
+
+_float8 = struct.Struct("!id")
+_int4 = struct.Struct("!ii")
+_length = struct.Struct("!i")
+
+
+def _encode_float(value) -> bytes:
+    return _float8.pack(8, float(value))
+
+
+def _encode_integer(value) -> bytes:
+    return _int4.pack(4, int(value))
+
+
+def _encode_date(value) -> bytes:
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return _int4.pack(4, value.toordinal() - POSTGRES_EPOCH)
+
+
+def _encode_varchar(value) -> bytes:
+    encoded = str(value).encode("utf-8")
+    return _length.pack(len(encoded)) + encoded
+
+
+FIELD_ENCODERS = {
+    "FLOAT": _encode_float,
+    "INTEGER": _encode_integer,
+    "DATE": _encode_date,
+    "VARCHAR": _encode_varchar,
+}
+
+
+def copy_statement(table: str, columns: list, format: str) -> str:
+    # Plain SQL string so it works with both psycopg2 and psycopg 3 cursors
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT {format})"
+
+
+class RowBuffer(list):
+    """
+    Batch of row tuples with the file-like surface processors use on buffers.
+    The psycopg 3 backend streams it with write_row, so no text is built.
+    """
+
+    def write(self, row: tuple):
+        self.append(row)
+
+    def seek(self, offset: int):
+        pass
+
+    def flush(self):
+        pass
+
+    def getvalue(self) -> str:
+        # Text COPY rendering, only used when a failed batch is saved
+        lines = []
+        for row in self:
+            values = ["\\N" if value is None else str(value) for value in row]
+            lines.append("\t".join(values) + "\n")
+        return "".join(lines)
+
+
+class TextCopyEncoder:
+    """
+    Encodes records as tab separated text COPY rows.
+    """
+
+    format = "text"
+
+    def __init__(self, columns: list):
+        self.columns = columns
+
+    def new_buffer(self) -> StringIO:
+        return StringIO()
+
+    def encode(self, item: dict) -> str:
+        values = [
+            str(item[col]) if item[col] is not None else "\\N"
+            for col in self.columns
+        ]
+        return "\t".join(values) + "\n"
+
+    def finish(self, buffer: StringIO) -> StringIO:
+        return buffer
+
+    def copy_sql(self, table: str) -> str:
+        return copy_statement(table, self.columns, self.format)
+
+    def copy(self, db, buffer: StringIO, table: str) -> bool:
+        buffer.seek(0)
+        return db.copy_from(buffer, table, self.columns, sep="\t")
+
+
+class RowCopyEncoder:
+    """
+    Encodes records as tuples for psycopg 3's copy.write_row.
+    Requires DB_DRIVER=psycopg.
+    """
+
+    format = "rows"
+
+    def __init__(self, columns: list):
+        self.columns = columns
+
+    def new_buffer(self) -> RowBuffer:
+        return RowBuffer()
+
+    def encode(self, item: dict) -> tuple:
+        return tuple(item[col] for col in self.columns)
+
+    def finish(self, buffer: RowBuffer) -> RowBuffer:
+        return buffer
+
+    def copy_sql(self, table: str) -> str:
+        return copy_statement(table, self.columns, "text")
+
+    def copy(self, db, buffer: RowBuffer, table: str) -> bool:
+        return db.copy_from(buffer, table, self.columns, sep="\t")
+
+
+class BinaryCopyEncoder:
+    """
+    Encodes records in PostgreSQL's binary COPY format.
+    Floats, dates and integers are sent in their wire representation,
+    so the server no longer parses them from text.
+    """
+
+    format = "binary"
+
+    def __init__(self, columns: list, column_types: dict):
+        self.columns = columns
+        self.field_count = struct.pack("!h", len(columns))
+        self.field_encoders = [
+            (col, FIELD_ENCODERS[column_types[col]]) for col in columns
+        ]
+
+    def new_buffer(self) -> BytesIO:
+        buffer = BytesIO()
+        buffer.write(PGCOPY_HEADER)
+        return buffer
+
+    def encode(self, item: dict) -> bytes:
+        fields = [self.field_count]
+        for col, encode in self.field_encoders:
+            value = item[col]
+            fields.append(NULL_FIELD if value is None else encode(value))
+        return b"".join(fields)
+
+    def finish(self, buffer: BytesIO) -> BytesIO:
+        buffer.write(PGCOPY_TRAILER)
+        return buffer
+
+    def copy_sql(self, table: str) -> str:
+        return copy_statement(table, self.columns, self.format)
+
+    def copy(self, db, buffer: BytesIO, table: str) -> bool:
+        buffer.seek(0)
+        return db.copy_binary(buffer, table, self.columns)
+
+
+def get_copy_encoder(copy_format: str, columns: list, column_types: dict = None):
+    """
+    Build the encoder for a COPY format.
+
+    Args:
+        copy_format (str): "text", "binary" or "rows"
+        columns (list): Column names in COPY order
+        column_types (dict, optional): Column name to type, required for binary
+
+    Returns:
+        TextCopyEncoder | BinaryCopyEncoder | RowCopyEncoder: Encoder instance
+    """
+    if copy_format == "binary":
+        if column_types is None:
+            raise ValueError("Binary COPY requires column types")
+        return BinaryCopyEncoder(columns, column_types)
+    if copy_format == "text":
+        return TextCopyEncoder(columns)
+    if copy_format == "rows":
+        return RowCopyEncoder(columns)
+    raise ValueError(f"Unknown COPY format: {copy_format}")
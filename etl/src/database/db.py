@@ -1,21 +1,28 @@
 import psycopg2
 import os
+import threading
+from contextlib import contextmanager
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from psycopg2 import sql
 from dotenv import load_dotenv
 
+from database.copy_encoders import copy_statement
 from utils.logger import get_logger
 
 load_dotenv()
 
 logger = get_logger(__name__)
 
+DB_DRIVER = os.getenv("DB_DRIVER", "psycopg2")
+
 
 class Database:
-    _instance = None
+    # One shared instance per thread, so concurrent ETL stages each get their
+    # own connection and never interleave transactions
+    _local = threading.local()
 
-    def __init__(self):
-        if self._instance is not None:
+    def __init__(self, standalone: bool = False):
+        if getattr(self._local, "instance", None) is not None and not standalone:
             raise RuntimeError("Call get_instance() instead")
         self.db_name = os.getenv("DB_NAME", "logistics_db")
         self.user = os.getenv("DB_USER", "postgres")
@@ -24,13 +31,28 @@ class Database:
         self.port = int(os.getenv("DB_PORT", "5432"))
         self.connection = None
         self.cursor = None
+        # Set inside transaction(), the helpers below then leave committing to it
+        self.in_transaction = False
         self.connect()
 
+    @staticmethod
+    def driver_class():
+        if DB_DRIVER == "psycopg":
+            from database.psycopg_db import PsycopgDatabase
+
+            return PsycopgDatabase
+        return Database
+
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = Database()
-        return cls._instance
+        if getattr(Database._local, "instance", None) is None:
+            Database._local.instance = Database.driver_class()()
+        return Database._local.instance
+
+    @classmethod
+    def open_connection(cls):
+        """Open a dedicated Database next to the shared instance, e.g. for worker threads."""
+        return Database.driver_class()(standalone=True)
 
     def get_connection(self):
         return self.connection
@@ -98,11 +120,37 @@ class Database:
         except Exception as e:
             logger.error(f"Error closing database connection: {e}")
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements as one transaction, committed when the
+        block exits and rolled back if it raises. Nested blocks join the
+        outer transaction.
+        """
+        if self.in_transaction:
+            yield self
+            return
+        self.connect()
+        self.in_transaction = True
+        try:
+            yield self
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            self.in_transaction = False
+
+    def commit(self):
+        """Commit, unless the statement is part of an enclosing transaction()."""
+        if not self.in_transaction:
+            self.connection.commit()
+
     def execute(self, query) -> bool:
         self.connect()  # Ensure connection before executing
         try:
             self.cursor.execute(query)
-            self.connection.commit()
+            self.commit()
             return True
         except Exception as e:
             logger.error(f"Error executing query: {e}")
@@ -122,9 +170,35 @@ class Database:
         self.connect()  # Ensure connection before copying
         try:
             self.cursor.copy_from(buffer, table=table, columns=columns, sep=sep)
-            self.connection.commit()
+            self.commit()
             return True
         except Exception as e:
             logger.error(f"Error copying data: {e}")
             self.connection.rollback()
             return False
+
+    def copy_expert(self, query, buffer, cursor=None):
+        """Run a COPY ... FROM STDIN statement without committing."""
+        (cursor or self.cursor).copy_expert(query, buffer)
+
+    def copy_binary(self, buffer, table, columns) -> bool:
+        self.connect()  # Ensure connection before copying
+        try:
+            self.copy_expert(copy_statement(table, columns, "binary"), buffer)
+            self.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error copying binary data: {e}")
+            self.connection.rollback()
+            return False
+
+    def copy_csv(self, buffer, table, columns) -> bool:
+        self.connect()  # Ensure connection before copying
+        try:
+            self.copy_expert(copy_statement(table, columns, "csv"), buffer)
+            self.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error copying CSV data: {e}")
+            self.connection.rollback()
+            return False
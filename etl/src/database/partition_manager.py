@@ -0,0 +1,125 @@
+from datetime import date
+
+from constants.constants import PARTITIONED_TABLES
+from database.db import Database
+from database.partitions import (
+    MONTHLY_PARTITION_YEARS,
+    conflicting_partitions,
+    partition_bounds,
+    partition_suffix,
+)
+from database.table_manager import TableManager
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PartitionManager:
+    """
+    Provisions trip_date partitions on demand while rows stream in.
+    Tracks the min/max trip_date seen and creates a missing partition for
+    every partitioned table the first time one of its dates shows up, before
+    the row reaches COPY. Indexes defined on the parent tables are cloned
+    onto new partitions by Postgres.
+    """
+
+    def __init__(self, tables: list = PARTITIONED_TABLES):
+        self.tables = tables
+        self.table_manager = None
+        self.known = None
+        self.min_date = None
+        self.max_date = None
+
+    def __getstate__(self):
+        # The dedicated connection stays in the process that opened it
+        state = self.__dict__.copy()
+        state["table_manager"] = None
+        state["known"] = None
+        return state
+
+    def track(self, trip_date):
+        """
+        Record a trip_date and make sure its partition exists.
+
+        Args:
+            trip_date (str | date): ISO date string or date
+        """
+        if isinstance(trip_date, date):
+            value = trip_date.isoformat()
+        else:
+            value = str(trip_date)[:10]
+        if self.min_date is None or value < self.min_date:
+            self.min_date = value
+        if self.max_date is None or value > self.max_date:
+            self.max_date = value
+
+        suffix = partition_suffix(value)
+        if self.known is None:
+            self.known = self.existing_suffixes()
+        if suffix not in self.known:
+            self.provision(suffix)
+
+    def check_layout(self):
+        """
+        Refuse a MONTHLY_PARTITION_YEARS setting that overlaps existing
+        partitions. Postgres would reject every partition created for such
+        a year, and every COPY into it would fail.
+
+        Raises:
+            ValueError: If a table has conflicting partitions
+        """
+        for table in self.tables:
+            suffixes = [
+                name[len(table) + 1 :]
+                for name in self.get_table_manager().list_partitions(table)
+            ]
+            conflicts = conflicting_partitions(suffixes)
+            if conflicts:
+                configured = ",".join(sorted(MONTHLY_PARTITION_YEARS))
+                raise ValueError(
+                    f"MONTHLY_PARTITION_YEARS={configured} "
+                    f"overlaps existing partitions of {table}: "
+                    f"{', '.join(f'{table}_{suffix}' for suffix in conflicts)}. "
+                    f"Repartition those years or change the setting"
+                )
+
+    def existing_suffixes(self) -> set:
+        """Partition suffixes that exist for every partitioned table."""
+        suffixes = None
+        for table in self.tables:
+            names = {
+                name[len(table) + 1 :]
+                for name in self.get_table_manager().list_partitions(table)
+            }
+            suffixes = names if suffixes is None else suffixes & names
+        return suffixes or set()
+
+    def provision(self, suffix: str):
+        start_date, end_date = partition_bounds(suffix)
+        table_manager = self.get_table_manager()
+        for table in self.tables:
+            if table_manager.create_partition(
+                table, suffix, f"'{start_date}'", f"'{end_date}'"
+            ):
+                continue
+            # IF NOT EXISTS doesn't stop two workers creating the same partition
+            # at once, the loser fails with DuplicateTable but the partition is there
+            if f"{table}_{suffix}" in table_manager.list_partitions(table):
+                continue
+            logger.warning(f"Partition {table}_{suffix} is missing, retrying later")
+            return
+        # Only remembered once committed, a failed create is retried
+        # by the next batch with a date in the partition
+        self.known.add(suffix)
+
+    def close(self):
+        """Close the dedicated DDL connection, reopened by the next track."""
+        if self.table_manager is not None:
+            self.table_manager.db.close()
+            self.table_manager = None
+
+    def get_table_manager(self) -> TableManager:
+        # DDL runs on its own connection so it never interleaves with a COPY
+        if self.table_manager is None:
+            self.table_manager = TableManager(db=Database.open_connection())
+        return self.table_manager
@@ -0,0 +1,98 @@
+from database.arrow_encoder import partition_batches
+from database.copy_encoders import BinaryCopyEncoder, PGCOPY_HEADER, PGCOPY_TRAILER
+from database.partitions import partition_suffix
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PartitionedBuffer:
+    """
+    One COPY buffer per target partition.
+    """
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.buffers = {}
+
+    def write(self, encoded: tuple):
+        suffix, row = encoded
+        buffer = self.buffers.get(suffix)
+        if buffer is None:
+            buffer = self.buffers[suffix] = self.encoder.new_buffer()
+        buffer.write(row)
+
+    def seek(self, offset: int):
+        for buffer in self.buffers.values():
+            buffer.seek(offset)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        values = [buffer.getvalue() for buffer in self.buffers.values()]
+        if isinstance(self.encoder, BinaryCopyEncoder):
+            rows = b"".join(
+                value[len(PGCOPY_HEADER) : -len(PGCOPY_TRAILER)] for value in values
+            )
+            return PGCOPY_HEADER + rows + PGCOPY_TRAILER
+        if self.encoder.format == "csv":
+            return b"".join(values)
+        return "".join(values)
+
+
+class PartitionedEncoder:
+    """
+    Wraps a COPY encoder to route rows straight into trip_date partitions.
+    Rows are bucketed on the client and each bucket is COPYed into its
+    partition table (e.g. vehicle_logs_2024) instead of the parent, so
+    Postgres skips tuple routing. The buckets of a batch are COPYed in
+    one transaction, so a batch is committed either in full or not at all.
+    """
+
+    def __init__(self, encoder, partition_column: str):
+        self.encoder = encoder
+        self.columns = encoder.columns
+        self.partition_column = partition_column
+
+    @property
+    def format(self) -> str:
+        return self.encoder.format
+
+    def new_buffer(self) -> PartitionedBuffer:
+        return PartitionedBuffer(self.encoder)
+
+    def encode(self, item: dict) -> tuple:
+        suffix = partition_suffix(item[self.partition_column])
+        return suffix, self.encoder.encode(item)
+
+    def encode_batch(self, batch) -> list:
+        """Split an Arrow record batch by partition, see ArrowCopyEncoder."""
+        return [
+            (suffix, chunk)
+            for suffix, part in partition_batches(
+                batch, self.partition_column, partition_suffix
+            )
+            for chunk in self.encoder.encode_batch(part)
+        ]
+
+    def finish(self, buffer: PartitionedBuffer) -> PartitionedBuffer:
+        for partition_buffer in buffer.buffers.values():
+            self.encoder.finish(partition_buffer)
+        return buffer
+
+    def copy_sql(self, table: str) -> str:
+        return self.encoder.copy_sql(table)
+
+    def partition_table(self, table: str, suffix: str) -> str:
+        return f"{table}_{suffix}"
+
+    def copy(self, db, buffer: PartitionedBuffer, table: str) -> bool:
+        with db.transaction():
+            for suffix, partition_buffer in buffer.buffers.items():
+                partition_table = self.partition_table(table, suffix)
+                # A failed COPY rolled the transaction back, stop right there
+                if not self.encoder.copy(db, partition_buffer, partition_table):
+                    logger.error(f"Error copying data into {partition_table}")
+                    return False
+        return True
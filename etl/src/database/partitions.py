@@ -0,0 +1,72 @@
+import os
+import re
+from datetime import date
+
+# Years partitioned by month instead of by year, e.g. "2024,2025"
+MONTHLY_PARTITION_YEARS = {
+    year.strip()
+    for year in os.getenv("MONTHLY_PARTITION_YEARS", "").split(",")
+    if year.strip()
+}
+
+
+def partition_suffix(trip_date) -> str:
+    """
+    Name suffix of the trip_date partition a row belongs to.
+
+    Args:
+        trip_date (str | date): ISO date string or date
+
+    Returns:
+        str: Partition suffix, "2024" for vehicle_logs_2024 or "2024_03"
+            for vehicle_logs_2024_03 when 2024 is partitioned monthly
+    """
+    if isinstance(trip_date, date):
+        trip_date = trip_date.isoformat()
+    year = str(trip_date)[:4]
+    if year in MONTHLY_PARTITION_YEARS:
+        return f"{year}_{str(trip_date)[5:7]}"
+    return year
+
+
+def partition_bounds(suffix: str) -> tuple:
+    """
+    Range bounds of a partition.
+
+    Args:
+        suffix (str): Partition suffix returned by partition_suffix
+
+    Returns:
+        tuple: (start, end) ISO dates, end exclusive
+    """
+    if "_" in suffix:
+        year, month = (int(part) for part in suffix.split("_"))
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return date(year, month, 1).isoformat(), end.isoformat()
+    year = int(suffix)
+    return date(year, 1, 1).isoformat(), date(year + 1, 1, 1).isoformat()
+
+
+def conflicting_partitions(suffixes, monthly_years: set = None) -> list:
+    """
+    Existing partitions whose range overlaps the partition partition_suffix
+    would now route their dates to: a yearly partition of a year listed in
+    MONTHLY_PARTITION_YEARS, or monthly partitions of a year that isn't.
+
+    Args:
+        suffixes (list): Suffixes of a table's existing partitions
+        monthly_years (set, optional): Defaults to MONTHLY_PARTITION_YEARS
+
+    Returns:
+        list: Conflicting suffixes, sorted
+    """
+    if monthly_years is None:
+        monthly_years = MONTHLY_PARTITION_YEARS
+    conflicts = []
+    for suffix in suffixes:
+        if not re.fullmatch(r"\d{4}(_\d{2})?", suffix):
+            continue
+        monthly = "_" in suffix
+        if monthly != (suffix[:4] in monthly_years):
+            conflicts.append(suffix)
+    return sorted(conflicts)
@@ -0,0 +1,63 @@
+import os
+import psycopg
+from psycopg import sql
+
+from database.db import Database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Size of the chunks streamed from file-like buffers into COPY
+COPY_CHUNK_SIZE = int(os.getenv("COPY_CHUNK_SIZE", 1024 * 1024))
+
+
+class PsycopgDatabase(Database):
+    """
+    Database backend built on psycopg 3.
+    Keeps the psycopg2 Database API but streams COPY data through
+    cursor.copy(): file-like buffers are sent in chunks and row buffers
+    are written one row at a time with write_row.
+    Selected with DB_DRIVER=psycopg.
+    """
+
+    def connect(self):
+        if self.connection is None or self.connection.closed:
+            try:
+                self.connection = psycopg.connect(
+                    dbname=self.db_name,
+                    user=self.user,
+                    password=self.password,
+                    host=self.host,
+                    port=self.port,
+                )
+                self.cursor = self.connection.cursor()
+                logger.info("Database connection established (psycopg 3).")
+            except Exception as e:
+                logger.error(f"Error connecting to database: {e}")
+                raise
+
+    def copy_expert(self, query, buffer, cursor=None):
+        """Run a COPY ... FROM STDIN statement without committing."""
+        with (cursor or self.cursor).copy(query) as copy:
+            if hasattr(buffer, "read"):
+                while chunk := buffer.read(COPY_CHUNK_SIZE):
+                    copy.write(chunk)
+            else:
+                for row in buffer:
+                    copy.write_row(row)
+
+    def copy_from(self, buffer, table, columns, sep="\t") -> bool:
+        self.connect()  # Ensure connection before copying
+        try:
+            query = sql.SQL("COPY {} ({}) FROM STDIN WITH (DELIMITER {})").format(
+                sql.Identifier(table),
+                sql.SQL(", ").join(map(sql.Identifier, columns)),
+                sql.Literal(sep),
+            )
+            self.copy_expert(query, buffer)
+            self.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error copying data: {e}")
+            self.connection.rollback()
+            return False
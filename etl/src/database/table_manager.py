@@ -6,9 +6,8 @@ logger = get_logger(__name__)
 
 
 class TableManager:
-    def __init__(self):
-        self.db = Database.get_instance()
-        self.partition_year_range = range(2020, 2026)
+    def __init__(self, db: Database = None):
+        self.db = db or Database.get_instance()
 
     def create_table(
         self,
@@ -30,15 +29,29 @@ class TableManager:
             logger.error(f"Error creating table {table_name}: {e}")
             raise
 
-    def create_partition(self, table_name, partition_key, start_date, end_date):
+    def create_partition(self, table_name, partition_key, start_date, end_date) -> bool:
         try:
             query = f"CREATE TABLE IF NOT EXISTS {table_name}_{partition_key} PARTITION OF {table_name} FOR VALUES FROM ({start_date}) TO ({end_date});"
             self.db.execute(query)
             logger.info(
                 f"Partition {partition_key} created successfully for table {table_name}"
             )
+            return True
         except Exception as e:
             logger.error(f"Error creating partition {partition_key}: {e}")
+            return False
+
+    def list_partitions(self, table_name) -> list:
+        rows = self.db.fetch(
+            f"""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = '{table_name}'
+            """
+        )
+        return [row[0] for row in rows]
 
     def create_base_tables(self):
         try:
@@ -63,11 +76,7 @@ class TableManager:
                 partition_key="trip_date",
             )
 
-            for year in self.partition_year_range:
-                self.create_partition(
-                    Tables.vehicle_logs, year, f"'{year}-01-01'", f"'{year+1}-01-01'"
-                )
-
+            # Partitions are provisioned by PartitionManager as trip_dates arrive
             self.create_table(
                 table_name=Tables.shipments,
                 schema=(
@@ -84,11 +93,6 @@ class TableManager:
                 partition_key="trip_date",
             )
 
-            for year in self.partition_year_range:
-                self.create_partition(
-                    Tables.shipments, year, f"'{year}-01-01'", f"'{year+1}-01-01'"
-                )
-
         except Exception as e:
             logger.error(f"Error creating tables: {e}")
             raise
@@ -0,0 +1,103 @@
+from database.db import Database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def merge_statement(
+    table: str,
+    columns: list,
+    conflict_columns: list,
+    source: str,
+    position: str = "ctid",
+) -> str:
+    """
+    Build an INSERT ... ON CONFLICT DO UPDATE that merges source into table.
+    ON CONFLICT can't touch the same row twice in one statement, so
+    duplicates inside the batch are collapsed first, the last one wins.
+
+    Args:
+        table (str): Target table
+        columns (list): Columns to insert
+        conflict_columns (list): Primary key of the target table
+        source (str): Relation the rows are selected from
+        position (str): Expression giving the rows' order within the batch
+
+    Returns:
+        str: SQL statement
+    """
+    column_list = ", ".join(columns)
+    keys = ", ".join(conflict_columns)
+    updates = [
+        f"{col} = EXCLUDED.{col}" for col in columns if col not in conflict_columns
+    ]
+    action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+    return f"""
+        INSERT INTO {table} ({column_list})
+        SELECT DISTINCT ON ({keys}) {column_list}
+        FROM {source}
+        ORDER BY {keys}, {position} DESC
+        ON CONFLICT ({keys}) {action}
+    """
+
+
+class UpsertEncoder:
+    """
+    Wraps a COPY encoder to make loads idempotent.
+    Each batch is COPYed into a session-private staging table and merged
+    into the target in the same transaction, so rows that were already
+    loaded are updated in place instead of failing the whole batch.
+    """
+
+    def __init__(self, encoder, conflict_columns: list):
+        self.encoder = encoder
+        self.columns = encoder.columns
+        self.conflict_columns = conflict_columns
+
+    @property
+    def format(self) -> str:
+        return self.encoder.format
+
+    def new_buffer(self):
+        return self.encoder.new_buffer()
+
+    def encode(self, item: dict):
+        return self.encoder.encode(item)
+
+    def encode_batch(self, batch) -> list:
+        return self.encoder.encode_batch(batch)
+
+    def finish(self, buffer):
+        return self.encoder.finish(buffer)
+
+    def copy_sql(self, table: str) -> str:
+        return self.encoder.copy_sql(table)
+
+    def copy(self, db: Database, buffer, table: str) -> bool:
+        db.connect()  # Ensure connection before copying
+        connection = db.get_connection()
+        staging_table = f"stg_{table}"
+        try:
+            with connection.cursor() as cur:
+                # TEMP tables skip the WAL like UNLOGGED ones and are private
+                # to the connection, so parallel loaders don't collide
+                cur.execute(
+                    f"""
+                    CREATE TEMP TABLE IF NOT EXISTS {staging_table}
+                    (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+                """
+                )
+                buffer.seek(0)
+                db.copy_expert(self.encoder.copy_sql(staging_table), buffer, cursor=cur)
+                cur.execute(
+                    merge_statement(
+                        table, self.columns, self.conflict_columns, staging_table
+                    )
+                )
+                logger.info(f"Merged {cur.rowcount} rows into {table}")
+            db.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error merging data into {table}: {e}")
+            connection.rollback()
+            return False
@@ -1,35 +1,154 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from constants.constants import FilePaths
 from database.table_manager import TableManager, Tables
 from database.db import Database
+from database.bulk_rebuild import BULK_REBUILD
+from database.partition_manager import PartitionManager
+from pipeline import DagRunner, FolderWatcher, Stage
+from pipeline.dag import STAGE_WORKERS
 from processors import ShipmentProcessor, VehicleProcessor, VehicleLogProcessor
+from readers import get_ijson_backend
 from services.notification_service import NotificationService
+from utils.file import get_data_file_path
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Stage raw shipments while vehicles and logs load, instead of validating
+# them against the in-process log index afterwards
+STAGE_SHIPMENTS = os.getenv("STAGE_SHIPMENTS", "true").lower() == "true"
+# A bulk rebuild needs the log index to route shipments into load tables
+VALIDATE_WITH_LOG_INDEX = not STAGE_SHIPMENTS or BULK_REBUILD
+# once loads data/raw and exits, daemon keeps watching it for new files
+RUN_MODE = os.getenv("RUN_MODE", "once")
+
+
+def build_stages(
+    notification_service: NotificationService, batch_id: str, files: list = None
+) -> list:
+    """
+    Build the ETL graph. vehicle_logs reference vehicles and shipments
+    reference vehicle_logs, everything else may run concurrently.
+    Processors are created inside their stage so each uses its thread's connection.
+    files limits the processors to the files of a micro-batch.
+    """
+    vehicle_log_processors = []
+    shipment_processors = []
+    batch_files = None if files is None else {os.path.abspath(f) for f in files}
+
+    def restrict(processor):
+        processor.files = batch_files
+        return processor
+
+    def mark_complete(table_name: str, processors: list = None):
+        def on_success():
+            # Record the loaded trip_dates before the last table notifies
+            for processor in processors or []:
+                notification_service.record_date_range(
+                    batch_id, processor.date_range()
+                )
+            notification_service.mark_table_complete(batch_id, table_name)
+
+        return on_success
+
+    def load_vehicle_logs() -> bool:
+        # Only built when load_shipments reads it
+        processor = VehicleLogProcessor(build_index=VALIDATE_WITH_LOG_INDEX)
+        vehicle_log_processors.append(restrict(processor))
+        return vehicle_log_processors[0].run()
+
+    def stage_shipments() -> bool:
+        # load_staged must run on the processor that knows the staged files
+        shipment_processors.append(restrict(ShipmentProcessor()))
+        return shipment_processors[0].stage()
+
+    def load_shipments() -> bool:
+        log_index = vehicle_log_processors[0].log_index
+        shipment_processors.append(restrict(ShipmentProcessor(log_index=log_index)))
+        return shipment_processors[0].run()
+
+    stages = [
+        Stage(
+            Tables.vehicles,
+            lambda: restrict(VehicleProcessor()).run(),
+            on_success=mark_complete(Tables.vehicles),
+        ),
+        Stage(
+            Tables.vehicle_logs,
+            load_vehicle_logs,
+            depends_on=[Tables.vehicles],
+            on_success=mark_complete(Tables.vehicle_logs, vehicle_log_processors),
+        ),
+    ]
+
+    if not VALIDATE_WITH_LOG_INDEX:
+        stages += [
+            Stage("shipments_staging", stage_shipments),
+            Stage(
+                Tables.shipments,
+                lambda: shipment_processors[0].load_staged(),
+                depends_on=[Tables.vehicle_logs, "shipments_staging"],
+                on_success=mark_complete(Tables.shipments, shipment_processors),
+            ),
+        ]
+    else:
+        stages.append(
+            Stage(
+                Tables.shipments,
+                load_shipments,
+                depends_on=[Tables.vehicle_logs],
+                on_success=mark_complete(Tables.shipments, shipment_processors),
+            )
+        )
+    return stages
+
+
+def run_daemon(notification_service: NotificationService):
+    """
+    Load new files from data/raw as they arrive, one micro-batch at a time.
+    Stage threads live as long as the daemon, so their connections stay warm,
+    and every micro-batch notifies etl_complete with its trip_date range.
+    """
+    raw_dir = get_data_file_path(FilePaths.vehicles).parent
+    watcher = FolderWatcher(raw_dir)
+    logger.info(f"Watching {raw_dir} for new files")
+
+    with ThreadPoolExecutor(max_workers=STAGE_WORKERS) as executor:
+        while True:
+            files = watcher.wait_for_files()
+            batch_id = notification_service.start_batch()
+            logger.info(f"Micro-batch {batch_id}: {len(files)} files")
+            stages = build_stages(notification_service, batch_id, files)
+            DagRunner(stages, executor=executor).run()
+
+
 if __name__ == "__main__":
     Database.init_db()
 
+    # Resolve and log the JSON parser backend once at startup
+    get_ijson_backend()
+
     table_manager = TableManager()
     table_manager.create_base_tables()
 
+    # Fail fast when MONTHLY_PARTITION_YEARS overlaps existing partitions
+    partition_manager = PartitionManager()
+    try:
+        partition_manager.check_layout()
+    finally:
+        partition_manager.close()
+
     notification_service = NotificationService()
 
+    if RUN_MODE == "daemon":
+        run_daemon(notification_service)
+
     # Start new batch
     batch_id = notification_service.start_batch()
 
-    vehicle_processor = VehicleProcessor()
-    vehicle_result = vehicle_processor.run()
-    if vehicle_result:
-        notification_service.mark_table_complete(batch_id, Tables.vehicles)
-
-    vehicle_log_processor = VehicleLogProcessor()
-    log_result = vehicle_log_processor.run()
-    if log_result:
-        notification_service.mark_table_complete(batch_id, Tables.vehicle_logs)
-
-    shipment_processor = ShipmentProcessor()
-    if shipment_processor.run():
-        notification_service.mark_table_complete(batch_id, Tables.shipments)
+    DagRunner(build_stages(notification_service, batch_id)).run()
 
     # Optional: Get final status
     final_status = notification_service.get_batch_status(batch_id)
@@ -0,0 +1,8 @@
+"""
+Orchestration of the ETL pipeline.
+Stages form a dependency graph and run concurrently
+as soon as the stages they depend on have committed.
+"""
+
+from pipeline.dag import DagRunner, Stage
+from pipeline.watcher import FolderWatcher
@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", 3))
+
+
+class Stage:
+    """
+    One step of the ETL graph.
+
+    Args:
+        name (str): Unique stage name
+        run (callable): Called without arguments in a worker thread,
+            returns True on success
+        depends_on (list, optional): Names of stages that must succeed first
+        on_success (callable, optional): Called in the scheduling thread once
+            the stage succeeded, e.g. to mark its table complete
+    """
+
+    def __init__(self, name: str, run, depends_on: list = None, on_success=None):
+        self.name = name
+        self.run = run
+        self.depends_on = depends_on or []
+        self.on_success = on_success
+
+
+class DagRunner:
+    """
+    Runs ETL stages concurrently as soon as their dependencies succeeded.
+    Each stage runs in its own thread and so gets its own Database instance.
+    Stages whose dependencies failed are skipped.
+
+    A long-lived executor can be passed in, its threads then keep their
+    Database connections warm from one run to the next.
+
+    The API's ViewScheduler (api/app/core/tasks/database_views) schedules
+    materialized views with the same semantics. The two services ship as
+    separate images without shared code, so a change to the scheduling
+    rules here belongs there too; tests/test_dag.py and the API's
+    tests/test_view_scheduler.py check the same cases.
+    """
+
+    def __init__(self, stages: list, workers: int = None, executor=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.workers = workers or STAGE_WORKERS
+        self.executor = executor
+        self.results = {}
+        self.timings = {}
+
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(
+                        f"Stage {stage.name} depends on unknown stage {dependency}"
+                    )
+
+    def run(self) -> dict:
+        """
+        Run every stage of the graph.
+
+        Returns:
+            dict: Stage name to result, False for failed and skipped stages
+        """
+        waiting = dict(self.stages)
+        running = {}
+        started = time.perf_counter()
+
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while waiting or running:
+                skipped = False
+                for name, stage in list(waiting.items()):
+                    dependencies = [self.results.get(dep) for dep in stage.depends_on]
+                    if any(result is False for result in dependencies):
+                        logger.warning(f"Skipping stage {name}, a dependency failed")
+                        self.results[name] = False
+                        del waiting[name]
+                        skipped = True
+                    elif all(dependencies):
+                        logger.info(f"Starting stage {name}")
+                        running[executor.submit(self.run_stage, stage)] = stage
+                        del waiting[name]
+
+                if not running:
+                    if skipped:
+                        # Dependents of the skipped stages resolve on the next pass
+                        continue
+                    raise ValueError(f"Dependency cycle between {list(waiting)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    self.results[stage.name] = future.result()
+                    if self.results[stage.name] and stage.on_success:
+                        stage.on_success()
+        finally:
+            if executor is not self.executor:
+                executor.shutdown()
+
+        self.log_timings(time.perf_counter() - started)
+        return self.results
+
+    def run_stage(self, stage: Stage) -> bool:
+        started = time.perf_counter()
+        try:
+            return bool(stage.run())
+        except Exception as e:
+            logger.error(f"Stage {stage.name} failed: {e}")
+            return False
+        finally:
+            self.timings[stage.name] = time.perf_counter() - started
+
+    def log_timings(self, total: float):
+        for name in self.stages:
+            if name in self.timings:
+                status = "ok" if self.results.get(name) else "failed"
+                logger.info(f"Stage {name}: {self.timings[name]:.2f}s ({status})")
+            else:
+                logger.info(f"Stage {name}: skipped")
+        logger.info(f"All stages finished in {total:.2f}s")
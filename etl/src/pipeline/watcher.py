@@ -0,0 +1,96 @@
+import os
+import time
+from pathlib import Path
+
+from readers import INPUT_EXTENSIONS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds between two scans of the watched directory
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", 5))
+# A file is picked up once its size and mtime were unchanged for this long
+WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", 10))
+# Most files loaded by one micro-batch, the rest wait for the next one
+MICRO_BATCH_MAX_FILES = int(os.getenv("MICRO_BATCH_MAX_FILES", 100))
+
+
+class FolderWatcher:
+    """
+    Polls a directory tree for input files and hands out the ones that
+    finished arriving. A file counts as arrived once its size and mtime
+    stayed the same for settle seconds, so files still being copied in are
+    never read half-written. Polling works on every filesystem, including
+    bind mounts and network shares where inotify events are not delivered.
+    """
+
+    def __init__(
+        self,
+        directory,
+        interval: float = None,
+        settle: float = None,
+        max_files: int = None,
+    ):
+        self.directory = Path(directory)
+        self.interval = interval or WATCH_INTERVAL
+        self.settle = WATCH_SETTLE_SECONDS if settle is None else settle
+        self.max_files = max_files or MICRO_BATCH_MAX_FILES
+        # Path to (size, mtime, first seen with that size and mtime)
+        self.seen = {}
+        # Path to (size, mtime) when it was handed out
+        self.dispatched = {}
+
+    def scan(self) -> list:
+        """
+        Returns:
+            list: Input files that finished arriving and were not handed out
+                in their current state yet, in name order
+        """
+        now = time.monotonic()
+        present = set()
+        ready = []
+        for path in sorted(self.directory.rglob("*")):
+            if not path.name.endswith(INPUT_EXTENSIONS):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Moved away by a load between listing and stat
+                continue
+            present.add(path)
+            state = (stat.st_size, stat.st_mtime)
+
+            seen = self.seen.get(path)
+            if seen is None or seen[:2] != state:
+                self.seen[path] = (*state, now)
+                if self.settle:
+                    continue
+                seen = self.seen[path]
+            if now - seen[2] < self.settle:
+                continue
+            # A file that failed to load stays put, retry it only once it changed
+            if self.dispatched.get(path) != state:
+                ready.append(path)
+
+        # Forget files that were loaded and moved away
+        for path in set(self.seen) - present:
+            del self.seen[path]
+            self.dispatched.pop(path, None)
+        return ready
+
+    def wait_for_files(self) -> list:
+        """
+        Block until new input files arrived.
+
+        Returns:
+            list: At most max_files arrived files, marked as handed out
+        """
+        while True:
+            ready = self.scan()
+            if ready:
+                files = ready[: self.max_files]
+                for path in files:
+                    self.dispatched[path] = self.seen[path][:2]
+                logger.info(f"{len(ready)} new files in {self.directory}")
+                return files
+            time.sleep(self.interval)
@@ -1,14 +1,32 @@
-from io import StringIO
 import os
-import ijson
+import json
 from dotenv import load_dotenv
 
-from validators.batch_shipment_validator import BatchValidator
-from processors.stream_processor import StreamProcessor
-from database.db import Database
+from validators.batch_shipment_validator import BatchValidator, STAGING_TABLE
+from processors.stream_processor import (
+    StreamProcessor,
+    COPY_FORMAT,
+    PARTITIONED_COPY,
+    LOAD_MODE,
+)
+from database.upsert_writer import merge_statement
+from database.copy_encoders import get_copy_encoder
+from database.arrow_encoder import ArrowCopyEncoder, conform_batch, replace_column
+from database.bulk_rebuild import BULK_REBUILD
+from readers import ParquetReader, is_columnar
+from utils.date_range import DateRange
 from utils.logger import get_logger
-from constants.constants import SHIPPING_COLUMNS, Tables, FilePaths
+from constants.constants import (
+    SHIPPING_COLUMNS,
+    SHIPPING_COLUMN_TYPES,
+    SHIPMENT_TABLE_COLUMNS,
+    PRIMARY_KEYS,
+    Tables,
+    FilePaths,
+)
 from utils.file import get_data_file_path
+from validators.log_date_index import LogDateIndex
+from database.partition_manager import PartitionManager
 
 
 load_dotenv()
@@ -22,29 +40,151 @@ class ShipmentProcessor(StreamProcessor):
     """
     Processor for shipment data.
     Handles ingestion of shipment records with complex validation against vehicle logs.
-    Uses temporary tables for batch validation and processing.
+    Uses temporary tables for batch validation and processing, or an
+    in-process log index when one covering all vehicle logs is available.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        copy_format: str = COPY_FORMAT,
+        log_index: LogDateIndex = None,
+        partitioned: bool = PARTITIONED_COPY or BULK_REBUILD,
+    ):
         """
         Initialize the shipment processor.
         Sets up database connection, batch processing, and validation components.
+
+        Args:
+            copy_format (str): COPY format used for ingestion, "text", "binary" or "rows"
+            log_index (LogDateIndex, optional): Index of committed vehicle logs
+            partitioned (bool): COPY straight into the trip_date partitions,
+                only possible when trip_date is resolved from the log index.
+                Always on with BULK_REBUILD, which rebuilds the partitions
         """
         self.file_path = get_data_file_path(FilePaths.shipments)
         self.table_name = Tables.shipments
         self.columns = SHIPPING_COLUMNS
+        self.validation_callback = None
+        partition_column = None
+
+        if log_index is not None and not log_index.complete:
+            logger.info("Log index does not cover vehicle_logs, using temp tables")
+            log_index = None
+        self.log_index = log_index
+
+        if self.log_index is not None:
+            # Validate client-side and COPY straight into shipments
+            self.columns = SHIPMENT_TABLE_COLUMNS
+            self.validation_callback = self.attach_trip_date
+            self.partition_manager = PartitionManager()
+            if partitioned:
+                partition_column = "trip_date"
 
-        super().__init__(self.file_path, self.table_name, self.columns, None)
+        super().__init__(
+            self.file_path,
+            self.table_name,
+            self.columns,
+            self.validation_callback,
+            column_types=SHIPPING_COLUMN_TYPES,
+            copy_format=copy_format,
+            partition_column=partition_column,
+            conflict_columns=PRIMARY_KEYS[Tables.shipments],
+        )
         # Keep Database connection same to use TEMP tables
-        self.db = Database.get_instance().get_connection()
-        self.validator = BatchValidator(self.db, BATCH_SIZE)
+        self.connection = self.db.get_connection()
+        self.validator = BatchValidator(self.connection, BATCH_SIZE)
         self.current_batch = []
-        self.batch_buffer = StringIO()
+        self.batch_buffer = self.encoder.new_buffer()
+        self.staged_files = []
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("connection", None)
+        state.pop("validator", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.connection = self.db.get_connection()
+        self.validator = BatchValidator(self.connection, BATCH_SIZE)
+
+    def attach_trip_date(self, item: dict) -> bool:
+        """
+        Validate a shipment against the log index and attach its trip_date.
+
+        Args:
+            item (dict): Parsed shipment
+
+        Returns:
+            bool: True if the shipment references a known log
+        """
+        trip_date = self.log_index.get(item["log_id"])
+        if trip_date is None:
+            return False
+        item["trip_date"] = trip_date
+        self.partition_manager.track(trip_date)
+        self.file_dates.add(trip_date)
+        return True
+
+    def split_record_batch(self, batch) -> tuple:
+        """
+        Attach trip_date to a batch of shipments from the log index.
+        Without an index the batch is validated in the temp table instead.
+
+        Args:
+            batch (pyarrow.RecordBatch): Conformed shipments of one batch
+
+        Returns:
+            tuple: (pyarrow.RecordBatch of valid shipments, list of (item, reason))
+        """
+        if self.log_index is None:
+            return batch, []
+
+        trip_dates = [
+            self.log_index.get(log_id)
+            for log_id in batch.column("log_id").to_pylist()
+        ]
+        batch = replace_column(batch, "trip_date", trip_dates)
+        for trip_date in set(trip_dates) - {None}:
+            self.partition_manager.track(trip_date)
+            self.file_dates.add(trip_date)
+
+        unknown = [trip_date is None for trip_date in trip_dates]
+        if not any(unknown):
+            return batch, []
+        rejected = [
+            (item, self.invalid_reason(item))
+            for item in batch.filter(unknown).to_pylist()
+        ]
+        return batch.filter([not flag for flag in unknown]), rejected
 
-    def process_batch(self) -> bool:
+    def load_batch(self, buffer, position: tuple = None) -> bool:
+        """
+        Load one serialized batch through the temp table validation.
+        Batches validated against the log index go straight to shipments.
+
+        Args:
+            buffer (StringIO | BytesIO): Buffer containing the serialized batch
+            position (tuple, optional): Checkpoint (ordinal, read, offset)
+                committed together with the batch
+
+        Returns:
+            bool: True if batch processing successful, False otherwise
+        """
+        if self.log_index is not None:
+            return super().load_batch(buffer, position)
+
+        self.batch_buffer = self.encoder.finish(buffer)
+        return self.process_batch(position)
+
+    def process_batch(self, position: tuple = None) -> bool:
         """
         Process a batch of shipment records.
         Validates records against vehicle logs and handles invalid records.
+
+        Args:
+            position (tuple, optional): Checkpoint (ordinal, read, offset)
+                committed together with the batch
         
         Returns:
             bool: True if batch processing successful, False otherwise
@@ -53,68 +193,206 @@ class ShipmentProcessor(StreamProcessor):
             self.validator.setup_temp_tables()
 
             # Use existing copy_from method for initial batch load
-            with self.db.cursor() as cur:
+            with self.connection.cursor() as cur:
                 cur.execute("TRUNCATE temp_shipments")
                 self.batch_buffer.seek(0)
-                cur.copy_from(
+                self.db.copy_expert(
+                    self.encoder.copy_sql("temp_shipments"),
                     self.batch_buffer,
-                    table="temp_shipments",
-                    columns=self.columns,
-                    sep="\t",
+                    cursor=cur,
                 )
 
-                # Identify and handle invalid records
-                cur.execute(
-                    """
-                    WITH invalid_records AS (
-                        SELECT t.*
-                        FROM temp_shipments t
-                        LEFT JOIN vehicle_logs v ON t.log_id = v.log_id
-                        WHERE v.log_id IS NULL
-                        AND t.log_id NOT IN (
-                            SELECT log_id 
-                            FROM vehicle_logs 
-                            WHERE trip_date > CURRENT_DATE
-                        )
-                    )
-                    SELECT array_to_json(array_agg(row_to_json(r)))
-                    FROM invalid_records r;
-                """
-                )
-
-                invalid_records = cur.fetchone()[0] or []
-
-                if invalid_records:
-                    # Use existing save_invalid_items method
-                    self.save_invalid_items(invalid_records)
-
-                # Insert valid records
-                cur.execute(
-                    """
-                    INSERT INTO shipments
-                        SELECT t.*, v.trip_date
-                    FROM temp_shipments t
-                    JOIN vehicle_logs v ON t.log_id = v.log_id;
-                """
-                )
-
-                # check result of insert
-                cur.execute("SELECT COUNT(*) FROM shipments")
-                count = cur.fetchone()[0]
-                logger.info(f"Inserted {count} valid records into shipments")
+                self.insert_matched(cur, "temp_shipments")
+                if position is not None:
+                    self.save_checkpoint(*position, cursor=cur)
 
                 # commit the transaction
-                self.db.commit()
+                self.connection.commit()
                 return True
 
         except Exception as e:
-            self.db.rollback()
+            self.connection.rollback()
             # Use existing save_failed_data method
             self.batch_buffer.seek(0)
             self.save_failed_data(self.batch_buffer.getvalue())
-            logger.error(f"Batch processing failed: ", e)
+            logger.error(f"Batch processing failed: {e}")
+            return False
+
+    def insert_matched(self, cur, source_table: str):
+        """
+        Move shipments from a staging table into shipments, saving the ones
+        without a matching vehicle log as invalid. Does not commit.
+
+        Args:
+            cur: Cursor of the transaction to run in
+            source_table (str): Table holding SHIPPING_COLUMNS rows
+        """
+        # Split the rows into valid and invalid ones in one pass:
+        # the join runs once, valid rows are inserted through a
+        # data-modifying CTE and only the staged rows are counted
+        cur.execute(
+            f"""
+            WITH matched AS (
+                SELECT t.*, v.trip_date, t.ctid AS row_position
+                FROM {source_table} t
+                LEFT JOIN vehicle_logs v ON t.log_id = v.log_id
+            ),
+            inserted AS (
+                {self.insert_statement()}
+                RETURNING trip_date
+            ),
+            invalid_records AS (
+                SELECT shipment_id, origin, destination, weight,
+                    cost, delivery_time, log_id
+                FROM matched
+                WHERE trip_date IS NULL
+            )
+            SELECT 'inserted',
+                json_build_array(COUNT(*), MIN(trip_date), MAX(trip_date))::text
+            FROM inserted
+            UNION ALL
+            SELECT 'invalid', row_to_json(r)::text FROM invalid_records r;
+        """
+        )
+
+        # Invalid rows come back one per result row and are streamed to the
+        # invalid sink in chunks, a whole staged file never builds one list
+        inserted_count = invalid_count = 0
+        while rows := cur.fetchmany(BATCH_SIZE):
+            invalid_records = []
+            for kind, value in rows:
+                if kind == "inserted":
+                    inserted_count, min_date, max_date = json.loads(value)
+                    self.file_dates.add(min_date)
+                    self.file_dates.add(max_date)
+                else:
+                    invalid_records.append(json.loads(value))
+            invalid_count += len(invalid_records)
+            self.save_invalid_items(invalid_records)
+
+        logger.info(
+            f"Inserted {inserted_count} valid records into shipments, "
+            f"{invalid_count} invalid"
+        )
+
+    def stage(self) -> bool:
+        """
+        COPY the raw shipment files into the shipments_staging table.
+        Needs no vehicle logs, so it can run while they are still loading.
+
+        Returns:
+            bool: True if every file was staged, False otherwise
+        """
+        self.staged_files = self.input_files()
+        if not self.staged_files:
+            return self.manifest is not None or self.files is not None
+
+        encoder = get_copy_encoder(
+            self.encoder.format, SHIPPING_COLUMNS, SHIPPING_COLUMN_TYPES
+        )
+        self.validator.setup_staging_table()
+        self.db.execute(f"TRUNCATE {STAGING_TABLE}")
+
+        count = 0
+        for file_path in self.staged_files:
+            self.file_path = file_path
+            logger.info(f"Staging file: {self.file_path}")
+            if is_columnar(file_path):
+                staged = self.stage_record_batches()
+                if staged is None:
+                    return False
+                count += staged
+                continue
+            with self.open_reader() as reader:
+                for items in self.iter_item_batches(reader):
+                    buffer = encoder.new_buffer()
+                    for item in items:
+                        buffer.write(encoder.encode(item))
+                    buffer = encoder.finish(buffer)
+                    if not encoder.copy(self.db, buffer, STAGING_TABLE):
+                        return False
+                    count += len(items)
+                    logger.info(f"Staged {count} items")
+
+        # Fresh statistics so the join against vehicle_logs gets a good plan
+        self.db.execute(f"ANALYZE {STAGING_TABLE}")
+        return True
+
+    def stage_record_batches(self):
+        """
+        COPY a Parquet shipment file into the shipments_staging table.
+
+        Returns:
+            int | None: Rows staged, None if a COPY failed
+        """
+        encoder = ArrowCopyEncoder(SHIPPING_COLUMNS)
+        count = 0
+        with ParquetReader(self.file_path, SHIPPING_COLUMNS, BATCH_SIZE) as reader:
+            for batch in reader:
+                batch = conform_batch(batch, SHIPPING_COLUMNS, SHIPPING_COLUMN_TYPES)
+                buffer = encoder.new_buffer()
+                for chunk in encoder.encode_batch(batch):
+                    buffer.write(chunk)
+                if not encoder.copy(self.db, buffer, STAGING_TABLE):
+                    return None
+                count += batch.num_rows
+                logger.info(f"Staged {count} items from {self.file_path}")
+        return count
+
+    def load_staged(self) -> bool:
+        """
+        Validate the staged shipments against the committed vehicle logs and
+        insert them into shipments with a single set-based statement.
+        Must run on the processor that staged them.
+
+        Returns:
+            bool: True if loading successful, False otherwise
+        """
+        try:
+            with self.connection.cursor() as cur:
+                self.insert_matched(cur, STAGING_TABLE)
+                cur.execute(f"TRUNCATE {STAGING_TABLE}")
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Loading staged shipments failed: {e}")
             return False
 
+        self.invalid_sink.close()
+        staged_dates = self.file_dates
+        for file_path in self.staged_files:
+            self.file_path = file_path
+            # The staged files were inserted together and share one range
+            self.file_dates = DateRange(staged_dates.start, staged_dates.end)
+            self.move_processed_file()
+        return True
+
+    def invalid_reason(self, item: dict) -> str:
+        return "unknown_log_id"
+
+    def insert_statement(self) -> str:
+        """
+        Statement inserting the matched rows of a batch into shipments.
+        With LOAD_MODE=upsert shipments that were already loaded are updated.
+
+        Returns:
+            str: INSERT statement reading from the matched CTE
+        """
+        columns = ", ".join(SHIPMENT_TABLE_COLUMNS)
+        source = "matched WHERE trip_date IS NOT NULL"
+        if LOAD_MODE == "upsert":
+            return merge_statement(
+                self.table_name,
+                SHIPMENT_TABLE_COLUMNS,
+                PRIMARY_KEYS[self.table_name],
+                f"(SELECT * FROM {source}) valid",
+                position="row_position",
+            )
+        return (
+            f"INSERT INTO {self.table_name} ({columns}) "
+            f"SELECT {columns} FROM {source}"
+        )
+
     def process_file(self) -> bool:
         """
         Process the shipment file with batch processing.
@@ -123,6 +401,15 @@ class ShipmentProcessor(StreamProcessor):
         Returns:
             bool: True if file processing successful, False otherwise
         """
+        if is_columnar(self.file_path):
+            return self.process_file_arrow()
+        if self.log_index is not None and self.ingest_mode != "parallel":
+            return super().process_file()
+        if self.ingest_mode == "parallel":
+            return self.process_file_parallel()
+        if self.ingest_mode == "pipelined":
+            return self.process_file_pipelined()
+
         if not os.path.exists(self.file_path):
             logger.error(f"File not found: {self.file_path}")
             return False
@@ -130,41 +417,56 @@ class ShipmentProcessor(StreamProcessor):
         logger.info(f"Processing file: {self.file_path}")
 
         try:
-            with open(self.file_path, "r") as file:
+            with self.open_reader() as reader:
+                ordinal, read = self.resume_position(reader)
                 count = 0
                 self.current_batch = []
-                self.batch_buffer = StringIO()
-
-                for item in ijson.items(file, "item"):
-                    values = [
-                        str(item[col]) if item[col] is not None else "\\N"
-                        for col in self.columns
-                    ]
-                    self.batch_buffer.write("\t".join(values) + "\n")
+                self.batch_buffer = self.encoder.new_buffer()
+
+                for item in reader:
+                    self.batch_buffer.write(self.encoder.encode(item))
                     count += 1
 
                     if count % BATCH_SIZE == 0:
-                        success = self.process_batch()
+                        ordinal += 1
+                        position = (ordinal, read + count, reader.offset())
+                        success = self.load_batch(self.batch_buffer, position)
 
                         if not success:
+                            self.stop_after_failed_batch(ordinal)
                             return False
-                        self.batch_buffer = StringIO()
+                        self.batch_buffer = self.encoder.new_buffer()
 
                 # Process remaining records
-                if self.batch_buffer.tell() > 0:
-                    success = self.process_batch()
+                if count % BATCH_SIZE:
+                    success = self.load_batch(self.batch_buffer)
                     if not success:
+                        self.stop_after_failed_batch(ordinal + 1)
                         return False
 
                 logger.info(f"Processed {count} items")
 
+                self.invalid_sink.close()
+
                 # Use existing move_processed_file method
                 self.move_processed_file()
                 return True
 
         except Exception as e:
-            logger.error(f"File processing failed: ", e)
+            logger.error(f"File processing failed: {e}")
             return False
 
     def run(self) -> bool:
-        return self.process_file()
+        try:
+            if not self.rebuild:
+                if BULK_REBUILD:
+                    logger.warning(
+                        "No log index, shipments are loaded into the live table"
+                    )
+                return self.process_input()
+
+            self.rebuild.prepare()
+            return self.process_input() and self.rebuild.finalize()
+        finally:
+            if self.log_index is not None:
+                self.partition_manager.close()
@@ -1,12 +1,36 @@
-import ijson
 import os
-import json
+import multiprocessing
+import queue
+import threading
+from contextlib import nullcontext
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    FIRST_COMPLETED,
+    as_completed,
+    wait,
+)
 from datetime import datetime
-from io import StringIO
 from dotenv import load_dotenv
 
 from utils.logger import get_logger
-from database.db import Database
+from database.db import Database, DB_DRIVER
+from database.copy_encoders import get_copy_encoder
+from database.partition_writer import PartitionedEncoder
+from database.upsert_writer import UpsertEncoder
+from database.bulk_rebuild import BULK_REBUILD, BulkRebuild, RebuildEncoder
+from database.arrow_encoder import ArrowCopyEncoder, conform_batch
+from readers import (
+    ParquetReader,
+    get_reader,
+    is_columnar,
+    is_splittable,
+    resolve_input_files,
+    split_ranges,
+)
+from services.checkpoint_service import CheckpointService
+from services.manifest_service import ManifestService
+from utils.date_range import DateRange
+from writers.invalid_sink import InvalidRecordSink
 
 load_dotenv()
 
@@ -14,6 +38,38 @@ logger = get_logger(__name__)
 
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", 10000))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
+WORKERS = int(os.getenv("WORKERS", 4))
+INGEST_MODE = os.getenv("INGEST_MODE", "serial")
+PIPELINE_DEPTH = int(os.getenv("PIPELINE_DEPTH", 2))
+COPY_FORMAT = os.getenv("COPY_FORMAT", "text")
+PARTITIONED_COPY = os.getenv("PARTITIONED_COPY", "false").lower() == "true"
+LOAD_MODE = os.getenv("LOAD_MODE", "copy")
+CHECKPOINTING = os.getenv("CHECKPOINTING", "true").lower() == "true"
+# Worker processes loading whole shard files concurrently, 1 loads them in turn
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", 1))
+# Skip input files whose content is already in the ingested_files manifest
+INCREMENTAL = os.getenv("INCREMENTAL", "false").lower() == "true"
+
+# Processor instance owned by each worker process in parallel mode
+_worker_processor = None
+
+
+def _init_worker(processor):
+    global _worker_processor
+    _worker_processor = processor
+    _worker_processor.in_worker = True
+
+
+def _process_batch_worker(items: list) -> tuple:
+    return _worker_processor.process_items(items)
+
+
+def _process_shard_worker(file_path) -> bool:
+    return _worker_processor.process_shard(file_path)
+
+
+def _process_range_worker(file_range: tuple) -> tuple:
+    return _worker_processor.process_range(*file_range)
 
 
 class StreamProcessor:
@@ -23,23 +79,229 @@ class StreamProcessor:
     """
 
     def __init__(
-        self, file_path: str, table_name: str, columns: list, validation_callback=None
+        self,
+        file_path: str,
+        table_name: str,
+        columns: list,
+        validation_callback=None,
+        column_types: dict = None,
+        copy_format: str = "text",
+        partition_column: str = None,
+        conflict_columns: list = None,
     ):
         """
         Initialize the stream processor.
         
         Args:
-            file_path (str): Path to the input file
+            file_path (str): Path to the input file. Compressed variants
+                (.json.gz, .json.zst) and a directory of shard files named
+                after it are picked up as well, see resolve_input_files
             table_name (str): Target database table name
             columns (list): List of column names for the table
             validation_callback (callable, optional): Function to validate each record
+            column_types (dict, optional): Column name to type, needed for binary COPY
+            copy_format (str): COPY format used for ingestion, "text", "binary" or "rows"
+            partition_column (str, optional): Date column used to COPY rows
+                straight into their yearly partitions instead of the parent table
+            conflict_columns (list, optional): Primary key batches are merged on
+                when LOAD_MODE=upsert
         """
+        self.source_path = file_path
         self.file_path = file_path
         self.table_name = table_name
         self.columns = columns
         self.validation_callback = validation_callback
+        if copy_format == "rows" and DB_DRIVER != "psycopg":
+            raise ValueError("COPY_FORMAT=rows requires DB_DRIVER=psycopg")
+        self.column_types = column_types
+        self.partition_column = partition_column
+        self.conflict_columns = conflict_columns
+        # Partitioned tables are rebuilt from scratch, other tables load normally
+        self.rebuild = None
+        if BULK_REBUILD and partition_column:
+            self.rebuild = BulkRebuild(table_name)
+        self.encoder = self.wrap_encoder(
+            get_copy_encoder(copy_format, columns, column_types)
+        )
+        # Built for the first Parquet input, pyarrow is optional
+        self.arrow_encoder = None
+        self.invalid_sink = InvalidRecordSink(table_name)
+        self.ingest_mode = INGEST_MODE
+        self.workers = WORKERS
+        self.shard_workers = SHARD_WORKERS
+        # Set in worker processes, which can't hand in-process state back
+        self.in_worker = False
+        self.loaded_in_workers = False
+        self.db = Database.get_instance()
+        # Unlogged load tables are emptied by crash recovery, so a rebuild
+        # always starts over instead of resuming
+        self.checkpoints = (
+            CheckpointService() if CHECKPOINTING and not self.rebuild else None
+        )
+        self.manifest = ManifestService() if INCREMENTAL else None
+        # Files of the current micro-batch in daemon mode, None loads every
+        # input file of the table
+        self.files = None
+        # trip_dates touched by the current file and by the files before it
+        self.file_dates = DateRange()
+        self.dates = DateRange()
+
+    def wrap_encoder(self, encoder):
+        """
+        Wrap a COPY encoder for the configured load mode: merged through a
+        staging table for LOAD_MODE=upsert, routed into partitions or into
+        bulk rebuild load tables for partitioned tables.
+
+        Args:
+            encoder: Row or Arrow encoder for the table's columns
+
+        Returns:
+            Encoder used by load_batch
+        """
+        if LOAD_MODE == "upsert" and not self.rebuild:
+            if not self.conflict_columns:
+                raise ValueError(
+                    f"LOAD_MODE=upsert needs the key of {self.table_name}"
+                )
+            encoder = UpsertEncoder(encoder, self.conflict_columns)
+        if self.rebuild:
+            return RebuildEncoder(encoder, self.partition_column)
+        if self.partition_column:
+            return PartitionedEncoder(encoder, self.partition_column)
+        return encoder
+
+    def __getstate__(self):
+        # Connections can't be shared across processes, each worker opens its own
+        state = self.__dict__.copy()
+        state.pop("db", None)
+        # Workers hand invalid items back, only the parent writes them
+        state["invalid_sink"] = None
+        # Only the parent process records checkpoints and the manifest
+        state["checkpoints"] = None
+        state["manifest"] = None
+        # Rebuilt on demand in the process that reads Parquet
+        state["arrow_encoder"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
         self.db = Database.get_instance()
 
+    def process_input(self) -> bool:
+        """
+        Process every input file of the table.
+        Shard files are loaded one after another as one logical stream, or
+        by SHARD_WORKERS worker processes concurrently.
+
+        Returns:
+            bool: True if all files were processed successfully
+        """
+        files = self.input_files()
+        if not files:
+            return self.manifest is not None or self.files is not None
+
+        if self.shard_workers > 1 and len(files) > 1:
+            return self.process_shards_parallel(files)
+
+        success = True
+        for file_path in files:
+            self.file_path = file_path
+            success = self.process_file() and success
+        return success
+
+    def input_files(self) -> list:
+        """
+        Resolve the input files of the table. With INCREMENTAL=true, files
+        whose content is already in the manifest are moved to the processed
+        directory instead of being loaded again.
+
+        Returns:
+            list: Paths of the files to load
+        """
+        files = resolve_input_files(self.source_path)
+        if self.files is not None:
+            files = [path for path in files if os.path.abspath(path) in self.files]
+        if not files:
+            if self.files is not None:
+                logger.info(f"No {self.table_name} files in this micro-batch")
+            elif self.manifest:
+                logger.info(f"No new input files for {self.table_name}")
+            else:
+                logger.error(f"No input files found for {self.source_path}")
+            return []
+        if not self.manifest:
+            return files
+
+        pending = []
+        for file_path in files:
+            if self.manifest.is_processed(file_path, self.table_name):
+                logger.info(f"Skipping already loaded file: {file_path}")
+                self.file_path = file_path
+                self.move_processed_file(record=False)
+            else:
+                pending.append(file_path)
+        logger.info(
+            f"{len(pending)} new input files for {self.table_name}, "
+            f"{len(files) - len(pending)} already loaded"
+        )
+        return pending
+
+    def process_shards_parallel(self, files: list) -> bool:
+        """
+        Load shard files in worker processes, each parsing and loading
+        whole files on its own connection.
+
+        Args:
+            files (list): Shard file paths
+
+        Returns:
+            bool: True if all shards were processed successfully
+        """
+        workers = min(self.shard_workers, len(files))
+        logger.info(f"Processing {len(files)} shards with {workers} workers")
+        self.loaded_in_workers = True
+
+        # spawn instead of fork so workers never inherit the parent's connection
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as executor:
+            results = list(executor.map(_process_shard_worker, files))
+
+        failed = [str(path) for path, success in zip(files, results) if not success]
+        if failed:
+            logger.warning(f"Failed shards: {failed}")
+        return not failed
+
+    def process_shard(self, file_path) -> bool:
+        """
+        Process one shard file inside a worker process.
+
+        Args:
+            file_path (Path): Shard file path
+
+        Returns:
+            bool: True if processing successful, False otherwise
+        """
+        self.file_path = file_path
+        # Batches of a shard are loaded in this process, one after another
+        self.ingest_mode = "serial"
+        self.invalid_sink = InvalidRecordSink(
+            f"{self.table_name}_{os.path.basename(file_path).split('.')[0]}"
+        )
+        self.checkpoints = (
+            CheckpointService() if CHECKPOINTING and not self.rebuild else None
+        )
+        self.manifest = ManifestService() if INCREMENTAL else None
+        try:
+            return self.process_file()
+        except Exception as e:
+            logger.error(f"Error processing shard {file_path}: {e}")
+            return False
+
     def process_file(self) -> bool:
         """
         Process the input file in streaming fashion.
@@ -48,6 +310,13 @@ class StreamProcessor:
         Returns:
             bool: True if processing successful, False otherwise
         """
+        if is_columnar(self.file_path):
+            return self.process_file_arrow()
+        if self.ingest_mode == "parallel":
+            return self.process_file_parallel()
+        if self.ingest_mode == "pipelined":
+            return self.process_file_pipelined()
+
         # check if file exists
         if not os.path.exists(self.file_path):
             logger.error(f"File not found: {self.file_path}")
@@ -55,49 +324,632 @@ class StreamProcessor:
 
         logger.info(f"Processing file: {self.file_path}")
 
-        with open(self.file_path, "r") as file:
+        with self.open_reader() as reader:
+            ordinal, read = self.resume_position(reader)
             count = 0
-            invalid_items = []
-            buffer = StringIO()
-
-            for item in ijson.items(file, "item"):
-                # logger.info(f"Processing item: {item}")
-                if self.validation_callback and not self.validation_callback(item):
-                    invalid_items.append(item)
-                    # logger.warning(f"Invalid item: {item}")
+
+            # Batches are validated as a whole, see split_batch
+            for items in self.iter_item_batches(reader):
+                read += len(items)
+                buffer, batch_count, rejected = self.build_batch(items)
+                self.save_rejected(rejected)
+                ordinal += 1
+                position = (ordinal, read, reader.offset())
+
+                if not batch_count:
+                    self.save_checkpoint(*position)
                     continue
+                if not self.flush_batch(buffer=buffer, position=position):
+                    self.stop_after_failed_batch(ordinal)
+                    return False
+                count += batch_count
+                logger.info(f"Processed {count} items")
 
-                # values = [str(item.get(col, 'NULL')) for col in self.columns]
-                values = [
-                    str(item[col]) if item[col] is not None else "\\N"
-                    for col in self.columns
-                ]
-                buffer.write("\t".join(values) + "\n")
-                count += 1
+            self.invalid_sink.close()
+
+            # Move file to processed directory
+            self.move_processed_file()
+        return True
 
-                if (count % BATCH_SIZE) == 0 and count > 0:
+    def process_file_arrow(self) -> bool:
+        """
+        Process a Parquet input file as Arrow record batches.
+        Columns are cast, validated and serialized to CSV COPY data batch-wise,
+        only rejected rows are turned into dicts for the invalid sink.
+        pyarrow decodes on its own threads, so this runs in-process in every
+        ingest mode.
+
+        Returns:
+            bool: True if processing successful, False otherwise
+        """
+        if not os.path.exists(self.file_path):
+            logger.error(f"File not found: {self.file_path}")
+            return False
+
+        logger.info(f"Processing Parquet file: {self.file_path}")
+
+        if self.arrow_encoder is None:
+            self.arrow_encoder = self.wrap_encoder(ArrowCopyEncoder(self.columns))
+        # load_batch COPYs with self.encoder, the row encoder is put back after
+        row_encoder, self.encoder = self.encoder, self.arrow_encoder
+        try:
+            with ParquetReader(self.file_path, self.columns, BATCH_SIZE) as reader:
+                ordinal, read = self.resume_position(reader)
+                count = 0
+
+                for batch in reader:
+                    read += batch.num_rows
+                    buffer, batch_count, rejected = self.build_record_batch(batch)
+                    self.save_rejected(rejected)
+                    ordinal += 1
+                    position = (ordinal, read, reader.offset())
+
+                    if not batch_count:
+                        self.save_checkpoint(*position)
+                        continue
+                    if not self.flush_batch(buffer=buffer, position=position):
+                        self.stop_after_failed_batch(ordinal)
+                        return False
+                    count += batch_count
                     logger.info(f"Processed {count} items")
-                    self.ingest_data(buffer=buffer)
-                    buffer = StringIO()  # Reset the buffer
+        finally:
+            self.encoder = row_encoder
+
+        self.invalid_sink.close()
+
+        self.move_processed_file()
+        return True
+
+    def build_record_batch(self, batch) -> tuple:
+        """
+        Conform, validate and serialize one Arrow record batch.
+
+        Args:
+            batch (pyarrow.RecordBatch): Batch as read from the file
+
+        Returns:
+            tuple: (buffer, number of serialized rows, list of (item, reason))
+        """
+        batch = conform_batch(batch, self.columns, self.column_types)
+        valid, rejected = self.split_record_batch(batch)
+
+        buffer = self.encoder.new_buffer()
+        if valid.num_rows:
+            for chunk in self.encoder.encode_batch(valid):
+                buffer.write(chunk)
+        return buffer, valid.num_rows, rejected
+
+    def split_record_batch(self, batch) -> tuple:
+        """
+        Split a conformed record batch into valid rows and rejected items.
+        Runs validation_callback on the rows as dicts, subclasses validate
+        the columns instead.
+
+        Args:
+            batch (pyarrow.RecordBatch): Conformed batch
+
+        Returns:
+            tuple: (pyarrow.RecordBatch of valid rows, list of (item, reason))
+        """
+        if not self.validation_callback:
+            return batch, []
+
+        items = batch.to_pylist()
+        mask = [bool(self.validation_callback(item)) for item in items]
+        rejected = [
+            (item, self.invalid_reason(item))
+            for item, valid in zip(items, mask)
+            if not valid
+        ]
+        return batch.filter(mask), rejected
+
+    def process_file_parallel(self) -> bool:
+        """
+        Process the input file with a pool of worker processes.
+        The main process only parses the file into batches of raw items;
+        validation, row serialization and COPY run in the workers, each
+        with its own database connection.
+
+        Returns:
+            bool: True if processing successful, False otherwise
+        """
+        if not os.path.exists(self.file_path):
+            logger.error(f"File not found: {self.file_path}")
+            return False
+
+        if is_splittable(self.file_path):
+            return self.process_file_ranges()
+
+        logger.info(
+            f"Processing file: {self.file_path} with {self.workers} workers"
+        )
+        self.loaded_in_workers = True
 
-            self.ingest_data(buffer=buffer)
+        count = 0
+        failed_batches = 0
+        # Batches finish out of order, the checkpoint only advances over the
+        # contiguous run of committed batches
+        positions = {}
+        finished = {}
+        next_ordinal = 0
+
+        def collect(futures):
+            nonlocal count, failed_batches, next_ordinal
+            for future in futures:
+                position = positions.pop(future)
+                try:
+                    success, ingested, rejected = future.result()
+                except Exception as e:
+                    logger.error(f"Worker failed for file {self.file_path}: {e}")
+                    failed_batches += 1
+                    continue
+                self.save_rejected(rejected)
+                if not success:
+                    failed_batches += 1
+                    continue
+                finished[position[0]] = position
+                count += ingested
             logger.info(f"Processed {count} items")
 
-            if invalid_items:
-                logger.warning(f"Invalid items: {len(invalid_items)}")
-                # store invalid items in a file
-                self.save_invalid_items(invalid_items)
+            position = None
+            while next_ordinal in finished:
+                position = finished.pop(next_ordinal)
+                next_ordinal += 1
+            if position:
+                self.save_checkpoint(*position)
 
-            # Move file to processed directory
-            self.move_processed_file()
+        # spawn instead of fork so workers never inherit the parent's connection
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as executor:
+            pending = set()
+            with self.open_reader() as reader:
+                ordinal, read = self.resume_position(reader)
+                next_ordinal = ordinal + 1
+                for items in self.iter_item_batches(reader):
+                    # Stop feeding workers, the file resumes at the failed batch
+                    if failed_batches:
+                        break
+                    ordinal += 1
+                    read += len(items)
+                    future = executor.submit(_process_batch_worker, items)
+                    positions[future] = (ordinal, read, reader.offset())
+                    pending.add(future)
+
+                    # Bound the number of parsed batches waiting in memory
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+
+            done, _ = wait(pending)
+            collect(done)
+
+        self.invalid_sink.close()
+
+        if failed_batches:
+            logger.error(
+                f"Failed batches: {failed_batches}, {self.file_path} resumes "
+                f"from the last checkpoint"
+            )
+            return False
+
+        self.move_processed_file()
+        return True
+
+    def process_file_pipelined(self) -> bool:
+        """
+        Process the input file with parsing and COPY overlapped.
+        A producer thread parses and serializes the next batch while the
+        calling thread loads the previous one. The bounded queue applies
+        backpressure so at most PIPELINE_DEPTH + 2 batches live in memory.
+
+        Returns:
+            bool: True if processing successful, False otherwise
+        """
+        if not os.path.exists(self.file_path):
+            logger.error(f"File not found: {self.file_path}")
+            return False
+
+        logger.info(f"Processing file: {self.file_path} (pipelined)")
+
+        batches = queue.Queue(maxsize=PIPELINE_DEPTH)
+        stop = threading.Event()
+        errors = []
+
+        def put(batch) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(batch, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                with self.open_reader() as reader:
+                    ordinal, read = self.resume_position(reader)
+                    for items in self.iter_item_batches(reader):
+                        ordinal += 1
+                        read += len(items)
+                        buffer, count, rejected = self.build_batch(items)
+                        self.save_rejected(rejected)
+                        state = self.on_batch_built()
+                        position = (ordinal, read, reader.offset())
+                        if count and not put((buffer, count, state, position)):
+                            return
+            except Exception as e:
+                logger.error(f"Error parsing file {self.file_path}: {e}")
+                errors.append(e)
+            finally:
+                put(None)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        count = 0
+        failed_batches = 0
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                buffer, batch_count, state, position = batch
+                success = self.load_batch(buffer=buffer, position=position)
+                self.on_batch_loaded(state, success)
+                if not success:
+                    failed_batches += 1
+                    break
+                count += batch_count
+                logger.info(f"Processed {count} items")
+        finally:
+            # Unblock the producer if the consumer exits early
+            stop.set()
+            producer.join()
+
+        if failed_batches:
+            self.stop_after_failed_batch(position[0])
+            return False
+
+        self.invalid_sink.close()
+
+        if errors:
+            return False
+
+        self.move_processed_file()
+        return True
+
+    def process_file_ranges(self) -> bool:
+        """
+        Process a line-delimited input file with a pool of worker processes,
+        each parsing, validating and loading its own byte range of the file.
+        Unlike process_file_parallel the main process doesn't parse anything.
+
+        Returns:
+            bool: True if processing successful, False otherwise
+        """
+        with self.open_reader() as reader:
+            ordinal, read = self.resume_position(reader)
+            start = reader.offset()
+        # A few ranges per worker even out ranges with more invalid rows
+        ranges = split_ranges(self.file_path, self.workers * 2, start)
+
+        logger.info(
+            f"Processing file: {self.file_path} as {len(ranges)} byte ranges "
+            f"with {self.workers} workers"
+        )
+        self.loaded_in_workers = True
+
+        count = 0
+        failed_ranges = 0
+        # Ranges finish out of order, the checkpoint only advances over the
+        # contiguous run of committed ranges
+        finished = {}
+        next_index = 0
+
+        # spawn instead of fork so workers never inherit the parent's connection
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _process_range_worker, (self.file_path, begin, end, index)
+                ): index
+                for index, (begin, end) in enumerate(ranges)
+            }
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                index = futures[future]
+                try:
+                    success, ingested, range_read = future.result()
+                except Exception as e:
+                    logger.error(f"Worker failed for file {self.file_path}: {e}")
+                    success, ingested = False, 0
+                count += ingested
+                if not success:
+                    failed_ranges += 1
+                    # Ranges not started yet are left to the resumed run
+                    for pending in futures:
+                        pending.cancel()
+                    continue
+                finished[index] = range_read
+                logger.info(f"Processed {count} items")
+
+                advanced = False
+                while next_index in finished:
+                    read += finished.pop(next_index)
+                    next_index += 1
+                    advanced = True
+                if advanced:
+                    self.save_checkpoint(
+                        ordinal + next_index, read, ranges[next_index - 1][1]
+                    )
+
+        self.invalid_sink.close()
+
+        if failed_ranges:
+            logger.error(
+                f"Failed ranges: {failed_ranges}, {self.file_path} resumes "
+                f"from the last checkpoint"
+            )
+            return False
+
+        self.move_processed_file()
         return True
 
-    def ingest_data(self, buffer: StringIO, retry_count: int = 0) -> bool:
+    def process_range(self, file_path, start: int, end: int, index: int) -> tuple:
+        """
+        Process one byte range of a line-delimited file inside a worker process.
+
+        Args:
+            file_path (Path): Input file path
+            start (int): Offset of the first line of the range
+            end (int): Offset just past the last line of the range
+            index (int): Position of the range in the file, names its invalid file
+
+        Returns:
+            tuple: (success, number of rows loaded, number of items read)
+        """
+        self.file_path = file_path
+        self.invalid_sink = InvalidRecordSink(f"{self.table_name}_{index:04d}")
+        success = True
+        count = 0
+        read = 0
+
+        with get_reader(file_path, start, end, self.column_types) as reader:
+            for items in self.iter_item_batches(reader):
+                read += len(items)
+                success, ingested, rejected = self.process_items(items)
+                self.save_rejected(rejected)
+                count += ingested
+                # The rest of the range is loaded again when the file resumes
+                if not success:
+                    break
+
+        self.invalid_sink.close()
+        return success, count, read
+
+    def open_reader(self):
+        """
+        Create the reader used to stream records from the input file,
+        picked by its extension (JSON array, NDJSON or CSV).
+
+        Returns:
+            Reader: Reader to be used as a context manager
+        """
+        return get_reader(self.file_path, column_types=self.column_types)
+
+    def resume_position(self, reader) -> tuple:
+        """
+        Position the reader after the last checkpointed batch of the input file.
+
+        Args:
+            reader: Open reader returned by open_reader
+
+        Returns:
+            tuple: (batch ordinal, items read) of the checkpoint, (0, 0) if none
+        """
+        if not self.checkpoints:
+            return 0, 0
+
+        checkpoint = self.checkpoints.load(self.file_path, self.table_name)
+        if not checkpoint:
+            return 0, 0
+
+        ordinal, read, offset = checkpoint
+        logger.info(
+            f"Resuming {self.file_path} after batch {ordinal} ({read} items read)"
+        )
+        reader.resume(read, offset)
+        return ordinal, read
+
+    def save_checkpoint(self, ordinal: int, read: int, offset: int, cursor=None):
+        """
+        Record that every item up to read has been loaded or set aside.
+
+        Args:
+            ordinal (int): Number of the last finished batch
+            read (int): Items read from the file up to the end of that batch
+            offset (int): Reader byte offset at the end of that batch
+            cursor (optional): Cursor of the transaction that loaded the batch.
+                Errors are raised then, so the batch is rolled back with it
+        """
+        if not self.checkpoints:
+            return
+        if cursor is not None:
+            self.checkpoints.save(
+                self.file_path, self.table_name, ordinal, read, offset, cursor
+            )
+            return
+        try:
+            self.checkpoints.save(
+                self.file_path, self.table_name, ordinal, read, offset
+            )
+        except Exception as e:
+            logger.error(f"Error saving checkpoint for {self.file_path}: {e}")
+
+    def stop_after_failed_batch(self, ordinal: int):
+        """
+        Give up on the current file after a batch failed to load. The file
+        stays in place and the next run resumes at the failed batch.
+
+        Args:
+            ordinal (int): Number of the failed batch
+        """
+        logger.error(
+            f"Batch {ordinal} of {self.file_path} failed, stopping. The file "
+            f"resumes from its last checkpoint on the next run"
+        )
+        self.invalid_sink.close()
+
+    def iter_item_batches(self, reader):
+        """
+        Parse the input file and yield lists of at most BATCH_SIZE raw items.
+
+        Args:
+            reader: Open reader returned by open_reader
+
+        Yields:
+            list: Batch of parsed items
+        """
+        items = []
+        for item in reader:
+            items.append(item)
+            if len(items) == BATCH_SIZE:
+                yield items
+                items = []
+        if items:
+            yield items
+
+    def build_batch(self, items: list) -> tuple:
+        """
+        Validate and serialize one batch of raw items.
+
+        Args:
+            items (list): Parsed items of one batch
+
+        Returns:
+            tuple: (buffer, number of serialized rows, list of (item, reason))
+        """
+        buffer = self.encoder.new_buffer()
+        valid_items, rejected = self.split_batch(items)
+
+        for item in valid_items:
+            buffer.write(self.encoder.encode(item))
+
+        return buffer, len(valid_items), rejected
+
+    def split_batch(self, items: list) -> tuple:
+        """
+        Split one batch of raw items into valid and rejected items.
+        Runs validation_callback per item, subclasses may validate
+        the whole batch at once instead.
+
+        Args:
+            items (list): Parsed items of one batch
+
+        Returns:
+            tuple: (list of valid items, list of (item, reason) pairs)
+        """
+        if not self.validation_callback:
+            return items, []
+
+        valid_items = []
+        rejected = []
+        for item in items:
+            if self.validation_callback(item):
+                valid_items.append(item)
+            else:
+                rejected.append((item, self.invalid_reason(item)))
+        return valid_items, rejected
+
+    def process_items(self, items: list) -> tuple:
+        """
+        Validate, serialize and load one batch of raw items.
+        Runs inside a worker process in parallel mode.
+
+        Args:
+            items (list): Parsed items of one batch
+
+        Returns:
+            tuple: (success, number of rows loaded, list of (item, reason))
+        """
+        buffer, count, rejected = self.build_batch(items)
+
+        if count == 0:
+            return True, 0, rejected
+
+        success = self.flush_batch(buffer=buffer)
+        return success, count if success else 0, rejected
+
+    def flush_batch(self, buffer, position: tuple = None) -> bool:
+        """
+        Load a finished batch, notifying the batch hooks around the load.
+
+        Args:
+            buffer (StringIO | BytesIO): Buffer containing the serialized batch
+            position (tuple, optional): Checkpoint (ordinal, read, offset)
+                committed together with the batch
+
+        Returns:
+            bool: True if load successful, False otherwise
+        """
+        state = self.on_batch_built()
+        success = self.load_batch(buffer=buffer, position=position)
+        self.on_batch_loaded(state, success)
+        return success
+
+    def on_batch_built(self):
+        """
+        Called once a batch is fully serialized, in the thread that built it.
+        Subclasses return per-batch state that is handed to on_batch_loaded.
+        """
+        return None
+
+    def on_batch_loaded(self, state, success: bool):
+        """
+        Called after a batch load attempt, in the thread that loaded it.
+
+        Args:
+            state: Value returned by on_batch_built for this batch
+            success (bool): Whether the batch was committed
+        """
+        pass
+
+    def load_batch(self, buffer, position: tuple = None) -> bool:
+        """
+        Load one serialized batch into the database.
+        Subclasses override this to add batch level validation.
+
+        Args:
+            buffer (StringIO | BytesIO): Buffer containing the serialized batch
+            position (tuple, optional): Checkpoint (ordinal, read, offset)
+                committed together with the batch
+
+        Returns:
+            bool: True if load successful, False otherwise
+        """
+        return self.ingest_data(
+            buffer=self.encoder.finish(buffer), position=position
+        )
+
+    def ingest_data(self, buffer, position: tuple = None, retry_count: int = 0) -> bool:
         """
         Ingest data from buffer into database with retry mechanism.
         
         Args:
-            buffer (StringIO): Buffer containing the data to ingest
+            buffer (StringIO | BytesIO): Buffer containing the data to ingest
+            position (tuple, optional): Checkpoint (ordinal, read, offset)
+                committed together with the batch
             retry_count (int): Current retry attempt number
             
         Returns:
@@ -107,7 +959,13 @@ class StreamProcessor:
             logger.info(f"Ingesting data into table: {self.table_name}")
             buffer.seek(0)
 
-            result = self.db.copy_from(buffer, self.table_name, self.columns, sep="\t")
+            # The checkpoint is written on the same connection and commits with
+            # the batch, so a crash can neither replay nor skip the batch
+            checkpoint = position is not None and self.checkpoints is not None
+            with self.db.transaction() if checkpoint else nullcontext():
+                result = self.encoder.copy(self.db, buffer, self.table_name)
+                if result and checkpoint:
+                    self.save_checkpoint(*position, cursor=self.db.cursor)
 
             if result:
                 logger.info(f"Successfully ingested data for file {self.file_path}")
@@ -124,32 +982,41 @@ class StreamProcessor:
                 logger.warning(
                     f"Error ingesting data for file {self.file_path}. Retrying..."
                 )
-                return self.ingest_data(buffer=buffer, retry_count=retry_count)
+                return self.ingest_data(
+                    buffer=buffer, position=position, retry_count=retry_count
+                )
             else:
                 logger.error(f"Error ingesting data for file {self.file_path}: {e}")
                 buffer.seek(0)
                 self.save_failed_data(buffer.getvalue())
                 return False
 
-    def save_failed_data(self, buffer_str: str) -> bool:
+    def save_failed_data(self, buffer_str) -> bool:
         """
         Save failed records to a file for later processing.
+        Binary COPY batches are written as-is to a .bin file, Arrow
+        batches as the CSV they were COPYed as.
         
         Args:
-            buffer_str (str): String containing failed records
+            buffer_str (str | bytes): Serialized failed records
             
         Returns:
             bool: True if save successful, False otherwise
         """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Microseconds keep concurrent workers from overwriting each other
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             failed_dir = os.path.join("data", "failed")
             os.makedirs(failed_dir, exist_ok=True)
 
-            filed_file = os.path.join(failed_dir, f"{self.table_name}_{timestamp}.txt")
+            binary = isinstance(buffer_str, bytes)
+            extension = {"binary": "bin", "csv": "csv"}.get(self.encoder.format, "txt")
+            filed_file = os.path.join(
+                failed_dir, f"{self.table_name}_{timestamp}.{extension}"
+            )
             logger.info(f"Saving failed data to file: {filed_file}")
 
-            with open(filed_file, "w") as file:
+            with open(filed_file, "wb" if binary else "w") as file:
                 file.write(buffer_str)
             return True
         except Exception as e:
@@ -157,34 +1024,98 @@ class StreamProcessor:
             logger.error(f"Data: \n{buffer_str}")
             return False
 
-    def move_processed_file(self) -> bool:
+    def date_range(self):
+        """
+        trip_dates touched by this run, so downstream refreshes can be
+        limited to them.
+
+        Returns:
+            DateRange | None: Range of the loaded rows, None when unknown
+                because rows were validated in worker processes or the
+                whole table was rebuilt
+        """
+        if self.rebuild or self.loaded_in_workers:
+            return None
+        dates = DateRange()
+        dates.update(self.dates)
+        dates.update(self.file_dates)
+        return dates
+
+    def record_processed_file(self):
+        """Add the current file to the manifest and close its date range."""
+        # Only a process that validated the rows knows their dates
+        dates_known = self.in_worker or not self.loaded_in_workers
+        if self.manifest:
+            try:
+                self.manifest.record(
+                    self.file_path,
+                    self.table_name,
+                    self.file_dates if dates_known else None,
+                )
+            except Exception as e:
+                logger.error(f"Error recording {self.file_path} in the manifest: {e}")
+        self.dates.update(self.file_dates)
+        self.file_dates = DateRange()
+
+    def move_processed_file(self, record: bool = True) -> bool:
+        if record:
+            self.record_processed_file()
         try:
             processed_dir = os.path.join("data", "processed")
-            os.makedirs(processed_dir, exist_ok=True)
-            processed_file = os.path.join(
-                processed_dir, os.path.basename(self.file_path)
+            # Shards keep their directory so equal names of two tables don't clash
+            relative_path = os.path.relpath(
+                self.file_path, os.path.dirname(self.source_path)
             )
+            processed_file = os.path.join(processed_dir, relative_path)
+            os.makedirs(os.path.dirname(processed_file), exist_ok=True)
             logger.info(f"Moving file to processed directory: {processed_file}")
             os.rename(self.file_path, processed_file)
+            if self.checkpoints:
+                self.checkpoints.clear(self.file_path, self.table_name)
             return True
         except Exception as e:
             logger.error(f"Error moving file to processed directory: {e}")
             return False
 
+    def invalid_reason(self, item: dict) -> str:
+        """
+        Why an item was rejected, used to count invalid items per reason.
+        Subclasses with more than one validation rule override this.
+        """
+        return "failed_validation"
+
     def save_invalid_items(self, invalid_items: list) -> bool:
-        try:
-            invalid_dir = os.path.join("data", "invalid")
-            os.makedirs(invalid_dir, exist_ok=True)
-            invalid_file = os.path.join(invalid_dir, f"{self.table_name}_invalid.json")
-            logger.info(f"Saving invalid items to file: {invalid_file}")
+        """
+        Append rejected items to the invalid record sink under invalid_reason.
+
+        Args:
+            invalid_items (list): Rejected items
+
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        return self.save_rejected(
+            [(item, self.invalid_reason(item)) for item in invalid_items]
+        )
 
-            with open(invalid_file, "w") as file:
-                json.dump(invalid_items, file, indent=2)
+    def save_rejected(self, rejected: list) -> bool:
+        """
+        Append rejected items and their reasons to the invalid record sink.
+
+        Args:
+            rejected (list): (item, reason) pairs
+
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        try:
+            for item, reason in rejected:
+                self.invalid_sink.write(item, reason)
             return True
         except Exception as e:
             logger.error(f"Error saving invalid items: {e}")
             return False
 
     def run(self) -> bool:
-        self.process_file()
+        self.process_input()
         return True
@@ -1,28 +1,123 @@
-from processors.stream_processor import StreamProcessor
-from constants.constants import VEHICLE_LOG_COLUMNS, Tables, FilePaths
+from processors.stream_processor import (
+    StreamProcessor,
+    COPY_FORMAT,
+    PARTITIONED_COPY,
+)
+from database.bulk_rebuild import BULK_REBUILD
+from constants.constants import (
+    VEHICLE_LOG_COLUMNS,
+    VEHICLE_LOG_COLUMN_TYPES,
+    PRIMARY_KEYS,
+    Tables,
+    FilePaths,
+)
 from utils.file import get_data_file_path
-from validators.vehicle_logs_validator import validate_vehicle_log
+from utils.logger import get_logger
+from validators.vehicle_log_batch_validator import VehicleLogBatchValidator
+from validators.log_date_index import LogDateIndex
+from database.partition_manager import PartitionManager
+
+logger = get_logger(__name__)
 
 
 class VehicleLogProcessor(StreamProcessor):
     """
     Processor for vehicle log data.
     Handles ingestion of vehicle trip logs with validation for mileage and fuel data.
+    Can build a log_id -> trip_date index of committed logs for shipment validation.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        copy_format: str = COPY_FORMAT,
+        partitioned: bool = PARTITIONED_COPY or BULK_REBUILD,
+        build_index: bool = True,
+    ):
         """
         Initialize the vehicle log processor.
         Sets up file path, table name, columns, and validation for log data processing.
+
+        Args:
+            copy_format (str): COPY format used for ingestion, "text", "binary" or "rows"
+            partitioned (bool): COPY straight into the trip_date partitions,
+                always on with BULK_REBUILD, which rebuilds the partitions
+            build_index (bool): Build the log index for shipment validation,
+                off when shipments are validated against the table instead
         """
         self.file_path = get_data_file_path(FilePaths.vehicle_logs)
         self.table_name = Tables.vehicle_logs
         self.columns = VEHICLE_LOG_COLUMNS
-        # self.validation_callback = None
-        self.validation_callback = validate_vehicle_log
+        # Logs are validated per batch, see split_batch
+        self.validation_callback = None
         super().__init__(
-            self.file_path, self.table_name, self.columns, self.validation_callback
+            self.file_path,
+            self.table_name,
+            self.columns,
+            self.validation_callback,
+            column_types=VEHICLE_LOG_COLUMN_TYPES,
+            copy_format=copy_format,
+            partition_column="trip_date" if partitioned else None,
+            conflict_columns=PRIMARY_KEYS[Tables.vehicle_logs],
         )
+        self.batch_validator = VehicleLogBatchValidator()
+        self.log_index = LogDateIndex() if build_index else None
+        self.staged_logs = []
+        self.partition_manager = PartitionManager()
+
+    def split_batch(self, items: list) -> tuple:
+        """
+        Validate a batch of logs column-wise and stage the valid logs' keys
+        for the index. Rows that would break a CHECK constraint are rejected
+        here, so they can't fail the batch's COPY.
+
+        Args:
+            items (list): Parsed vehicle logs of one batch
+
+        Returns:
+            tuple: (list of valid logs, list of (log, reason) pairs)
+        """
+        valid_items, rejected = self.batch_validator.split(items)
+        self.track_dates({item["trip_date"] for item in valid_items})
+        # Worker processes can't hand their index back
+        if self.log_index is not None and not self.in_worker:
+            self.staged_logs.extend(
+                (item["log_id"], item["trip_date"]) for item in valid_items
+            )
+        return valid_items, rejected
+
+    def split_record_batch(self, batch) -> tuple:
+        """
+        Arrow counterpart of split_batch for Parquet inputs.
+
+        Args:
+            batch (pyarrow.RecordBatch): Conformed vehicle logs of one batch
+
+        Returns:
+            tuple: (pyarrow.RecordBatch of valid logs, list of (log, reason) pairs)
+        """
+        valid, rejected = self.batch_validator.split_record_batch(batch)
+        trip_dates = valid.column("trip_date")
+        self.track_dates(trip_dates.unique().to_pylist())
+        if self.log_index is not None and not self.in_worker:
+            self.staged_logs.extend(
+                zip(valid.column("log_id").to_pylist(), trip_dates.to_pylist())
+            )
+        return valid, rejected
+
+    def track_dates(self, trip_dates):
+        """Provision the partitions of a batch's distinct trip_dates."""
+        for trip_date in trip_dates:
+            self.partition_manager.track(trip_date)
+            self.file_dates.add(trip_date)
+
+    def on_batch_built(self):
+        staged, self.staged_logs = self.staged_logs, []
+        return staged
+
+    def on_batch_loaded(self, state, success: bool):
+        # Only committed logs may be used to validate shipments
+        if success and self.log_index is not None:
+            self.log_index.extend(state)
 
     def run(self) -> bool:
         """
@@ -31,4 +126,26 @@ class VehicleLogProcessor(StreamProcessor):
         Returns:
             bool: True if processing successful, False otherwise
         """
-        return self.process_file()
+        if self.rebuild:
+            self.rebuild.prepare()
+
+        # The index only covers the table when it starts out empty
+        rows = self.db.fetch(f"SELECT NOT EXISTS (SELECT 1 FROM {self.table_name})")
+        covered = bool(rows and rows[0][0])
+        try:
+            result = self.process_input()
+        finally:
+            self.partition_manager.close()
+        if self.partition_manager.min_date:
+            logger.info(
+                f"Loaded trip dates {self.partition_manager.min_date} "
+                f"to {self.partition_manager.max_date}"
+            )
+        if self.rebuild:
+            result = result and self.rebuild.finalize()
+            # The rebuilt table holds exactly the logs of this run, unless
+            # partitions without loaded rows were kept
+            covered = result and not self.rebuild.kept
+        if self.log_index is not None:
+            self.log_index.complete = covered and not self.loaded_in_workers
+        return result
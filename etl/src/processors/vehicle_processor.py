@@ -1,7 +1,13 @@
 from pathlib import Path
 
 from processors.stream_processor import StreamProcessor
-from constants.constants import VEHICLE_COLUMNS, Tables, FilePaths
+from constants.constants import (
+    VEHICLE_COLUMNS,
+    VEHICLE_COLUMN_TYPES,
+    PRIMARY_KEYS,
+    Tables,
+    FilePaths,
+)
 from validators.vehicle_logs_validator import validate_vehicle_log
 from utils.file import get_data_file_path
 
@@ -23,7 +29,12 @@ class VehicleProcessor(StreamProcessor):
         self.columns = VEHICLE_COLUMNS
         self.validation_callback = None
         super().__init__(
-            self.file_path, self.table_name, self.columns, self.validation_callback
+            self.file_path,
+            self.table_name,
+            self.columns,
+            self.validation_callback,
+            column_types=VEHICLE_COLUMN_TYPES,
+            conflict_columns=PRIMARY_KEYS[Tables.vehicles],
         )
 
     def run(self) -> bool:
@@ -33,4 +44,4 @@ class VehicleProcessor(StreamProcessor):
         Returns:
             bool: True if processing successful, False otherwise
         """
-        return self.process_file()
+        return self.process_input()
@@ -0,0 +1,65 @@
+"""
+Input readers for the ETL pipeline.
+Each reader streams records from a source file as dicts
+so processors stay independent of the on-disk format.
+"""
+
+from readers.json_reader import JsonArrayReader, get_ijson_backend
+from readers.line_readers import CsvReader, LineReader, NdjsonReader
+from readers.parquet_reader import ParquetReader
+from readers.sources import (
+    INPUT_EXTENSIONS,
+    input_format,
+    is_compressed,
+    open_input,
+    resolve_input_files,
+    split_ranges,
+)
+
+READERS = {
+    ".json": JsonArrayReader,
+    ".ndjson": NdjsonReader,
+    ".jsonl": NdjsonReader,
+    ".csv": CsvReader,
+    ".parquet": ParquetReader,
+}
+
+
+def reader_class(file_path):
+    """Reader class for an input file, picked by its extension."""
+    return READERS[input_format(file_path)]
+
+
+def get_reader(
+    file_path, start: int = 0, end: int = None, column_types: dict = None
+):
+    """
+    Create the reader for an input file, picked by its extension.
+
+    Args:
+        file_path (str | Path): Path to the input file
+        start (int): First byte of the range to read, line-based formats only
+        end (int, optional): End of the range to read, line-based formats only
+        column_types (dict, optional): Column name to type, used to normalise
+            CSV fields, which are untyped strings
+
+    Returns:
+        Reader: Context manager yielding records as dicts, or record
+            batches for Parquet
+    """
+    cls = reader_class(file_path)
+    if cls is CsvReader:
+        return cls(file_path, start, end, column_types)
+    if start or end is not None:
+        return cls(file_path, start, end)
+    return cls(file_path)
+
+
+def is_columnar(file_path) -> bool:
+    """Whether the file is read as Arrow record batches instead of dicts."""
+    return reader_class(file_path) is ParquetReader
+
+
+def is_splittable(file_path) -> bool:
+    """Whether the file can be read as independent byte ranges."""
+    return reader_class(file_path).splittable and not is_compressed(file_path)
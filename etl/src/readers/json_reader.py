@@ -0,0 +1,104 @@
+import os
+from itertools import islice
+
+import ijson
+
+from readers.sources import open_input
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fastest first, the pure python parser is the last resort
+PREFERRED_BACKENDS = ["yajl2_c", "yajl2_cffi", "yajl2", "python"]
+IJSON_BACKEND = os.getenv("IJSON_BACKEND")
+
+_backend = None
+
+
+def get_ijson_backend():
+    """
+    Return the ijson backend used by all readers.
+    yajl2_c is always picked when it is installed. Setting IJSON_BACKEND
+    forces a specific backend and fails if it is not available.
+
+    Returns:
+        module: ijson backend module
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    if IJSON_BACKEND:
+        _backend = ijson.get_backend(IJSON_BACKEND)
+        logger.info(f"Using ijson backend: {IJSON_BACKEND}")
+        return _backend
+
+    for name in PREFERRED_BACKENDS:
+        try:
+            _backend = ijson.get_backend(name)
+        except ImportError:
+            continue
+        if name != "yajl2_c":
+            logger.warning(
+                f"ijson yajl2_c backend not available, falling back to {name}"
+            )
+        logger.info(f"Using ijson backend: {name}")
+        break
+    return _backend
+
+
+class JsonArrayReader:
+    """
+    Reader for files holding one top-level JSON array of records.
+    Opens the file in binary mode so the C backend parses raw UTF-8
+    without a text decoding pass, and yields floats instead of Decimals.
+    .json.gz and .json.zst files are decompressed while parsing.
+    """
+
+    # A JSON array can only be parsed from its beginning
+    splittable = False
+
+    def __init__(self, file_path):
+        """
+        Initialize the reader.
+
+        Args:
+            file_path (str): Path to the input file
+        """
+        self.file_path = file_path
+        self.file = None
+        self.skip = 0
+
+    def __enter__(self):
+        self.file = open_input(self.file_path)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        self.file = None
+
+    def __iter__(self):
+        items = get_ijson_backend().items(self.file, "item", use_float=True)
+        if self.skip:
+            return islice(items, self.skip, None)
+        return items
+
+    def offset(self) -> int:
+        """
+        Bytes read from the (decompressed) file so far. ijson reads ahead in
+        chunks, so this is the end of the last chunk parsed rather than an
+        item boundary.
+        """
+        return self.file.tell()
+
+    def resume(self, rows: int, offset: int):
+        """
+        Continue after the first rows items of the file.
+        A JSON array can't be entered mid-stream, so the committed items are
+        re-parsed and skipped; they are not loaded again.
+
+        Args:
+            rows (int): Items already processed
+            offset (int): Byte offset saved with the checkpoint
+        """
+        self.skip = rows
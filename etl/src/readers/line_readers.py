@@ -0,0 +1,157 @@
+import csv
+import json
+
+from readers.sources import open_input
+
+
+def _whole_number(value: str) -> str:
+    """
+    Write a whole number such as "3.0" or "3e2" as a plain integer, which
+    INTEGER columns accept in every COPY format. Other values are kept, so
+    "3.5" is rejected by the load like any other invalid integer.
+    """
+    try:
+        int(value)
+        return value
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return str(int(number)) if number.is_integer() else value
+
+
+class LineReader:
+    """
+    Base reader for line-delimited formats, one record per line.
+    Keeps the exact byte offset of the next record, so a checkpoint can seek
+    straight to it and a file can be split into byte ranges that are read
+    independently. Subclasses implement parse.
+    """
+
+    # Uncompressed line files can be split into byte ranges
+    splittable = True
+
+    def __init__(self, file_path, start: int = 0, end: int = None):
+        """
+        Initialize the reader.
+
+        Args:
+            file_path (str): Path to the input file
+            start (int): Offset of the first line to read, a line boundary
+            end (int, optional): Stop before the line starting at this offset
+        """
+        self.file_path = file_path
+        self.start = start
+        self.end = end
+        self.file = None
+        self.position = 0
+
+    def __enter__(self):
+        self.file = open_input(self.file_path)
+        self.open_range()
+        if self.start:
+            self.seek(self.start)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        self.file = None
+
+    def open_range(self):
+        """Called before seeking to the start offset, e.g. to read a header."""
+        pass
+
+    def seek(self, offset: int):
+        self.file.seek(offset)
+        self.position = offset
+
+    def lines(self):
+        """Yield the raw lines of the range, counting the bytes consumed."""
+        while self.end is None or self.position < self.end:
+            line = self.file.readline()
+            if not line:
+                return
+            self.position += len(line)
+            if line.strip():
+                yield line
+
+    def __iter__(self):
+        return self.parse(self.lines())
+
+    def parse(self, lines):
+        raise NotImplementedError
+
+    def offset(self) -> int:
+        """Offset of the next unread record in the (decompressed) file."""
+        return self.position
+
+    def resume(self, rows: int, offset: int):
+        """
+        Continue after the first rows items of the file by seeking straight
+        to the checkpointed offset.
+
+        Args:
+            rows (int): Items already processed
+            offset (int): Byte offset saved with the checkpoint
+        """
+        self.seek(offset)
+
+
+class NdjsonReader(LineReader):
+    """
+    Reader for newline-delimited JSON (.ndjson, .jsonl), one object per line.
+    Each line is parsed by the C json decoder, floats stay floats.
+    """
+
+    def parse(self, lines):
+        for line in lines:
+            yield json.loads(line)
+
+
+class CsvReader(LineReader):
+    """
+    Reader for CSV files with a header row.
+    Records are dicts keyed by the header, empty fields become None so they
+    are loaded as NULL. Quoted fields must not contain line breaks, or byte
+    range splitting would cut records apart.
+    """
+
+    def __init__(
+        self, file_path, start: int = 0, end: int = None, column_types: dict = None
+    ):
+        """
+        Initialize the reader.
+
+        Args:
+            file_path (str): Path to the input file
+            start (int): Offset of the first line to read, a line boundary
+            end (int, optional): Stop before the line starting at this offset
+            column_types (dict, optional): Column name to type, whole numbers
+                of INTEGER columns are normalised, see _whole_number
+        """
+        super().__init__(file_path, start, end)
+        self.header = None
+        self.integer_columns = [
+            column
+            for column, column_type in (column_types or {}).items()
+            if column_type == "INTEGER"
+        ]
+
+    def open_range(self):
+        self.header = next(csv.reader([self.file.readline().decode("utf-8")]))
+        self.position = self.file.tell()
+
+    def parse(self, lines):
+        header = self.header
+        rows = csv.reader(line.decode("utf-8") for line in lines)
+        for row in rows:
+            item = {
+                column: value if value != "" else None
+                for column, value in zip(header, row)
+            }
+            for column in self.integer_columns:
+                if item.get(column) is not None:
+                    item[column] = _whole_number(item[column])
+            yield item
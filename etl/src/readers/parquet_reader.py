@@ -0,0 +1,77 @@
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# pyarrow's own default, processors pass their BATCH_SIZE
+DEFAULT_BATCH_SIZE = 64 * 1024
+
+
+class ParquetReader:
+    """
+    Reader for Parquet files, yielding pyarrow RecordBatches instead of dicts.
+    Only the requested columns are decoded. Needs the optional pyarrow package.
+    """
+
+    # Row groups could be split across workers, batches are loaded in process
+    splittable = False
+
+    def __init__(self, file_path, columns: list = None, batch_size: int = None):
+        """
+        Initialize the reader.
+
+        Args:
+            file_path (str): Path to the input file
+            columns (list, optional): Columns to read, ones missing from the
+                file are skipped
+            batch_size (int, optional): Rows per record batch
+        """
+        if pq is None:
+            raise ImportError(f"Reading {file_path} requires the pyarrow package")
+        self.file_path = file_path
+        self.columns = columns
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.file = None
+        self.rows = 0
+        self.skip = 0
+
+    def __enter__(self):
+        self.file = pq.ParquetFile(self.file_path)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        self.file = None
+
+    def __iter__(self):
+        columns = self.columns
+        if columns is not None:
+            names = set(self.file.schema_arrow.names)
+            columns = [column for column in columns if column in names]
+
+        for batch in self.file.iter_batches(
+            batch_size=self.batch_size, columns=columns
+        ):
+            self.rows += batch.num_rows
+            if self.skip >= batch.num_rows:
+                self.skip -= batch.num_rows
+                continue
+            if self.skip:
+                batch = batch.slice(self.skip)
+                self.skip = 0
+            yield batch
+
+    def offset(self) -> int:
+        """Rows read so far, Parquet has no byte offset of a row."""
+        return self.rows
+
+    def resume(self, rows: int, offset: int):
+        """
+        Continue after the first rows rows of the file. Only the committed
+        rows' columns are decoded again, they are not loaded again.
+
+        Args:
+            rows (int): Rows already processed
+            offset (int): Offset saved with the checkpoint
+        """
+        self.skip = rows
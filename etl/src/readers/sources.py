@@ -0,0 +1,177 @@
+import gzip
+import io
+import os
+from pathlib import Path
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Input formats and compression suffixes, compressed files are decompressed
+# while streaming. Parquet compresses its pages itself.
+INPUT_FORMATS = (".json", ".ndjson", ".jsonl", ".csv")
+COMPRESSIONS = ("", ".gz", ".zst")
+INPUT_EXTENSIONS = tuple(
+    input_format + compression
+    for input_format in INPUT_FORMATS
+    for compression in COMPRESSIONS
+) + (".parquet",)
+
+
+class ZstdInput:
+    """
+    Binary file object streaming a zstd-compressed file.
+    Needs the optional zstandard package.
+    """
+
+    def __init__(self, file_path):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                f"Reading {file_path} requires the zstandard package"
+            ) from e
+        self.raw = open(file_path, "rb")
+        self.stream = io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(self.raw)
+        )
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.position += len(data)
+        return data
+
+    def readline(self) -> bytes:
+        line = self.stream.readline()
+        self.position += len(line)
+        return line
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int) -> int:
+        """Seek forward by decompressing and discarding, like gzip does."""
+        if offset < self.position:
+            raise io.UnsupportedOperation("Can't seek backwards in a zstd stream")
+        while self.position < offset:
+            if not self.read(min(offset - self.position, 1024 * 1024)):
+                break
+        return self.position
+
+    def close(self):
+        self.stream.close()
+        self.raw.close()
+
+
+def open_input(file_path):
+    """
+    Open an input file for binary reading, decompressing .gz and .zst
+    files on the fly instead of unpacking them to disk first.
+
+    Args:
+        file_path (str | Path): Path to the input file
+
+    Returns:
+        file object: Binary stream of the decompressed content; tell()
+            reports the position in the decompressed stream
+    """
+    name = str(file_path)
+    if name.endswith(".gz"):
+        return gzip.open(file_path, "rb")
+    if name.endswith(".zst"):
+        return ZstdInput(file_path)
+    return open(file_path, "rb")
+
+
+def resolve_input_files(file_path) -> list:
+    """
+    Find the input files configured as file_path.
+    For data/raw/vehicle_logs.json this is vehicle_logs with any of the
+    INPUT_EXTENSIONS (.json, .ndjson, .csv.gz, .parquet, ...), then deliveries
+    named vehicle_logs_<anything> with one of those extensions, then the shard
+    files of a data/raw/vehicle_logs/ directory, each in name order.
+
+    Args:
+        file_path (str | Path): Configured input path, see FilePaths
+
+    Returns:
+        list: Paths of the existing input files
+    """
+    path = Path(file_path)
+    stem = path.name
+    for extension in sorted(INPUT_EXTENSIONS, key=len, reverse=True):
+        if stem.endswith(extension):
+            stem = stem[: -len(extension)]
+            break
+
+    files = [
+        path.with_name(stem + extension)
+        for extension in INPUT_EXTENSIONS
+        if path.with_name(stem + extension).is_file()
+    ]
+
+    # Deliveries dropped next to it, e.g. vehicle_logs_20240501.ndjson
+    if path.parent.is_dir():
+        files += sorted(
+            delivery
+            for delivery in path.parent.glob(f"{stem}_*")
+            if delivery.is_file() and delivery.name.endswith(INPUT_EXTENSIONS)
+        )
+
+    shard_dir = path.with_name(stem)
+    if shard_dir.is_dir():
+        shards = sorted(
+            shard
+            for shard in shard_dir.iterdir()
+            if shard.is_file() and shard.name.endswith(INPUT_EXTENSIONS)
+        )
+        logger.info(f"Found {len(shards)} shard files in {shard_dir}")
+        files += shards
+    return files
+
+
+def input_format(file_path) -> str:
+    """Format suffix of an input file with the compression suffix removed."""
+    name = str(file_path)
+    for compression in (".gz", ".zst"):
+        if name.endswith(compression):
+            name = name[: -len(compression)]
+    for extension in INPUT_FORMATS + (".parquet",):
+        if name.endswith(extension):
+            return extension
+    raise ValueError(f"Unsupported input file: {file_path}")
+
+
+def is_compressed(file_path) -> bool:
+    return str(file_path).endswith((".gz", ".zst"))
+
+
+def split_ranges(file_path, parts: int, start: int = 0) -> list:
+    """
+    Split an uncompressed line-delimited file into byte ranges that begin
+    on line boundaries, so each range can be parsed on its own.
+
+    Args:
+        file_path (str | Path): Path to the input file
+        parts (int): Number of ranges to aim for
+        start (int): Offset of the first record, e.g. after a CSV header
+
+    Returns:
+        list: (start, end) offsets, without empty ranges
+    """
+    size = os.path.getsize(file_path)
+    bounds = [start]
+    with open(file_path, "rb") as file:
+        for i in range(1, parts):
+            target = start + (size - start) * i // parts
+            if target <= bounds[-1]:
+                continue
+            # Move to the beginning of the next line
+            file.seek(target - 1)
+            file.readline()
+            bounds.append(min(file.tell(), size))
+    bounds.append(size)
+    return [
+        (begin, end) for begin, end in zip(bounds, bounds[1:]) if end > begin
+    ]
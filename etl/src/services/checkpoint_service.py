@@ -0,0 +1,125 @@
+import os
+
+from database.db import Database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CheckpointService:
+    """
+    Persists ingestion progress per input file so a crashed run can resume
+    after the last committed batch instead of re-COPYing from row zero.
+    """
+
+    def __init__(self):
+        self.db = Database.get_instance().get_connection()
+        self.setup_tracking_table()
+
+    def setup_tracking_table(self):
+        with self.db.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingestion_checkpoints (
+                    file_path VARCHAR(500) NOT NULL,
+                    table_name VARCHAR(50) NOT NULL,
+                    file_size BIGINT NOT NULL,
+                    file_mtime DOUBLE PRECISION NOT NULL,
+                    batch_ordinal INTEGER NOT NULL,
+                    rows_read BIGINT NOT NULL,
+                    byte_offset BIGINT NOT NULL,
+                    updated_at TIMESTAMP,
+                    PRIMARY KEY (file_path, table_name)
+                )
+            """
+            )
+            self.db.commit()
+
+    def load(self, file_path, table_name: str):
+        """
+        Return the checkpoint of a file if the file is unchanged since it was saved.
+
+        Returns:
+            tuple | None: (batch_ordinal, rows_read, byte_offset)
+        """
+        stat = os.stat(file_path)
+        with self.db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT file_size, file_mtime, batch_ordinal, rows_read, byte_offset
+                FROM ingestion_checkpoints
+                WHERE file_path = %s AND table_name = %s
+            """,
+                (str(file_path), table_name),
+            )
+            result = cur.fetchone()
+        self.db.commit()
+
+        if not result:
+            return None
+        file_size, file_mtime, batch_ordinal, rows_read, byte_offset = result
+        if file_size != stat.st_size or file_mtime != stat.st_mtime:
+            logger.warning(f"Ignoring stale checkpoint for changed file {file_path}")
+            return None
+        return batch_ordinal, rows_read, byte_offset
+
+    def save(
+        self,
+        file_path,
+        table_name: str,
+        batch_ordinal: int,
+        rows_read: int,
+        byte_offset: int,
+        cursor=None,
+    ):
+        """
+        Record the position after a batch.
+
+        Args:
+            cursor (optional): Cursor of the transaction that loaded the batch,
+                the checkpoint then commits together with it
+        """
+        if cursor is None:
+            with self.db.cursor() as cur:
+                self.save(
+                    file_path, table_name, batch_ordinal, rows_read, byte_offset, cur
+                )
+            self.db.commit()
+            return
+
+        stat = os.stat(file_path)
+        cursor.execute(
+            """
+            INSERT INTO ingestion_checkpoints
+            (file_path, table_name, file_size, file_mtime,
+             batch_ordinal, rows_read, byte_offset, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+            ON CONFLICT (file_path, table_name) DO UPDATE SET
+                file_size = EXCLUDED.file_size,
+                file_mtime = EXCLUDED.file_mtime,
+                batch_ordinal = EXCLUDED.batch_ordinal,
+                rows_read = EXCLUDED.rows_read,
+                byte_offset = EXCLUDED.byte_offset,
+                updated_at = NOW()
+        """,
+            (
+                str(file_path),
+                table_name,
+                stat.st_size,
+                stat.st_mtime,
+                batch_ordinal,
+                rows_read,
+                byte_offset,
+            ),
+        )
+
+    def clear(self, file_path, table_name: str):
+        with self.db.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM ingestion_checkpoints
+                WHERE file_path = %s AND table_name = %s
+            """,
+                (str(file_path), table_name),
+            )
+            self.db.commit()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+
+from database.db import Database
+from utils.date_range import DateRange
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+
+def file_checksum(file_path) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(CHECKSUM_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ManifestService:
+    """
+    Manifest of the input files loaded per table, keyed by content checksum,
+    with the trip_date range each file touched. Incremental runs skip files
+    whose content was already loaded, even when re-delivered under a new name.
+    """
+
+    def __init__(self):
+        self.db = Database.get_instance().get_connection()
+        # Checksums computed by is_processed, reused by record
+        self.checksums = {}
+        self.setup_tracking_table()
+
+    def setup_tracking_table(self):
+        with self.db.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingested_files (
+                    table_name VARCHAR(50) NOT NULL,
+                    checksum CHAR(64) NOT NULL,
+                    file_path VARCHAR(500) NOT NULL,
+                    file_size BIGINT NOT NULL,
+                    file_mtime DOUBLE PRECISION NOT NULL,
+                    min_trip_date DATE,
+                    max_trip_date DATE,
+                    processed_at TIMESTAMP,
+                    PRIMARY KEY (table_name, checksum)
+                )
+            """
+            )
+            self.db.commit()
+
+    def checksum(self, file_path) -> str:
+        key = str(file_path)
+        if key not in self.checksums:
+            self.checksums[key] = file_checksum(file_path)
+        return self.checksums[key]
+
+    def is_processed(self, file_path, table_name: str) -> bool:
+        """
+        Whether the file's content was already loaded into the table.
+        A file recorded under the same path, size and mtime is taken as
+        unchanged without hashing it.
+        """
+        stat = os.stat(file_path)
+        with self.db.cursor() as cur:
+            cur.execute(
+                """
+                SELECT 1 FROM ingested_files
+                WHERE table_name = %s
+                  AND file_path = %s AND file_size = %s AND file_mtime = %s
+            """,
+                (table_name, str(file_path), stat.st_size, stat.st_mtime),
+            )
+            result = cur.fetchone()
+            if not result:
+                cur.execute(
+                    """
+                    SELECT 1 FROM ingested_files
+                    WHERE table_name = %s AND checksum = %s
+                """,
+                    (table_name, self.checksum(file_path)),
+                )
+                result = cur.fetchone()
+        self.db.commit()
+        return result is not None
+
+    def record(self, file_path, table_name: str, date_range: DateRange = None):
+        """
+        Record a loaded file.
+
+        Args:
+            file_path (str | Path): Input file, before it is moved away
+            table_name (str): Table the file was loaded into
+            date_range (DateRange, optional): trip_dates the file touched,
+                None if unknown
+        """
+        stat = os.stat(file_path)
+        date_range = date_range or DateRange()
+        with self.db.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO ingested_files
+                (table_name, checksum, file_path, file_size, file_mtime,
+                 min_trip_date, max_trip_date, processed_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (table_name, checksum) DO UPDATE SET
+                    file_path = EXCLUDED.file_path,
+                    file_size = EXCLUDED.file_size,
+                    file_mtime = EXCLUDED.file_mtime,
+                    min_trip_date = EXCLUDED.min_trip_date,
+                    max_trip_date = EXCLUDED.max_trip_date,
+                    processed_at = NOW()
+            """,
+                (
+                    table_name,
+                    self.checksum(file_path),
+                    str(file_path),
+                    stat.st_size,
+                    stat.st_mtime,
+                    date_range.start,
+                    date_range.end,
+                ),
+            )
+            self.db.commit()
+        self.checksums.pop(str(file_path), None)
@@ -1,3 +1,4 @@
+import json
 from database.db import Database
 from datetime import datetime
 from utils.logger import get_logger
@@ -24,10 +25,21 @@ class NotificationService:
                 )
             """
             )
+            # trip_dates the batch loaded, so downstream refreshes can be
+            # limited to them. full_refresh is set when the range is unknown
+            cur.execute(
+                """
+                ALTER TABLE batch_processing_status
+                ADD COLUMN IF NOT EXISTS min_trip_date DATE,
+                ADD COLUMN IF NOT EXISTS max_trip_date DATE,
+                ADD COLUMN IF NOT EXISTS full_refresh BOOLEAN DEFAULT FALSE
+            """
+            )
             self.db.commit()
 
     def start_batch(self):
-        batch_id = datetime.now().strftime("BATCH_%Y%m%d_%H%M%S")
+        # Microseconds keep back-to-back micro-batches apart
+        batch_id = datetime.now().strftime("BATCH_%Y%m%d_%H%M%S_%f")
 
         with self.db.cursor() as cur:
             cur.execute(
@@ -43,6 +55,41 @@ class NotificationService:
         logger.info(f"Started new batch: {batch_id}")
         return batch_id
 
+    def record_date_range(self, batch_id: str, date_range):
+        """
+        Widen the batch's trip_date range by the range a table loaded.
+
+        Args:
+            batch_id (str): Batch to update
+            date_range (DateRange | None): Loaded range, None if unknown
+        """
+        with self.db.cursor() as cur:
+            if date_range is None:
+                cur.execute(
+                    """
+                    UPDATE batch_processing_status
+                    SET full_refresh = TRUE
+                    WHERE batch_id = %s
+                """,
+                    (batch_id,),
+                )
+                logger.info(f"Batch {batch_id} needs a full refresh")
+            elif date_range:
+                cur.execute(
+                    """
+                    UPDATE batch_processing_status
+                    SET min_trip_date = LEAST(min_trip_date, %s::date),
+                        max_trip_date = GREATEST(max_trip_date, %s::date)
+                    WHERE batch_id = %s
+                """,
+                    (date_range.start, date_range.end, batch_id),
+                )
+                logger.info(
+                    f"Batch {batch_id} loaded trip dates "
+                    f"{date_range.start} to {date_range.end}"
+                )
+            self.db.commit()
+
     def mark_table_complete(self, batch_id: str, table_name: str):
         column_name = f"{table_name}_processed"
 
@@ -63,14 +110,17 @@ class NotificationService:
                 SELECT 
                     vehicles_processed AND 
                     vehicle_logs_processed AND 
-                    shipments_processed
+                    shipments_processed,
+                    min_trip_date,
+                    max_trip_date,
+                    full_refresh
                 FROM batch_processing_status
                 WHERE batch_id = %s
             """,
                 (batch_id,),
             )
 
-            all_complete = cur.fetchone()[0]
+            all_complete, min_trip_date, max_trip_date, full_refresh = cur.fetchone()
 
             if all_complete:
                 # Update completion timestamp
@@ -83,8 +133,17 @@ class NotificationService:
                     (batch_id,),
                 )
 
-                # Simple notification with just batch_id
-                cur.execute("NOTIFY etl_complete, %s", (batch_id,))
+                # The date range lets listeners refresh only what changed
+                payload = json.dumps(
+                    {
+                        "batch_id": batch_id,
+                        "min_trip_date": min_trip_date and min_trip_date.isoformat(),
+                        "max_trip_date": max_trip_date and max_trip_date.isoformat(),
+                        "full_refresh": bool(full_refresh),
+                    }
+                )
+                # pg_notify takes bind parameters under both psycopg2 and psycopg 3
+                cur.execute("SELECT pg_notify('etl_complete', %s)", (payload,))
                 logger.info(f"Batch {batch_id} complete, notification sent")
 
             self.db.commit()
@@ -99,7 +158,10 @@ class NotificationService:
                     vehicle_logs_processed,
                     shipments_processed,
                     batch_started_at,
-                    batch_completed_at
+                    batch_completed_at,
+                    min_trip_date,
+                    max_trip_date,
+                    full_refresh
                 FROM batch_processing_status
                 WHERE batch_id = %s
             """,
@@ -117,5 +179,8 @@ class NotificationService:
                     },
                     "started_at": result[4],
                     "completed_at": result[5],
+                    "min_trip_date": result[6],
+                    "max_trip_date": result[7],
+                    "full_refresh": result[8],
                 }
             return None
@@ -0,0 +1,38 @@
+from datetime import date
+
+
+class DateRange:
+    """
+    Smallest and largest trip_date seen, as ISO strings.
+    Both ends stay None until the first date is added.
+    """
+
+    def __init__(self, start: str = None, end: str = None):
+        self.start = start
+        self.end = end
+
+    def __bool__(self):
+        return self.start is not None
+
+    def __repr__(self):
+        return f"DateRange({self.start!r}, {self.end!r})"
+
+    def add(self, value):
+        """
+        Args:
+            value (str | date): ISO date string or date
+        """
+        if value is None:
+            return
+        if isinstance(value, date):
+            value = value.isoformat()
+        else:
+            value = str(value)[:10]
+        if self.start is None or value < self.start:
+            self.start = value
+        if self.end is None or value > self.end:
+            self.end = value
+
+    def update(self, other: "DateRange"):
+        self.add(other.start)
+        self.add(other.end)
@@ -1,5 +1,8 @@
 from database.db import Database
 
+# Raw shipments staged ahead of their vehicle logs, see ShipmentProcessor.stage
+STAGING_TABLE = "shipments_staging"
+
 
 class BatchValidator:
     def __init__(self, connection, batch_size: int = 50000):
@@ -15,8 +18,8 @@ class BatchValidator:
                     shipment_id VARCHAR(20),
                     origin VARCHAR(100),
                     destination VARCHAR(100),
-                    weight DECIMAL(10,2),
-                    cost DECIMAL(10,2),
+                    weight FLOAT,
+                    cost FLOAT,
                     delivery_time INTEGER,
                     log_id VARCHAR(20)
                 ) ON COMMIT DELETE ROWS;
@@ -25,3 +28,21 @@ class BatchValidator:
                 ON temp_shipments(log_id);
             """
             )
+
+    def setup_staging_table(self):
+        """Creates the unlogged table whole shipment files are staged in"""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                CREATE UNLOGGED TABLE IF NOT EXISTS {STAGING_TABLE} (
+                    shipment_id VARCHAR(20),
+                    origin VARCHAR(100),
+                    destination VARCHAR(100),
+                    weight FLOAT,
+                    cost FLOAT,
+                    delivery_time INTEGER,
+                    log_id VARCHAR(20)
+                )
+            """
+            )
+            self.conn.commit()
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class LogDateIndex:
+    """
+    Compact in-process index of log_id -> trip_date.
+    Built while vehicle logs are ingested so shipments can be validated
+    and given their trip_date without joining vehicle_logs in Postgres.
+    Keys are kept as a sorted NumPy array of fixed-width bytes next to an
+    int32 array of days since the epoch, about 14 bytes per log.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype="S1")
+        self.days = np.empty(0, dtype=np.int32)
+        # Unsorted (keys, days) chunks added since the last freeze
+        self.pending = []
+        # True when the index holds every log present in the database
+        self.complete = False
+
+    def __len__(self):
+        return len(self.keys) + sum(len(keys) for keys, _ in self.pending)
+
+    def extend(self, entries: list):
+        """
+        Add committed (log_id, trip_date) pairs.
+
+        Args:
+            entries (list): Pairs of log_id and ISO date string or date
+        """
+        if not entries:
+            return
+        log_ids, trip_dates = zip(*entries)
+        keys = np.array([log_id.encode() for log_id in log_ids], dtype=bytes)
+        days = np.array(
+            [str(trip_date)[:10] for trip_date in trip_dates], dtype="datetime64[D]"
+        ).astype(np.int32)
+        self.pending.append((keys, days))
+
+    def freeze(self):
+        """Sort the index so lookups can binary search."""
+        if not self.pending:
+            return
+        keys = np.concatenate([self.keys] + [keys for keys, _ in self.pending])
+        days = np.concatenate([self.days] + [days for _, days in self.pending])
+        self.pending = []
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.days = days[order]
+
+    def get(self, log_id: str):
+        """
+        Look up the trip_date of a log.
+
+        Args:
+            log_id (str): Log identifier
+
+        Returns:
+            date | None: Trip date, or None if the log is unknown
+        """
+        self.freeze()
+        key = log_id.encode()
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return np.datetime64(int(self.days[position]), "D").item()
+        return None
@@ -0,0 +1,174 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+# Highest plausible distance per unit of fuel, logs above it are rejected
+MAX_FUEL_EFFICIENCY = float(os.getenv("MAX_FUEL_EFFICIENCY", 100))
+# Accepted trip_date range, keeps garbage dates from provisioning partitions.
+# TRIP_DATE_MAX defaults to tomorrow, taken when the validator is created
+TRIP_DATE_MIN = os.getenv("TRIP_DATE_MIN", "2000-01-01")
+
+
+def _float_column(items: list, key: str) -> np.ndarray:
+    """Column of floats, NaN where the value is missing or not a number."""
+    values = [item.get(key) for item in items]
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return column
+
+
+def _date_column(items: list, key: str) -> np.ndarray:
+    """Column of days, NaT where the value is missing or not an ISO date."""
+    values = [item.get(key) for item in items]
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except (TypeError, ValueError):
+        column = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                column[i] = np.datetime64(str(value)[:10], "D")
+            except (TypeError, ValueError):
+                pass
+        return column
+
+
+class VehicleLogBatchValidator:
+    """
+    Validates a whole batch of vehicle logs at once.
+    The batch is turned into column arrays and every rule is evaluated as a
+    NumPy mask, so no Python code runs per row and per rule. Covers the
+    table's NOT NULL and CHECK constraints, so a batch that passes can't be
+    rejected by COPY over a single bad row.
+    """
+
+    def __init__(
+        self,
+        max_efficiency: float = MAX_FUEL_EFFICIENCY,
+        min_date: str = TRIP_DATE_MIN,
+        max_date: str = None,
+    ):
+        self.max_efficiency = max_efficiency
+        self.min_date = np.datetime64(min_date, "D")
+        # Evaluated per instance, a long-running daemon must accept new days
+        self.max_date = np.datetime64(
+            max_date
+            or os.getenv("TRIP_DATE_MAX")
+            or date.today() + timedelta(days=1),
+            "D",
+        )
+
+    def rules(self, items: list) -> list:
+        """
+        Evaluate every rule over a batch of parsed logs.
+
+        Returns:
+            list: (reason, mask of failing rows) in reporting order
+        """
+        return self.column_rules(
+            np.array([item.get("log_id") is None for item in items]),
+            _float_column(items, "mileage"),
+            _float_column(items, "fuel_used"),
+            _date_column(items, "trip_date"),
+        )
+
+    def column_rules(
+        self,
+        missing_log_id: np.ndarray,
+        mileage: np.ndarray,
+        fuel_used: np.ndarray,
+        trip_date: np.ndarray,
+    ) -> list:
+        """
+        Evaluate every rule over the columns of a batch.
+
+        Args:
+            missing_log_id (np.ndarray): True where log_id is missing
+            mileage (np.ndarray): Floats, NaN where missing
+            fuel_used (np.ndarray): Floats, NaN where missing
+            trip_date (np.ndarray): datetime64[D], NaT where missing
+
+        Returns:
+            list: (reason, mask of failing rows) in reporting order
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            efficiency = mileage / fuel_used
+
+        return [
+            ("missing_log_id", missing_log_id),
+            ("missing_mileage", np.isnan(mileage)),
+            ("missing_fuel_used", np.isnan(fuel_used)),
+            ("missing_trip_date", np.isnat(trip_date)),
+            ("negative_mileage", mileage < 0),
+            ("negative_fuel_used", fuel_used < 0),
+            (
+                "implausible_efficiency",
+                (fuel_used > 0) & (efficiency > self.max_efficiency),
+            ),
+            (
+                "trip_date_out_of_range",
+                (trip_date < self.min_date) | (trip_date > self.max_date),
+            ),
+        ]
+
+    def first_failures(self, rules: list, size: int) -> tuple:
+        """
+        Returns:
+            tuple: (mask of invalid rows, reason of each row or None)
+        """
+        reasons = np.full(size, None, dtype=object)
+        invalid = np.zeros(size, dtype=bool)
+        for reason, mask in rules:
+            # A row is reported under the first rule it fails
+            reasons[mask & ~invalid] = reason
+            invalid |= mask
+        return invalid, reasons
+
+    def split(self, items: list) -> tuple:
+        """
+        Split a batch into valid logs and rejected logs.
+
+        Args:
+            items (list): Parsed vehicle logs
+
+        Returns:
+            tuple: (list of valid logs, list of (log, reason) pairs)
+        """
+        if not items:
+            return [], []
+
+        invalid, reasons = self.first_failures(self.rules(items), len(items))
+        valid = [items[i] for i in np.flatnonzero(~invalid)]
+        rejected = [(items[i], reasons[i]) for i in np.flatnonzero(invalid)]
+        return valid, rejected
+
+    def split_record_batch(self, batch) -> tuple:
+        """
+        Split an Arrow record batch, conformed to the table's column types,
+        into valid logs and rejected logs. The columns are validated as
+        they are, only rejected rows become dicts.
+
+        Args:
+            batch (pyarrow.RecordBatch): Conformed vehicle logs
+
+        Returns:
+            tuple: (pyarrow.RecordBatch of valid logs, list of (log, reason) pairs)
+        """
+        rules = self.column_rules(
+            batch.column("log_id").is_null().to_numpy(zero_copy_only=False),
+            batch.column("mileage").to_numpy(zero_copy_only=False),
+            batch.column("fuel_used").to_numpy(zero_copy_only=False),
+            batch.column("trip_date").to_numpy(zero_copy_only=False),
+        )
+        invalid, reasons = self.first_failures(rules, batch.num_rows)
+        if not invalid.any():
+            return batch, []
+        rejected = list(zip(batch.filter(invalid).to_pylist(), reasons[invalid]))
+        return batch.filter(~invalid), rejected
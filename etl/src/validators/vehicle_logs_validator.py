@@ -1,4 +1,11 @@
+def vehicle_log_error(data: dict):
+    """Reason a vehicle log is invalid, None for a valid log."""
+    if data.get("mileage") is None:
+        return "missing_mileage"
+    if data.get("fuel_used") is None:
+        return "missing_fuel_used"
+    return None
+
+
 def validate_vehicle_log(data: dict):
-    if data.get("mileage") is not None and data.get("fuel_used") is not None:
-        return True
-    return False
+    return vehicle_log_error(data) is None
@@ -0,0 +1,7 @@
+"""
+Output writers for the ETL pipeline.
+Side outputs such as rejected records are streamed to disk
+so their size never depends on what fits in memory.
+"""
+
+from writers.invalid_sink import InvalidRecordSink
@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INVALID_MAX_BYTES = int(os.getenv("INVALID_MAX_BYTES", 100 * 1024 * 1024))
+INVALID_GZIP = os.getenv("INVALID_GZIP", "false").lower() == "true"
+
+
+class InvalidRecordSink:
+    """
+    Appends rejected records to NDJSON files as they are found, so memory
+    stays bounded no matter how bad a feed is. Files rotate once they reach
+    max_bytes on disk and can be gzip-compressed. Counts records per reason.
+
+    Files are named data/invalid/<table>_invalid_<run timestamp>_<part>.ndjson[.gz]
+    and each line is {"reason": ..., "record": {...}}.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        directory: str = os.path.join("data", "invalid"),
+        max_bytes: int = None,
+        compress: bool = None,
+    ):
+        self.table_name = table_name
+        self.directory = directory
+        self.max_bytes = max_bytes or INVALID_MAX_BYTES
+        self.compress = INVALID_GZIP if compress is None else compress
+        self.run = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.counts = Counter()
+        self.paths = []
+        self.raw = None
+        self.file = None
+        # Producer threads and the loading thread may both reject records
+        self.lock = threading.Lock()
+
+    def write(self, record: dict, reason: str):
+        """
+        Append one rejected record.
+
+        Args:
+            record (dict): Record as parsed from the input
+            reason (str): Why the record was rejected
+        """
+        line = json.dumps({"reason": reason, "record": record}, default=str) + "\n"
+        with self.lock:
+            if self.file is None:
+                self.open_part()
+            self.file.write(line.encode("utf-8"))
+            self.counts[reason] += 1
+            # Compressed size is only known once gzip flushed to the raw file
+            if self.raw.tell() >= self.max_bytes:
+                self.close_part()
+
+    def open_part(self):
+        os.makedirs(self.directory, exist_ok=True)
+        extension = "ndjson.gz" if self.compress else "ndjson"
+        path = os.path.join(
+            self.directory,
+            f"{self.table_name}_invalid_{self.run}_{len(self.paths):04d}.{extension}",
+        )
+        logger.info(f"Writing invalid items to file: {path}")
+        self.raw = open(path, "ab")
+        self.file = self.raw
+        if self.compress:
+            self.file = gzip.GzipFile(fileobj=self.raw, mode="ab")
+        self.paths.append(path)
+
+    def close_part(self):
+        if self.file is not self.raw:
+            self.file.close()
+        self.raw.close()
+        self.file = None
+        self.raw = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def close(self):
+        """Close the current file and log the per-reason counts."""
+        with self.lock:
+            if self.file is not None:
+                self.close_part()
+        if self.counts:
+            reasons = ", ".join(
+                f"{reason}: {count}" for reason, count in self.counts.most_common()
+            )
+            logger.warning(
+                f"Invalid {self.table_name} items: {self.total} ({reasons}), "
+                f"saved to {len(self.paths)} file(s)"
+            )
@@ -0,0 +1,24 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The ETL imports its modules from src, like PYTHONPATH=/app/src in the image
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# Tests that need Postgres run against their own database on the server
+# configured by DB_HOST, DB_PORT, DB_USER and DB_PASSWORD
+os.environ["DB_NAME"] = os.getenv("TEST_DB_NAME", "logistics_test")
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Shared Database of the test thread, skips the test without a server."""
+    from database.db import Database
+
+    Database.init_db()
+    try:
+        return Database.get_instance()
+    except Exception as e:
+        pytest.skip(f"No test database: {e}")
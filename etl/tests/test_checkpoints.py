@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+
+from processors import stream_processor
+from processors.stream_processor import StreamProcessor
+from services.checkpoint_service import CheckpointService
+
+TABLE = "checkpoint_items"
+
+
+@pytest.fixture
+def table(database, tmp_path, monkeypatch):
+    # Processed, failed and invalid files are written below the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(stream_processor, "BATCH_SIZE", 2)
+    monkeypatch.setattr(stream_processor, "MAX_RETRIES", 1)
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    database.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            item_id VARCHAR(10) PRIMARY KEY,
+            CONSTRAINT not_bad CHECK (item_id <> 'BAD')
+        )
+        """
+    )
+    CheckpointService()
+    database.execute(
+        f"DELETE FROM ingestion_checkpoints WHERE table_name = '{TABLE}'"
+    )
+    yield database
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def write_items(path, item_ids: list):
+    path.write_text("".join(json.dumps({"item_id": i}) + "\n" for i in item_ids))
+
+
+def loaded(database) -> list:
+    rows = database.fetch(f"SELECT item_id FROM {TABLE} ORDER BY item_id")
+    return [row[0] for row in rows]
+
+
+def test_resume_skips_committed_batches(table, tmp_path):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B", "BAD", "C", "D"])
+
+    processor = StreamProcessor(str(path), TABLE, ["item_id"])
+    assert not processor.process_file()
+    # The failed second batch stays unloaded and the file stays in place
+    assert loaded(table) == ["A", "B"]
+    assert path.exists()
+    line = json.dumps({"item_id": "A"}) + "\n"
+    assert processor.checkpoints.load(path, TABLE) == (1, 2, len(line) * 2)
+
+    # Once the cause is gone the file resumes after the first batch, replaying
+    # it would fail on the primary key
+    table.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT not_bad")
+    processor = StreamProcessor(str(path), TABLE, ["item_id"])
+    assert processor.process_file()
+    assert loaded(table) == ["A", "B", "BAD", "C", "D"]
+    assert not path.exists()
+    assert os.path.exists(os.path.join("data", "processed", "items.ndjson"))
+    assert table.fetch(
+        f"SELECT 1 FROM ingestion_checkpoints WHERE table_name = '{TABLE}'"
+    ) == []
+
+
+def test_changed_file_invalidates_its_checkpoint(table, tmp_path):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B"])
+    checkpoints = CheckpointService()
+
+    checkpoints.save(path, TABLE, 1, 2, 10)
+    assert checkpoints.load(path, TABLE) == (1, 2, 10)
+
+    write_items(path, ["A", "B", "C"])
+    assert checkpoints.load(path, TABLE) is None
+
+
+def test_checkpoint_rolls_back_with_a_failed_batch(table, tmp_path):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B"])
+    processor = StreamProcessor(str(path), TABLE, ["item_id"])
+
+    def fail_batch(db, buffer, table_name) -> bool:
+        return db.copy_from(buffer, "missing_table", ["item_id"])
+
+    processor.encoder.copy = fail_batch
+    buffer = processor.encoder.new_buffer()
+    buffer.write(processor.encoder.encode({"item_id": "A"}))
+    assert not processor.load_batch(buffer, position=(1, 1, 16))
+    assert processor.checkpoints.load(path, TABLE) is None
+
+
+def test_failed_checkpoint_rolls_back_its_batch(table, tmp_path, monkeypatch):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B"])
+    processor = StreamProcessor(str(path), TABLE, ["item_id"])
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("checkpoint failed")
+
+    monkeypatch.setattr(processor.checkpoints, "save", fail)
+    buffer = processor.encoder.new_buffer()
+    buffer.write(processor.encoder.encode({"item_id": "A"}))
+    assert not processor.load_batch(buffer, position=(1, 1, 16))
+    assert loaded(table) == []
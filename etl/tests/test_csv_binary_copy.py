@@ -0,0 +1,153 @@
+import struct
+
+import pytest
+
+from constants.constants import SHIPPING_COLUMNS, SHIPPING_COLUMN_TYPES
+from database.copy_encoders import (
+    BinaryCopyEncoder,
+    PGCOPY_HEADER,
+    PGCOPY_TRAILER,
+    POSTGRES_EPOCH,
+    TextCopyEncoder,
+    copy_statement,
+)
+from readers import get_reader
+
+TABLE = "csv_copy_shipments"
+
+
+def decode_rows(data: bytes, columns: list, column_types: dict) -> list:
+    """Parse binary COPY data back into dicts."""
+    assert data.startswith(PGCOPY_HEADER) and data.endswith(PGCOPY_TRAILER)
+    position = len(PGCOPY_HEADER)
+    rows = []
+    while position < len(data) - len(PGCOPY_TRAILER):
+        (field_count,) = struct.unpack_from("!h", data, position)
+        position += 2
+        row = {}
+        for col in columns[:field_count]:
+            (length,) = struct.unpack_from("!i", data, position)
+            position += 4
+            if length == -1:
+                row[col] = None
+                continue
+            field = data[position : position + length]
+            position += length
+            kind = column_types[col]
+            if kind == "FLOAT":
+                row[col] = struct.unpack("!d", field)[0]
+            elif kind == "INTEGER":
+                row[col] = struct.unpack("!i", field)[0]
+            elif kind == "DATE":
+                row[col] = struct.unpack("!i", field)[0] + POSTGRES_EPOCH
+            else:
+                row[col] = field.decode("utf-8")
+        rows.append(row)
+    return rows
+
+
+def write_csv(path, *lines: str):
+    path.write_text(",".join(SHIPPING_COLUMNS) + "\n" + "".join(lines))
+
+
+def encode_csv(path, encoder):
+    buffer = encoder.new_buffer()
+    with get_reader(path, column_types=SHIPPING_COLUMN_TYPES) as reader:
+        for item in reader:
+            buffer.write(encoder.encode(item))
+    return encoder.finish(buffer)
+
+
+def test_csv_fields_encode_as_binary_copy(tmp_path):
+    path = tmp_path / "shipments.csv"
+    write_csv(
+        path,
+        "S1,Berlin,Hamburg,12.5,99.90,3.0,L1\n",
+        "S2,Berlin,Munich,7,10,4,\n",
+    )
+    encoder = BinaryCopyEncoder(SHIPPING_COLUMNS, SHIPPING_COLUMN_TYPES)
+
+    rows = decode_rows(
+        encode_csv(path, encoder).getvalue(), SHIPPING_COLUMNS, SHIPPING_COLUMN_TYPES
+    )
+
+    assert [row["delivery_time"] for row in rows] == [3, 4]
+    assert rows[0]["weight"] == 12.5 and rows[1]["cost"] == 10.0
+    assert rows[0]["log_id"] == "L1" and rows[1]["log_id"] is None
+
+
+def test_whole_numbers_are_normalised_for_text_copy(tmp_path):
+    path = tmp_path / "shipments.csv"
+    write_csv(
+        path,
+        "S1,Berlin,Hamburg,12.5,99.90,3.0,L1\n",
+        "S2,Berlin,Munich,7,10,4e1,\n",
+        "S3,Berlin,Munich,7,10,3.5,\n",
+    )
+
+    lines = encode_csv(path, TextCopyEncoder(SHIPPING_COLUMNS)).getvalue().splitlines()
+
+    assert [line.split("\t")[5] for line in lines] == ["3", "40", "3.5"]
+    # Only INTEGER columns are touched
+    assert lines[0].split("\t")[3:5] == ["12.5", "99.90"]
+
+
+@pytest.fixture
+def table(database):
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    database.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            shipment_id VARCHAR(50), origin VARCHAR(100), destination VARCHAR(100),
+            weight FLOAT, cost FLOAT, delivery_time INTEGER, log_id VARCHAR(50)
+        )
+        """
+    )
+    yield database
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def copy_csv(database, path, encoder) -> list:
+    """Load a CSV file with the encoder's COPY format, returns the loaded rows."""
+    database.execute(f"TRUNCATE {TABLE}")
+    connection = database.get_connection()
+    try:
+        buffer = encode_csv(path, encoder)
+        buffer.seek(0)
+        with connection.cursor() as cur:
+            database.copy_expert(
+                copy_statement(TABLE, SHIPPING_COLUMNS, encoder.format),
+                buffer,
+                cursor=cur,
+            )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return database.fetch(f"SELECT * FROM {TABLE} ORDER BY shipment_id")
+
+
+@pytest.mark.parametrize(
+    "encoder",
+    [
+        TextCopyEncoder(SHIPPING_COLUMNS),
+        BinaryCopyEncoder(SHIPPING_COLUMNS, SHIPPING_COLUMN_TYPES),
+    ],
+    ids=["text", "binary"],
+)
+def test_copy_formats_accept_the_same_csv(table, tmp_path, encoder):
+    path = tmp_path / "shipments.csv"
+    write_csv(
+        path,
+        "S1,Berlin,Hamburg,12.5,99.90,3.0,L1\n",
+        "S2,Berlin,Munich,7,10,4,\n",
+    )
+
+    assert copy_csv(table, path, encoder) == [
+        ("S1", "Berlin", "Hamburg", 12.5, 99.9, 3, "L1"),
+        ("S2", "Berlin", "Munich", 7.0, 10.0, 4, None),
+    ]
+
+    write_csv(path, "S3,Berlin,Munich,7,10,3.5,\n")
+    with pytest.raises(Exception):
+        copy_csv(table, path, encoder)
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from pipeline.dag import DagRunner, Stage
+
+
+def test_failed_dependency_skips_its_dependents():
+    ran = []
+
+    def stage(name, result=True):
+        def run():
+            ran.append(name)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return run
+
+    results = DagRunner(
+        [
+            Stage("vehicles", stage("vehicles", RuntimeError("boom"))),
+            Stage("logs", stage("logs"), depends_on=["vehicles"]),
+            Stage("shipments", stage("shipments"), depends_on=["logs"]),
+            Stage("staging", stage("staging")),
+        ],
+        workers=2,
+    ).run()
+
+    assert results == {
+        "vehicles": False,
+        "logs": False,
+        "shipments": False,
+        "staging": True,
+    }
+    assert sorted(ran) == ["staging", "vehicles"]
+
+
+def test_independent_stages_run_concurrently():
+    # Both stages wait for each other, run one after another they time out
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run():
+        barrier.wait()
+        return True
+
+    results = DagRunner(
+        [Stage("vehicles", run), Stage("staging", run)], workers=2
+    ).run()
+    assert results == {"vehicles": True, "staging": True}
+
+
+def test_dependent_starts_after_its_dependency_succeeded():
+    finished = []
+    completed = []
+
+    def first():
+        finished.append("vehicles")
+        return True
+
+    def second():
+        return finished == ["vehicles"]
+
+    results = DagRunner(
+        [
+            Stage("logs", second, depends_on=["vehicles"]),
+            Stage(
+                "vehicles", first, on_success=lambda: completed.append("vehicles")
+            ),
+        ],
+        workers=2,
+    ).run()
+    assert results == {"vehicles": True, "logs": True}
+    assert completed == ["vehicles"]
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        DagRunner([Stage("logs", lambda: True, depends_on=["vehicles"])])
+
+
+def test_dependency_cycle_is_rejected():
+    stages = [
+        Stage("a", lambda: True, depends_on=["b"]),
+        Stage("b", lambda: True, depends_on=["a"]),
+    ]
+    with pytest.raises(ValueError):
+        DagRunner(stages).run()
@@ -0,0 +1,27 @@
+from datetime import date
+
+from validators.log_date_index import LogDateIndex
+
+
+def test_lookup_across_chunks():
+    index = LogDateIndex()
+    index.extend([("L2", "2024-01-02"), ("L10", date(2023, 5, 1))])
+    index.extend([("L1", "2024-02-03T00:00:00")])
+
+    assert len(index) == 3
+    assert index.get("L1") == date(2024, 2, 3)
+    assert index.get("L2") == date(2024, 1, 2)
+    assert index.get("L10") == date(2023, 5, 1)
+    assert index.get("L3") is None
+
+
+def test_extend_after_freeze_keeps_earlier_keys():
+    index = LogDateIndex()
+    index.extend([("B", "2024-01-01")])
+    assert index.get("B") == date(2024, 1, 1)
+
+    index.extend([("A", "2024-01-02"), ("LONGER_KEY", "2024-01-03")])
+    assert index.get("A") == date(2024, 1, 2)
+    assert index.get("B") == date(2024, 1, 1)
+    assert index.get("LONGER_KEY") == date(2024, 1, 3)
+    assert index.get("LONGER") is None
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+from processors import stream_processor
+from processors.stream_processor import StreamProcessor
+from services.manifest_service import ManifestService
+from utils.date_range import DateRange
+
+TABLE = "manifest_items"
+
+
+@pytest.fixture
+def manifest(database, tmp_path, monkeypatch):
+    # Processed files are moved below the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(stream_processor, "INCREMENTAL", True)
+    monkeypatch.setattr(stream_processor, "CHECKPOINTING", False)
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    database.execute(f"CREATE TABLE {TABLE} (item_id VARCHAR(10) PRIMARY KEY)")
+    service = ManifestService()
+    database.execute(f"DELETE FROM ingested_files WHERE table_name = '{TABLE}'")
+    yield service
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def write_items(path, item_ids: list):
+    path.write_text("".join(json.dumps({"item_id": i}) + "\n" for i in item_ids))
+
+
+def test_recorded_file_is_processed(manifest, tmp_path):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B"])
+    assert not manifest.is_processed(path, TABLE)
+
+    manifest.record(path, TABLE, DateRange())
+    assert manifest.is_processed(path, TABLE)
+    # Another table loads the same file on its own
+    assert not manifest.is_processed(path, "other_items")
+
+
+def test_same_content_under_a_new_name_is_processed(manifest, tmp_path):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B"])
+    manifest.record(path, TABLE)
+
+    redelivered = tmp_path / "items_20240501.ndjson"
+    write_items(redelivered, ["A", "B"])
+    assert manifest.is_processed(redelivered, TABLE)
+
+    changed = tmp_path / "items_20240502.ndjson"
+    write_items(changed, ["A", "C"])
+    assert not manifest.is_processed(changed, TABLE)
+
+
+def test_unchanged_file_is_skipped(manifest, database, tmp_path):
+    path = tmp_path / "items.ndjson"
+    write_items(path, ["A", "B"])
+    assert StreamProcessor(str(path), TABLE, ["item_id"]).process_input()
+    assert not path.exists()
+
+    # A re-delivery of the loaded content is moved away without loading it,
+    # loading it again would fail on the primary key
+    redelivered = tmp_path / "items_20240501.ndjson"
+    write_items(redelivered, ["A", "B"])
+    new = tmp_path / "items_20240502.ndjson"
+    write_items(new, ["C"])
+
+    processor = StreamProcessor(str(path), TABLE, ["item_id"])
+    assert processor.input_files() == [new]
+    assert not redelivered.exists()
+    assert os.path.exists(os.path.join("data", "processed", redelivered.name))
+    assert processor.process_input()
+    rows = database.fetch(f"SELECT item_id FROM {TABLE} ORDER BY item_id")
+    assert [row[0] for row in rows] == ["A", "B", "C"]
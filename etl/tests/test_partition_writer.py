@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+
+from database.copy_encoders import TextCopyEncoder
+from database.partition_writer import PartitionedEncoder
+
+
+class FakeDatabase:
+    def __init__(self, failing_table: str = None):
+        self.failing_table = failing_table
+        self.copied = []
+        self.committed = []
+        self.transactions = 0
+
+    @contextmanager
+    def transaction(self):
+        self.transactions += 1
+        yield self
+        self.committed.extend(self.copied)
+
+    def copy_from(self, buffer, table, columns, sep="\t") -> bool:
+        if table == self.failing_table:
+            # Database.copy_from rolls the whole transaction back on error
+            self.copied = []
+            return False
+        self.copied.append(table)
+        return True
+
+
+def build_batch(encoder, trip_dates: list):
+    buffer = encoder.new_buffer()
+    for index, trip_date in enumerate(trip_dates):
+        buffer.write(encoder.encode({"log_id": f"L{index}", "trip_date": trip_date}))
+    return encoder.finish(buffer)
+
+
+def test_partitions_of_a_batch_commit_together():
+    encoder = PartitionedEncoder(TextCopyEncoder(["log_id", "trip_date"]), "trip_date")
+    buffer = build_batch(encoder, ["2023-12-31", "2024-01-01", "2024-06-01"])
+    db = FakeDatabase()
+
+    assert encoder.copy(db, buffer, "vehicle_logs")
+    assert db.transactions == 1
+    assert sorted(db.committed) == ["vehicle_logs_2023", "vehicle_logs_2024"]
+
+
+def test_failed_partition_fails_the_whole_batch():
+    encoder = PartitionedEncoder(TextCopyEncoder(["log_id", "trip_date"]), "trip_date")
+    buffer = build_batch(encoder, ["2023-12-31", "2024-01-01", "2025-01-01"])
+    db = FakeDatabase(failing_table="vehicle_logs_2024")
+
+    assert not encoder.copy(db, buffer, "vehicle_logs")
+    assert db.committed == []
+    # Nothing is left out of the failed data
+    assert buffer.getvalue().count("\n") == 3
@@ -0,0 +1,20 @@
+from database.partitions import conflicting_partitions, partition_bounds
+
+
+def test_monthly_year_conflicts_with_its_yearly_partition():
+    suffixes = ["2023", "2024", "2025_01", "default"]
+    assert conflicting_partitions(suffixes, {"2024", "2025"}) == ["2024"]
+
+
+def test_yearly_year_conflicts_with_its_monthly_partitions():
+    suffixes = ["2024_01", "2024_02", "2025"]
+    assert conflicting_partitions(suffixes, set()) == ["2024_01", "2024_02"]
+
+
+def test_matching_layout_has_no_conflicts():
+    assert conflicting_partitions(["2023", "2024_01", "2024_12"], {"2024"}) == []
+
+
+def test_partition_bounds():
+    assert partition_bounds("2024") == ("2024-01-01", "2025-01-01")
+    assert partition_bounds("2024_12") == ("2024-12-01", "2025-01-01")
@@ -0,0 +1,95 @@
+import pytest
+
+from database.copy_encoders import TextCopyEncoder
+from database.upsert_writer import UpsertEncoder, merge_statement
+
+TABLE = "upsert_items"
+COLUMNS = ["item_id", "name", "quantity"]
+
+
+@pytest.fixture
+def table(database):
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    database.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            item_id VARCHAR(10) PRIMARY KEY,
+            name VARCHAR(20),
+            quantity INTEGER
+        )
+        """
+    )
+    yield database
+    database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+def rows(database) -> list:
+    return database.fetch(f"SELECT {', '.join(COLUMNS)} FROM {TABLE} ORDER BY item_id")
+
+
+def load(database, encoder, items: list) -> bool:
+    buffer = encoder.new_buffer()
+    for item in items:
+        buffer.write(encoder.encode(item))
+    return encoder.copy(database, encoder.finish(buffer), TABLE)
+
+
+def test_merge_statement_updates_non_key_columns():
+    sql = " ".join(merge_statement(TABLE, COLUMNS, ["item_id"], "batch").split())
+
+    assert sql == (
+        f"INSERT INTO {TABLE} (item_id, name, quantity) "
+        "SELECT DISTINCT ON (item_id) item_id, name, quantity FROM batch "
+        "ORDER BY item_id, ctid DESC "
+        "ON CONFLICT (item_id) DO UPDATE SET name = EXCLUDED.name, "
+        "quantity = EXCLUDED.quantity"
+    )
+
+
+def test_merge_statement_without_update_columns_does_nothing():
+    sql = merge_statement(TABLE, ["item_id"], ["item_id"], "batch")
+
+    assert "ON CONFLICT (item_id) DO NOTHING" in sql
+
+
+def test_last_duplicate_by_row_position_wins(table):
+    # The shipment path orders by the row's position in the file, not ctid
+    source = (
+        "(VALUES ('A', 'first', 1, 1), ('B', 'only', 5, 2), ('A', 'last', 2, 3)) "
+        "AS batch (item_id, name, quantity, row_position)"
+    )
+    table.execute(
+        merge_statement(TABLE, COLUMNS, ["item_id"], source, position="row_position")
+    )
+
+    assert rows(table) == [("A", "last", 2), ("B", "only", 5)]
+
+
+def test_loading_a_file_twice_leaves_identical_rows(table):
+    encoder = UpsertEncoder(TextCopyEncoder(COLUMNS), ["item_id"])
+    items = [
+        {"item_id": "A", "name": "first", "quantity": 1},
+        {"item_id": "B", "name": "only", "quantity": 5},
+        {"item_id": "A", "name": "last", "quantity": 2},
+    ]
+
+    assert load(table, encoder, items)
+    first = rows(table)
+    assert load(table, encoder, items)
+
+    assert rows(table) == first == [("A", "last", 2), ("B", "only", 5)]
+
+
+def test_redelivered_rows_are_updated_in_place(table):
+    encoder = UpsertEncoder(TextCopyEncoder(COLUMNS), ["item_id"])
+    assert load(table, encoder, [{"item_id": "A", "name": "old", "quantity": 1}])
+
+    assert load(
+        table,
+        encoder,
+        [
+            {"item_id": "A", "name": "new", "quantity": 3},
+            {"item_id": "C", "name": "added", "quantity": 4},
+        ],
+    )
+    assert rows(table) == [("A", "new", 3), ("C", "added", 4)]
@@ -0,0 +1,38 @@
+from datetime import date
+
+from validators import vehicle_log_batch_validator
+from validators.vehicle_log_batch_validator import VehicleLogBatchValidator
+
+
+def fake_today(day: date):
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return day
+
+    return FakeDate
+
+
+def log(trip_date: str) -> dict:
+    return {"log_id": "L1", "mileage": 10, "fuel_used": 1, "trip_date": trip_date}
+
+
+def test_max_date_follows_the_current_day(monkeypatch):
+    monkeypatch.delenv("TRIP_DATE_MAX", raising=False)
+
+    monkeypatch.setattr(vehicle_log_batch_validator, "date", fake_today(date(2024, 3, 1)))
+    first = VehicleLogBatchValidator()
+    valid, rejected = first.split([log("2024-03-03")])
+    assert not valid and len(rejected) == 1
+
+    # A daemon creates a new validator per micro-batch, days later
+    monkeypatch.setattr(vehicle_log_batch_validator, "date", fake_today(date(2024, 3, 5)))
+    second = VehicleLogBatchValidator()
+    valid, rejected = second.split([log("2024-03-03")])
+    assert len(valid) == 1 and not rejected
+
+
+def test_max_date_from_the_environment(monkeypatch):
+    monkeypatch.setenv("TRIP_DATE_MAX", "2024-01-31")
+    validator = VehicleLogBatchValidator()
+    assert str(validator.max_date) == "2024-01-31"
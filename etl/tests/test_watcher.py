@@ -0,0 +1,65 @@
+import pytest
+
+from pipeline import watcher
+from pipeline.watcher import FolderWatcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watcher.time, "monotonic", clock)
+    return clock
+
+
+def test_growing_file_is_not_picked_up(tmp_path, clock):
+    folder = FolderWatcher(tmp_path, settle=10)
+    path = tmp_path / "vehicle_logs_1.ndjson"
+    path.write_text('{"log_id": "L1"}\n')
+    assert folder.scan() == []
+
+    # Still being copied in, every change restarts the settle time
+    clock.now += 8
+    with open(path, "a") as file:
+        file.write('{"log_id": "L2"}\n')
+    assert folder.scan() == []
+    clock.now += 8
+    assert folder.scan() == []
+
+    clock.now += 2
+    assert folder.scan() == [path]
+
+
+def test_settled_file_is_handed_out_once(tmp_path, clock):
+    folder = FolderWatcher(tmp_path, settle=10)
+    loaded = tmp_path / "shipments_1.csv"
+    loaded.write_text("shipment_id\nS1\n")
+    (tmp_path / "notes.txt").write_text("not an input file")
+    folder.scan()
+
+    clock.now += 10
+    assert folder.wait_for_files() == [loaded]
+    # A file that failed to load stays put, it is retried only once it changed
+    assert folder.scan() == []
+    loaded.write_text("shipment_id\nS1\nS2\n")
+    clock.now += 10
+    folder.scan()
+    clock.now += 10
+    assert folder.scan() == [loaded]
+
+
+def test_micro_batch_is_capped(tmp_path, clock):
+    folder = FolderWatcher(tmp_path, settle=0, max_files=2)
+    paths = [tmp_path / f"vehicle_logs_{i}.ndjson" for i in range(3)]
+    for path in paths:
+        path.write_text("{}\n")
+
+    assert folder.wait_for_files() == paths[:2]
+    assert folder.wait_for_files() == paths[2:]